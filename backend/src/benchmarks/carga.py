@@ -0,0 +1,337 @@
+"""
+Teste de carga da circulação: abertura da biblioteca pela manhã.
+
+Sobe um uvicorn local (processo separado) sobre um banco gerado por
+gerar_dados.py e dispara usuários virtuais (asyncio + httpx) que sorteiam
+operações por peso: login, navegação no catálogo, empréstimos, devoluções e
+reservas. O número de usuários virtuais segue um perfil de estágios com
+rampa; um semáforo limita as requisições simultâneas.
+
+O relatório traz, por operação, requisições, taxa de erro e latências
+p50/p95/p99, além das mensagens "database is locked" (SQLITE_BUSY) que o
+servidor registrou.
+
+Uso (a partir de backend/src):
+    python -m benchmarks.carga --emprestimos 100000 --perfil 10:30 50:60 100:30
+    python -m benchmarks.carga --banco /tmp/veridian.db --workers 4 --max-concorrencia 64
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+
+DIRETORIO_SRC = Path(__file__).resolve().parent.parent
+
+# Peso relativo de cada operação no sorteio
+CENARIOS = {
+    "login": 10,
+    "listar_obras": 25,
+    "buscar_catalogo": 15,
+    "ver_obra": 15,
+    "meus_emprestimos": 5,
+    "emprestar": 15,
+    "devolver": 10,
+    "reservar": 5,
+}
+
+MARCADORES_LOCK = ("database is locked", "database table is locked", "SQLITE_BUSY")
+
+
+class Estado:
+    """Dados compartilhados entre os usuários virtuais e as medições."""
+
+    def __init__(self, contexto: dict):
+        self.usuarios = contexto["usuarios"]
+        self.obras = contexto["obras"]
+        self.disponiveis = deque(contexto["disponiveis"])
+        self.em_aberto = deque(contexto["em_aberto"])
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(int)
+        self.excecoes = defaultdict(int)  # sem resposta: timeout, conexão recusada...
+        self.status_erro = defaultdict(lambda: defaultdict(int))
+
+
+def _carregar_contexto(url_banco: str) -> dict:
+    """Lê do banco os ids usados para montar as requisições."""
+    os.environ["DATABASE_URL"] = url_banco
+    sys.path.insert(0, str(DIRETORIO_SRC))
+    from sqlalchemy import text
+
+    from database import engine
+
+    with engine.connect() as conn:
+        contexto = {
+            "usuarios": [
+                tuple(linha)
+                for linha in conn.execute(
+                    text("SELECT id, cpf FROM usuarios WHERE status = 'ativo' ORDER BY id LIMIT 1000")
+                )
+            ],
+            "obras": [linha[0] for linha in conn.execute(text("SELECT id FROM obras ORDER BY id LIMIT 2000"))],
+            "disponiveis": [
+                tuple(linha)
+                for linha in conn.execute(
+                    text("SELECT id, obra_id FROM exemplares WHERE status = 'disponivel' ORDER BY id LIMIT 20000")
+                )
+            ],
+            "em_aberto": [
+                tuple(linha)
+                for linha in conn.execute(
+                    text(
+                        "SELECT id, exemplar_id, obra_id FROM emprestimos "
+                        "WHERE data_devolucao IS NULL ORDER BY id LIMIT 20000"
+                    )
+                )
+            ],
+        }
+    engine.dispose()
+    return contexto
+
+
+async def _operacao(cliente: httpx.AsyncClient, nome: str, estado: Estado, rng: random.Random):
+    """Monta e executa a requisição da operação; devolve a resposta (ou None se não há o que fazer)."""
+    hoje = date.today()
+    usuario_id, cpf = rng.choice(estado.usuarios)
+
+    if nome == "login":
+        return await cliente.post("/auth/login", json={"cpf": cpf, "senha": "senha123"})
+    if nome == "listar_obras":
+        return await cliente.get("/obras/", params={"limit": 50, "ordenar": rng.choice(["titulo", "-criadoEm"])})
+    if nome == "buscar_catalogo":
+        termo = rng.choice(["sombra", "cidade", "memórias", "mar", "tempo", "viagem"])
+        return await cliente.get("/obras/busca", params={"q": termo, "limit": 20})
+    if nome == "ver_obra":
+        return await cliente.get(f"/obras/{rng.choice(estado.obras)}")
+    if nome == "meus_emprestimos":
+        return await cliente.get("/emprestimos/", params={"usuarioId": usuario_id})
+    if nome == "reservar":
+        return await cliente.post("/reservas/", json={
+            "usuarioId": usuario_id,
+            "obraId": rng.choice(estado.obras),
+            "dataReserva": hoje.isoformat(),
+            "dataExpiracao": (hoje + timedelta(days=7)).isoformat(),
+        })
+    if nome == "emprestar":
+        if not estado.disponiveis:
+            return None
+        exemplar_id, obra_id = estado.disponiveis.popleft()
+        resposta = await cliente.post("/emprestimos/", json={
+            "usuarioId": usuario_id,
+            "exemplarId": exemplar_id,
+            "obraId": obra_id,
+            "dataEmprestimo": hoje.isoformat(),
+            "dataPrevistaDevolucao": (hoje + timedelta(days=14)).isoformat(),
+        })
+        if resposta.status_code == 201:
+            estado.em_aberto.append((resposta.json()["id"], exemplar_id, obra_id))
+        return resposta
+    if nome == "devolver":
+        if not estado.em_aberto:
+            return None
+        emprestimo_id, exemplar_id, obra_id = estado.em_aberto.popleft()
+        resposta = await cliente.put(f"/emprestimos/{emprestimo_id}", json={"dataDevolucao": hoje.isoformat()})
+        if resposta.status_code == 200:
+            estado.disponiveis.append((exemplar_id, obra_id))
+        return resposta
+    raise ValueError(nome)
+
+
+async def _usuario_virtual(cliente, estado, semaforo, parar: asyncio.Event, semente: int, pausa: float):
+    rng = random.Random(semente)
+    nomes = list(CENARIOS)
+    pesos = list(CENARIOS.values())
+    while not parar.is_set():
+        nome = rng.choices(nomes, pesos)[0]
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                resposta = await _operacao(cliente, nome, estado, rng)
+            except httpx.HTTPError as erro:
+                estado.erros[nome] += 1
+                estado.excecoes[nome] += 1
+                estado.status_erro[nome][type(erro).__name__] += 1
+            else:
+                # None: nada a fazer (sem exemplar livre ou empréstimo em aberto)
+                if resposta is not None:
+                    estado.latencias[nome].append(time.perf_counter() - inicio)
+                    if resposta.status_code >= 400:
+                        estado.erros[nome] += 1
+                        estado.status_erro[nome][str(resposta.status_code)] += 1
+        # tempo de "pensar" entre uma ação e outra
+        if pausa:
+            await asyncio.sleep(rng.expovariate(1 / pausa))
+
+
+def _alvo(perfil: list[tuple[int, float]], rampa: float, decorrido: float) -> int:
+    """Usuários virtuais no instante `decorrido`, com rampa linear entre estágios."""
+    anterior = 0
+    inicio_estagio = 0.0
+    for usuarios, duracao in perfil:
+        if decorrido < inicio_estagio + duracao:
+            fracao = min(1.0, (decorrido - inicio_estagio) / rampa) if rampa else 1.0
+            return round(anterior + (usuarios - anterior) * fracao)
+        anterior = usuarios
+        inicio_estagio += duracao
+    return 0
+
+
+async def executar_carga(url: str, estado: Estado, args) -> float:
+    """Roda o perfil completo; devolve a duração total em segundos."""
+    semaforo = asyncio.Semaphore(args.max_concorrencia)
+    limites = httpx.Limits(max_connections=args.max_concorrencia, max_keepalive_connections=args.max_concorrencia)
+    duracao_total = sum(duracao for _, duracao in args.perfil)
+
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=args.timeout) as cliente:
+        ativos = []  # (tarefa, evento de parada)
+        inicio = time.perf_counter()
+        ultimo_relato = 0.0
+        while (decorrido := time.perf_counter() - inicio) < duracao_total:
+            alvo = _alvo(args.perfil, args.rampa, decorrido)
+            while len(ativos) < alvo:
+                parar = asyncio.Event()
+                tarefa = asyncio.create_task(
+                    _usuario_virtual(cliente, estado, semaforo, parar, args.seed + len(ativos), args.pausa)
+                )
+                ativos.append((tarefa, parar))
+            while len(ativos) > alvo:
+                ativos.pop()[1].set()
+            if decorrido - ultimo_relato >= 5:
+                total = sum(len(v) for v in estado.latencias.values())
+                print(f"   t={decorrido:5.0f}s  usuários virtuais={len(ativos):4d}  requisições={total}")
+                ultimo_relato = decorrido
+            await asyncio.sleep(0.2)
+
+        for _, parar in ativos:
+            parar.set()
+        await asyncio.gather(*(tarefa for tarefa, _ in ativos), return_exceptions=True)
+        return time.perf_counter() - inicio
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _iniciar_servidor(url_banco: str, porta: int, workers: int, log):
+    ambiente = {**os.environ, "DATABASE_URL": url_banco, "SQL_LENTA_MS": "0"}
+    processo = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(porta),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=DIRETORIO_SRC, env=ambiente, stdout=log, stderr=subprocess.STDOUT,
+    )
+    limite = time.time() + 60
+    while time.time() < limite:
+        if processo.poll() is not None:
+            raise SystemExit("❌ uvicorn terminou antes de ficar pronto")
+        try:
+            if httpx.get(f"http://127.0.0.1:{porta}/health", timeout=1).status_code == 200:
+                return processo
+        except httpx.HTTPError:
+            time.sleep(0.3)
+    processo.terminate()
+    raise SystemExit("❌ uvicorn não respondeu em 60 s")
+
+
+def _percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def relatorio(estado: Estado, duracao: float, caminho_log: str):
+    print(f"\n📊 Resultado ({duracao:.0f}s)\n")
+    print(f"   {'operação':<18}{'req':>8}{'req/s':>9}{'erros':>8}{'%':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    total_req = total_erros = 0
+    for nome in CENARIOS:
+        latencias = estado.latencias.get(nome, [])
+        erros = estado.erros.get(nome, 0)
+        quantidade = len(latencias) + estado.excecoes.get(nome, 0)
+        total_req += quantidade
+        total_erros += erros
+        if not latencias:
+            print(f"   {nome:<18}{quantidade:>8}{'':>9}{erros:>8}")
+            continue
+        print(
+            f"   {nome:<18}{len(latencias):>8}{len(latencias) / duracao:>9.1f}{erros:>8}"
+            f"{erros / max(quantidade, 1):>7.1%}"
+            f"{_percentil(latencias, 0.50) * 1000:>10.1f}"
+            f"{_percentil(latencias, 0.95) * 1000:>10.1f}"
+            f"{_percentil(latencias, 0.99) * 1000:>10.1f}"
+        )
+    print(f"\n   Total: {total_req} requisições ({total_req / duracao:.1f}/s), {total_erros} erros")
+
+    for nome, por_status in estado.status_erro.items():
+        detalhes = ", ".join(f"{codigo}: {vezes}" for codigo, vezes in sorted(por_status.items()))
+        print(f"   ⚠️  {nome}: {detalhes}")
+
+    with open(caminho_log, encoding="utf-8", errors="replace") as log:
+        travamentos = sum(1 for linha in log if any(m in linha for m in MARCADORES_LOCK))
+    print(f"   🔒 Erros de lock do SQLite no servidor: {travamentos}  (log: {caminho_log})")
+
+
+def _estagio(valor: str) -> tuple[int, float]:
+    usuarios, duracao = valor.split(":")
+    return int(usuarios), float(duracao)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da circulação contra um uvicorn local.")
+    parser.add_argument("--banco", help="arquivo SQLite existente; sem ele um banco é gerado")
+    parser.add_argument("--emprestimos", type=int, default=100000, help="tamanho do banco gerado")
+    parser.add_argument(
+        "--perfil", type=_estagio, nargs="+", default=[(10, 20), (50, 40), (100, 20)],
+        help="estágios usuários:segundos, ex.: 10:30 50:60",
+    )
+    parser.add_argument("--rampa", type=float, default=10, help="segundos para chegar ao alvo de cada estágio")
+    parser.add_argument("--max-concorrencia", type=int, default=32, help="requisições simultâneas no máximo")
+    parser.add_argument("--pausa", type=float, default=0.5, help="pausa média (s) entre ações de um usuário")
+    parser.add_argument("--workers", type=int, default=1, help="workers do uvicorn")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = args.banco or os.path.join(diretorio, "carga.db")
+        url_banco = f"sqlite:///{os.path.abspath(caminho)}"
+        if not args.banco:
+            print(f"🎲 Gerando banco com {args.emprestimos} empréstimos...")
+            subprocess.run(
+                [
+                    sys.executable, "gerar_dados.py", "--recriar", "--emprestimos", str(args.emprestimos),
+                    "--obras", str(max(100, args.emprestimos // 50)),
+                    "--usuarios", str(max(100, args.emprestimos // 20)),
+                ],
+                cwd=DIRETORIO_SRC, env={**os.environ, "DATABASE_URL": url_banco},
+                check=True, stdout=subprocess.DEVNULL,
+            )
+
+        estado = Estado(_carregar_contexto(url_banco))
+        porta = _porta_livre()
+        caminho_log = os.path.join(tempfile.gettempdir(), "carga_uvicorn.log")
+        with open(caminho_log, "w") as log:
+            print(f"🚀 uvicorn em http://127.0.0.1:{porta} ({args.workers} worker(s))")
+            servidor = _iniciar_servidor(url_banco, porta, args.workers, log)
+            try:
+                duracao = asyncio.run(executar_carga(f"http://127.0.0.1:{porta}", estado, args))
+            finally:
+                servidor.terminate()
+                servidor.wait(timeout=30)
+        relatorio(estado, duracao, caminho_log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Benchmark das estratégias de chave primária.
+
+Insere a mesma carga numa tabela com o formato de emprestimos (chave
+primária + três chaves estrangeiras indexadas) usando cada estratégia de id
+e mede a taxa de inserção e o tamanho da tabela e de cada índice:
+
+    antes        UUID4 em texto + o índice redundante ix_<tabela>_id que os
+                 modelos criavam junto com a chave primária
+    uuid4        UUID4 em texto
+    uuid7        UUIDv7 em texto (padrão atual, ver identificadores.py)
+    uuid7_blob   UUIDv7 em 16 bytes (referência do ganho de espaço)
+    inteiro      chave inteira autoincremento (referência)
+
+As chaves estrangeiras apontam para pais da mesma estratégia, criados ao
+longo da carga como na aplicação. O cache do banco é limitado (--cache-kib)
+para que a localidade das inserções apareça no tempo.
+
+Uso (a partir de backend/src):
+    python -m benchmarks.chaves --linhas 200000
+    python -m benchmarks.chaves --linhas 200000 --database-url postgresql://...
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import (
+    Column, DateTime, Index, Integer, LargeBinary, MetaData, String, Table,
+    create_engine, event, insert, text,
+)
+
+from identificadores import uuid7
+
+CENARIOS = ("antes", "uuid4", "uuid7", "uuid7_blob", "inteiro")
+
+# um pai novo (usuário, exemplar, obra) a cada PAIS_A_CADA linhas
+PAIS_A_CADA = 10
+
+
+def _gerador(cenario: str):
+    if cenario in ("antes", "uuid4"):
+        return lambda i: str(uuid.uuid4())
+    if cenario == "uuid7":
+        return lambda i: uuid7()
+    if cenario == "uuid7_blob":
+        return lambda i: uuid.UUID(uuid7()).bytes
+    return lambda i: i + 1
+
+
+def _tabela(cenario: str) -> Table:
+    if cenario == "inteiro":
+        tipo = Integer
+    elif cenario == "uuid7_blob":
+        tipo = LargeBinary(16)
+    else:
+        tipo = String(36)
+
+    metadata = MetaData()
+    tabela = Table(
+        "bench_chaves",
+        metadata,
+        Column("id", tipo, primary_key=True, autoincrement=False),
+        Column("usuario_id", tipo, nullable=False),
+        Column("exemplar_id", tipo, nullable=False),
+        Column("obra_id", tipo, nullable=False),
+        Column("criado_em", DateTime, nullable=False),
+        Index("ix_bench_chaves_usuario_id", "usuario_id"),
+        Index("ix_bench_chaves_exemplar_id", "exemplar_id"),
+        Index("ix_bench_chaves_obra_id", "obra_id"),
+    )
+    if cenario == "antes":
+        Index("ix_bench_chaves_id", tabela.c.id)
+    return tabela
+
+
+def _tamanhos(conn) -> dict:
+    """Bytes ocupados pela tabela e por cada índice."""
+    if conn.dialect.name == "sqlite":
+        linhas = conn.execute(text(
+            "SELECT s.name, SUM(s.pgsize) FROM dbstat s "
+            "JOIN sqlite_master m ON m.name = s.name "
+            "WHERE m.tbl_name = 'bench_chaves' GROUP BY s.name"
+        ))
+        return {nome: int(tamanho) for nome, tamanho in linhas}
+    linhas = conn.execute(text(
+        "SELECT c.relname, pg_relation_size(c.oid) FROM pg_class c "
+        "WHERE c.relname = 'bench_chaves' OR c.oid IN "
+        "(SELECT indexrelid FROM pg_index WHERE indrelid = 'bench_chaves'::regclass)"
+    ))
+    return {nome: int(tamanho) for nome, tamanho in linhas}
+
+
+def medir(url: str, cenario: str, linhas: int, lote: int, cache_kib: int, seed: int) -> dict:
+    """Executa a carga de um cenário num banco vazio e devolve as medidas."""
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _pragmas(dbapi_conn, _):
+            dbapi_conn.execute("PRAGMA journal_mode=WAL")
+            dbapi_conn.execute("PRAGMA synchronous=NORMAL")
+            dbapi_conn.execute(f"PRAGMA cache_size=-{cache_kib}")
+
+    tabela = _tabela(cenario)
+    tabela.metadata.drop_all(engine)
+    tabela.metadata.create_all(engine)
+
+    rng = random.Random(seed)
+    novo_id = _gerador(cenario)
+    pais = [novo_id(i) for i in range(3)]
+    instrucao = insert(tabela)
+    agora = time.time()
+
+    inicio = time.perf_counter()
+    with engine.connect() as conn:
+        for comeco in range(0, linhas, lote):
+            bloco = []
+            for i in range(comeco, min(comeco + lote, linhas)):
+                if i % PAIS_A_CADA == 0:
+                    pais.append(novo_id(linhas + i))
+                bloco.append({
+                    "id": novo_id(i),
+                    "usuario_id": rng.choice(pais),
+                    "exemplar_id": rng.choice(pais),
+                    "obra_id": rng.choice(pais),
+                    "criado_em": datetime.utcfromtimestamp(agora + i / 1000),
+                })
+            conn.execute(instrucao, bloco)
+            conn.commit()
+        duracao = time.perf_counter() - inicio
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE bench_chaves"))
+        tamanhos = _tamanhos(conn)
+
+    tabela.metadata.drop_all(engine)
+    engine.dispose()
+    return {
+        "cenario": cenario,
+        "linhas": linhas,
+        "linhas_por_segundo": round(linhas / duracao),
+        "segundos": round(duracao, 2),
+        "bytes_tabela": tamanhos.pop("bench_chaves", 0),
+        "bytes_indices": tamanhos,
+    }
+
+
+def _mib(valor: int) -> str:
+    return f"{valor / 1024 / 1024:8.1f}"
+
+
+def imprimir(resultados: list[dict]) -> None:
+    print(f"\n{'cenário':<12}{'linhas/s':>10}{'tabela MiB':>12}{'índices MiB':>13}")
+    for r in resultados:
+        indices = sum(r["bytes_indices"].values())
+        print(f"{r['cenario']:<12}{r['linhas_por_segundo']:>10}{_mib(r['bytes_tabela']):>12}{_mib(indices):>13}")
+    for r in resultados:
+        print(f"\n{r['cenario']}:")
+        for nome, tamanho in sorted(r["bytes_indices"].items()):
+            print(f"  {nome:<36}{_mib(tamanho)} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark das estratégias de chave primária")
+    parser.add_argument("--linhas", type=int, default=200_000, help="Linhas inseridas por cenário")
+    parser.add_argument("--lote", type=int, default=1000, help="Linhas por transação")
+    parser.add_argument("--cache-kib", type=int, default=2048, help="Cache do SQLite em KiB")
+    parser.add_argument("--cenarios", nargs="+", choices=CENARIOS, default=list(CENARIOS))
+    parser.add_argument("--database-url", help="Banco de teste (padrão: SQLite temporário por cenário)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", type=Path, help="Grava os resultados em JSON")
+    args = parser.parse_args()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for cenario in args.cenarios:
+            url = args.database_url or f"sqlite:///{os.path.join(diretorio, cenario + '.db')}"
+            print(f"⏱️  {cenario}: inserindo {args.linhas} linhas...")
+            resultados.append(medir(url, cenario, args.linhas, args.lote, args.cache_kib, args.seed))
+
+    imprimir(resultados)
+    if args.saida:
+        args.saida.write_text(json.dumps(resultados, indent=2))
+        print(f"\n💾 Resultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark de leituras concorrentes durante escritas no SQLite.
+
+Compara o perfil antigo (journal em rollback, synchronous=FULL) com o
+perfil atual de database.SQLITE_PRAGMAS (WAL).
+
+Uso (a partir de backend/src):
+    python -m benchmarks.concorrencia_sqlite --leitores 8 --duracao 5
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from database import SQLITE_PRAGMAS
+
+PERFIL_ROLLBACK = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "foreign_keys": "ON",
+    "busy_timeout": SQLITE_PRAGMAS["busy_timeout"],
+}
+
+
+def conectar(caminho: str, pragmas: dict) -> sqlite3.Connection:
+    conn = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+    for pragma, valor in pragmas.items():
+        conn.execute(f"PRAGMA {pragma}={valor}")
+    return conn
+
+
+def preparar_banco(caminho: str, linhas: int) -> None:
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE obras (id INTEGER PRIMARY KEY, titulo TEXT, exemplares_disponiveis INTEGER)")
+    conn.executemany(
+        "INSERT INTO obras (id, titulo, exemplares_disponiveis) VALUES (?, ?, ?)",
+        ((i, f"Obra {i}", 5) for i in range(linhas)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def medir(pragmas: dict, leitores: int, duracao: float, linhas: int) -> dict:
+    diretorio = tempfile.mkdtemp()
+    caminho = os.path.join(diretorio, "bench.db")
+    preparar_banco(caminho, linhas)
+
+    parar = threading.Event()
+    leituras = [0] * leitores
+    erros = [0] * leitores
+    escritas = [0]
+
+    def leitor(indice: int):
+        conn = conectar(caminho, pragmas)
+        rnd = random.Random(indice)
+        while not parar.is_set():
+            try:
+                conn.execute(
+                    "SELECT titulo, exemplares_disponiveis FROM obras WHERE id = ?",
+                    (rnd.randrange(linhas),),
+                ).fetchone()
+                leituras[indice] += 1
+            except sqlite3.OperationalError:
+                erros[indice] += 1
+        conn.close()
+
+    def escritor():
+        conn = conectar(caminho, pragmas)
+        rnd = random.Random(-1)
+        while not parar.is_set():
+            with conn:
+                for _ in range(50):
+                    conn.execute(
+                        "UPDATE obras SET exemplares_disponiveis = exemplares_disponiveis - 1 WHERE id = ?",
+                        (rnd.randrange(linhas),),
+                    )
+            escritas[0] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=leitor, args=(i,)) for i in range(leitores)]
+    threads.append(threading.Thread(target=escritor))
+    for thread in threads:
+        thread.start()
+    time.sleep(duracao)
+    parar.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "leituras_por_segundo": sum(leituras) / duracao,
+        "transacoes_escrita_por_segundo": escritas[0] / duracao,
+        "erros_leitura": sum(erros),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leitores", type=int, default=8)
+    parser.add_argument("--duracao", type=float, default=5.0, help="segundos por perfil")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for nome, pragmas in (("rollback", PERFIL_ROLLBACK), ("wal", SQLITE_PRAGMAS)):
+        resultado = medir(pragmas, args.leitores, args.duracao, args.linhas)
+        print(
+            f"{nome:>8}: {resultado['leituras_por_segundo']:>10.0f} leituras/s | "
+            f"{resultado['transacoes_escrita_por_segundo']:>6.0f} transações de escrita/s | "
+            f"{resultado['erros_leitura']} erros de leitura"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Benchmark das rotas da API com controle de regressão.
+
+Para cada tamanho pedido gera um banco com gerar_dados.py (o tamanho é o
+número de empréstimos; as demais tabelas crescem na mesma proporção) e mede
+cada rota em um processo próprio, pelo TestClient: latência p50/p95/p99,
+requisições por segundo, instruções SQL por requisição (do cabeçalho
+Server-Timing) e pico de memória (RSS) do processo.
+
+O resultado vai para um JSON e é comparado com a baseline: p95 acima da
+tolerância ou mais instruções SQL que antes contam como regressão e o
+script termina com código 1.
+
+Uso (a partir de backend/src):
+    python -m benchmarks.endpoints --tamanhos 1000 100000 --salvar-baseline
+    python -m benchmarks.endpoints --tamanhos 1000 100000 --tolerancia 0.15
+    python -m benchmarks.endpoints --tamanhos 1000 --rotas listar_obras login
+"""
+
+import argparse
+import json
+import os
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+DIRETORIO_SRC = Path(__file__).resolve().parent.parent
+BASELINE_PADRAO = Path(__file__).resolve().parent / "baseline_endpoints.json"
+
+# login usa bcrypt (~0,3 s por chamada): menos repetições
+REPETICOES_LOGIN = 20
+
+_CONSULTAS = re.compile(r'desc="(\d+) consultas"')
+
+
+def _contexto(engine) -> dict:
+    """Ids reais do banco usados para montar as requisições."""
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        def ids(sql, limite=5000):
+            return [linha[0] for linha in conn.execute(text(f"{sql} LIMIT {limite}"))]
+
+        usuario = conn.execute(
+            text("SELECT id, cpf FROM usuarios WHERE status = 'ativo' ORDER BY id LIMIT 1")
+        ).one()
+        return {
+            "obras": ids("SELECT id FROM obras ORDER BY id", 200),
+            "autor": conn.execute(text("SELECT autor FROM obras LIMIT 1")).scalar(),
+            "categoria": conn.execute(text("SELECT id FROM categorias LIMIT 1")).scalar(),
+            "usuario": usuario[0],
+            "cpf": usuario[1],
+            "disponiveis": [
+                tuple(linha)
+                for linha in conn.execute(
+                    text("SELECT id, obra_id FROM exemplares WHERE status = 'disponivel' ORDER BY id LIMIT 5000")
+                )
+            ],
+            "em_aberto": ids("SELECT id FROM emprestimos WHERE data_devolucao IS NULL ORDER BY id"),
+        }
+
+
+def _rotas(ctx: dict) -> dict:
+    """Nome -> função(i) que devolve (método, caminho, corpo JSON)."""
+    hoje = date.today()
+    obras = ctx["obras"]
+    disponiveis = iter(ctx["disponiveis"])
+    em_aberto = iter(ctx["em_aberto"])
+
+    def criar_emprestimo(i):
+        exemplar, obra = next(disponiveis)
+        return "POST", "/emprestimos/", {
+            "usuarioId": ctx["usuario"],
+            "exemplarId": exemplar,
+            "obraId": obra,
+            "dataEmprestimo": hoje.isoformat(),
+            "dataPrevistaDevolucao": (hoje + timedelta(days=14)).isoformat(),
+        }
+
+    return {
+        "health": lambda i: ("GET", "/health", None),
+        "listar_obras": lambda i: ("GET", "/obras/?limit=50", None),
+        "listar_obras_filtradas": lambda i: (
+            "GET", f"/obras/?categoriaId={ctx['categoria']}&disponivel=true&ordenar=-exemplaresDisponiveis", None
+        ),
+        "listar_obras_autor": lambda i: ("GET", f"/obras/?autor={ctx['autor']}&ordenar=titulo", None),
+        "buscar_obra": lambda i: ("GET", f"/obras/{obras[i % len(obras)]}", None),
+        "busca_texto": lambda i: ("GET", "/obras/busca?q=sombra&limit=20", None),
+        "listar_exemplares": lambda i: ("GET", "/exemplares/?limit=50", None),
+        "listar_emprestimos": lambda i: ("GET", "/emprestimos/?limit=50", None),
+        "listar_emprestimos_atrasados": lambda i: (
+            "GET", "/emprestimos/?status=atrasado&ordenar=dataPrevistaDevolucao", None
+        ),
+        "listar_emprestimos_usuario": lambda i: ("GET", f"/emprestimos/?usuarioId={ctx['usuario']}", None),
+        "listar_usuarios": lambda i: ("GET", "/usuarios/?limit=50", None),
+        "listar_reservas": lambda i: ("GET", "/reservas/?limit=50", None),
+        "listar_categorias": lambda i: ("GET", "/categorias/", None),
+        "listar_administradores": lambda i: ("GET", "/administradores/", None),
+        "criar_emprestimo": criar_emprestimo,
+        "devolver_emprestimo": lambda i: (
+            "PUT", f"/emprestimos/{next(em_aberto)}", {"dataDevolucao": hoje.isoformat()}
+        ),
+        "login": lambda i: ("POST", "/auth/login", {"cpf": ctx["cpf"], "senha": "senha123"}),
+    }
+
+
+ROTAS = [
+    "health", "listar_obras", "listar_obras_filtradas", "listar_obras_autor", "buscar_obra",
+    "busca_texto", "listar_exemplares", "listar_emprestimos", "listar_emprestimos_atrasados",
+    "listar_emprestimos_usuario", "listar_usuarios", "listar_reservas", "listar_categorias",
+    "listar_administradores", "criar_emprestimo", "devolver_emprestimo", "login",
+]
+
+
+def _percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def medir_rota(nome: str, repeticoes: int, aquecimento: int) -> dict:
+    """Executado no processo filho: mede uma rota contra o DATABASE_URL do ambiente."""
+    sys.path.insert(0, str(DIRETORIO_SRC))
+    from fastapi.testclient import TestClient
+
+    from database import engine
+    from main import app
+
+    client = TestClient(app)
+    gerar = _rotas(_contexto(engine))[nome]
+    if nome == "login":
+        repeticoes = min(repeticoes, REPETICOES_LOGIN)
+        aquecimento = min(aquecimento, 2)
+
+    for i in range(aquecimento):
+        metodo, caminho, corpo = gerar(i)
+        client.request(metodo, caminho, json=corpo)
+
+    latencias = []
+    consultas = []
+    inicio = time.perf_counter()
+    for i in range(aquecimento, aquecimento + repeticoes):
+        metodo, caminho, corpo = gerar(i)
+        t0 = time.perf_counter()
+        resposta = client.request(metodo, caminho, json=corpo)
+        latencias.append(time.perf_counter() - t0)
+        if resposta.status_code >= 400:
+            raise RuntimeError(f"{nome}: {metodo} {caminho} -> {resposta.status_code} {resposta.text[:200]}")
+        encontrado = _CONSULTAS.search(resposta.headers.get("server-timing", ""))
+        if encontrado:
+            consultas.append(int(encontrado.group(1)))
+    duracao = time.perf_counter() - inicio
+
+    return {
+        "repeticoes": repeticoes,
+        "p50_ms": round(_percentil(latencias, 0.50) * 1000, 3),
+        "p95_ms": round(_percentil(latencias, 0.95) * 1000, 3),
+        "p99_ms": round(_percentil(latencias, 0.99) * 1000, 3),
+        "req_por_s": round(repeticoes / duracao, 1),
+        "consultas_sql": statistics.median(consultas) if consultas else None,
+        # ru_maxrss é em KiB no Linux
+        "rss_pico_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _ambiente(caminho_banco: str) -> dict:
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{caminho_banco}",
+        "SQL_LENTA_MS": "0",
+        "VARREDURA_ATRASOS_INTERVALO": "0",
+    }
+
+
+def gerar_banco(tamanho: int, diretorio: str) -> str:
+    caminho = os.path.join(diretorio, f"bench_{tamanho}.db")
+    argumentos = [
+        sys.executable, "gerar_dados.py", "--recriar",
+        "--emprestimos", str(tamanho),
+        "--obras", str(max(100, tamanho // 50)),
+        "--usuarios", str(max(100, tamanho // 20)),
+        "--reservas", str(max(10, tamanho // 50)),
+        "--categorias", "18",
+    ]
+    print(f"🎲 Gerando banco com {tamanho} empréstimos...")
+    subprocess.run(argumentos, cwd=DIRETORIO_SRC, env=_ambiente(caminho), check=True, stdout=subprocess.DEVNULL)
+    return caminho
+
+
+def executar(args) -> dict:
+    resultados = {"gerado_em": time.strftime("%Y-%m-%dT%H:%M:%S"), "tamanhos": {}}
+    with tempfile.TemporaryDirectory() as diretorio:
+        for tamanho in args.tamanhos:
+            caminho = gerar_banco(tamanho, diretorio)
+            por_rota = {}
+            for nome in args.rotas:
+                processo = subprocess.run(
+                    [
+                        sys.executable, "-m", "benchmarks.endpoints", "--medir", nome,
+                        "--repeticoes", str(args.repeticoes), "--aquecimento", str(args.aquecimento),
+                    ],
+                    cwd=DIRETORIO_SRC, env=_ambiente(caminho), capture_output=True, text=True,
+                )
+                if processo.returncode != 0:
+                    print(processo.stderr, file=sys.stderr)
+                    raise SystemExit(f"❌ Falha ao medir {nome} ({tamanho})")
+                por_rota[nome] = json.loads(processo.stdout.strip().splitlines()[-1])
+                m = por_rota[nome]
+                print(
+                    f"   {nome:<30} p50 {m['p50_ms']:>8.2f} ms  p95 {m['p95_ms']:>8.2f} ms  "
+                    f"p99 {m['p99_ms']:>8.2f} ms  {m['req_por_s']:>8.1f} req/s  "
+                    f"SQL {m['consultas_sql']}  RSS {m['rss_pico_mb']} MB"
+                )
+            resultados["tamanhos"][str(tamanho)] = por_rota
+    return resultados
+
+
+def comparar(resultados: dict, baseline: dict, tolerancia: float) -> list[str]:
+    """Lista as regressões em relação à baseline (rotas/tamanhos ausentes são ignorados)."""
+    regressoes = []
+    for tamanho, por_rota in resultados["tamanhos"].items():
+        for nome, atual in por_rota.items():
+            anterior = baseline.get("tamanhos", {}).get(tamanho, {}).get(nome)
+            if not anterior:
+                continue
+            limite = anterior["p95_ms"] * (1 + tolerancia)
+            if atual["p95_ms"] > limite:
+                regressoes.append(
+                    f"{nome} ({tamanho}): p95 {atual['p95_ms']:.2f} ms > {anterior['p95_ms']:.2f} ms "
+                    f"+{tolerancia:.0%}"
+                )
+            if (
+                atual["consultas_sql"] is not None
+                and anterior.get("consultas_sql") is not None
+                and atual["consultas_sql"] > anterior["consultas_sql"]
+            ):
+                regressoes.append(
+                    f"{nome} ({tamanho}): {atual['consultas_sql']} instruções SQL, antes {anterior['consultas_sql']}"
+                )
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das rotas da API com controle de regressão.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--rotas", nargs="+", default=ROTAS, choices=ROTAS)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--aquecimento", type=int, default=20)
+    parser.add_argument("--saida", default="resultados_endpoints.json")
+    parser.add_argument("--baseline", default=str(BASELINE_PADRAO))
+    parser.add_argument("--tolerancia", type=float, default=0.20, help="aumento relativo aceito no p95")
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava o resultado como nova baseline")
+    parser.add_argument("--medir", choices=ROTAS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir_rota(args.medir, args.repeticoes, args.aquecimento)))
+        return
+
+    resultados = executar(args)
+    Path(args.saida).write_text(json.dumps(resultados, indent=2, ensure_ascii=False))
+    print(f"\n📄 Resultados em {args.saida}")
+
+    if args.salvar_baseline:
+        Path(args.baseline).write_text(json.dumps(resultados, indent=2, ensure_ascii=False))
+        print(f"📌 Baseline salva em {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("⚠️  Sem baseline para comparar (use --salvar-baseline)")
+        return
+
+    regressoes = comparar(resultados, json.loads(Path(args.baseline).read_text()), args.tolerancia)
+    if regressoes:
+        print("\n❌ Regressões:")
+        for regressao in regressoes:
+            print(f"   • {regressao}")
+        raise SystemExit(1)
+    print("\n✅ Nenhuma regressão em relação à baseline")
+
+
+if __name__ == "__main__":
+    main()
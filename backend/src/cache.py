@@ -0,0 +1,260 @@
+"""
+Cache em memória das respostas do catálogo (obras e categorias).
+
+Guarda o JSON já serializado das rotas de leitura, por caminho + parâmetros
+da query, num LRU limitado por número de entradas, por bytes e por TTL. O
+catálogo muda poucas vezes ao dia; um acerto dispensa o banco e a validação
+do Pydantic.
+
+Cada entrada leva etiquetas ("obras", "obras:lista", "obras:<id>"). Os
+eventos do barramento de invalidação (invalidacao.py), publicados depois de
+cada commit, removem só as etiquetas afetadas:
+
+- objetos do ORM criados, alterados ou removidos invalidam as listagens da
+  tabela e o registro pelo id;
+- UPDATE/DELETE em massa com RETURNING do id (como o ajuste de
+  exemplares disponíveis a cada empréstimo) invalidam só os registros
+  devolvidos; sem RETURNING, os ids atingidos não são conhecidos e a
+  tabela inteira é invalidada.
+
+Junto ao JSON ficam os validadores da resposta (ETag/Last-Modified, ver
+condicional.py): um If-None-Match que confere é respondido com 304 sem ir
+ao banco.
+
+Cada invalidação avança a geração do cache; uma resposta calculada antes de
+uma invalidação não é guardada, para não repor um dado já velho.
+
+O cache é por processo; com vários workers, configure um transporte em
+INVALIDACAO_TRANSPORTE para que as escritas de um worker cheguem aos outros.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from condicional import nao_modificado, resposta_nao_modificada
+from invalidacao import Evento, barramento
+from metricas import cache_bytes, cache_entradas, cache_operacoes
+
+CACHE_CATALOGO_TTL = float(os.getenv("CACHE_CATALOGO_TTL", "300"))  # s; 0 desliga
+CACHE_CATALOGO_MAX_ENTRADAS = int(os.getenv("CACHE_CATALOGO_MAX_ENTRADAS", "2000"))
+CACHE_CATALOGO_MAX_BYTES = int(os.getenv("CACHE_CATALOGO_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Tabelas com respostas no cache
+TABELAS_CACHEADAS = {"obras", "categorias"}
+
+
+@dataclass
+class _Entrada:
+    conteudo: bytes
+    etiquetas: frozenset
+    expira_em: float
+    cabecalhos: dict
+
+
+class CacheRespostas:
+    """LRU de respostas JSON com TTL, teto de memória e invalidação por etiqueta."""
+
+    def __init__(self, nome: str, ttl: float, max_entradas: int, max_bytes: int):
+        self.nome = nome
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas: OrderedDict[str, _Entrada] = OrderedDict()
+        self._por_etiqueta: dict[str, set[str]] = {}
+        self._bytes = 0
+        self._geracao = 0
+        self._trava = threading.Lock()
+        self.contadores = {"acerto": 0, "falha": 0, "remocao": 0, "invalidacao": 0}
+        self._series = {resultado: cache_operacoes.labels(nome, resultado) for resultado in self.contadores}
+        self._gauge_bytes = cache_bytes.labels(nome)
+        self._gauge_entradas = cache_entradas.labels(nome)
+
+    @property
+    def ativo(self) -> bool:
+        return self.ttl > 0 and self.max_entradas > 0
+
+    @property
+    def geracao(self) -> int:
+        """Valor a capturar antes de consultar o banco e passar para guardar()."""
+        return self._geracao
+
+    def _contar(self, resultado: str, quantidade: int = 1) -> None:
+        self.contadores[resultado] += quantidade
+        self._series[resultado].inc(quantidade)
+
+    def _remover(self, chave: str) -> None:
+        entrada = self._entradas.pop(chave)
+        self._bytes -= len(entrada.conteudo)
+        for etiqueta in entrada.etiquetas:
+            chaves = self._por_etiqueta.get(etiqueta)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._por_etiqueta[etiqueta]
+
+    def _atualizar_gauges(self) -> None:
+        self._gauge_bytes.set(self._bytes)
+        self._gauge_entradas.set(len(self._entradas))
+
+    def obter(self, chave: str) -> bytes | None:
+        """Conteúdo guardado para a chave, ou None se ausente ou expirado."""
+        entrada = self.obter_entrada(chave)
+        return entrada.conteudo if entrada is not None else None
+
+    def obter_entrada(self, chave: str) -> _Entrada | None:
+        """Como obter(), devolvendo também os cabeçalhos guardados."""
+        if not self.ativo:
+            return None
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self._contar("falha")
+                return None
+            if entrada.expira_em <= time.monotonic():
+                self._remover(chave)
+                self._atualizar_gauges()
+                self._contar("falha")
+                return None
+            self._entradas.move_to_end(chave)
+            self._contar("acerto")
+            return entrada
+
+    def guardar(
+        self,
+        chave: str,
+        conteudo: bytes,
+        etiquetas: set[str],
+        geracao: int,
+        cabecalhos: dict | None = None,
+    ) -> None:
+        """
+        Guarda o conteúdo, descartando os menos usados acima dos limites.
+
+        Args:
+            chave: Chave da resposta (ver chave_requisicao)
+            conteudo: JSON serializado
+            etiquetas: Etiquetas usadas na invalidação
+            geracao: self.geracao lido antes da consulta ao banco
+            cabecalhos: Cabeçalhos da resposta (validadores ETag/Last-Modified)
+        """
+        if not self.ativo or len(conteudo) > self.max_bytes:
+            return
+        with self._trava:
+            # houve invalidação durante a consulta: o conteúdo pode estar velho
+            if geracao != self._geracao:
+                return
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = _Entrada(
+                conteudo, frozenset(etiquetas), time.monotonic() + self.ttl, cabecalhos or {}
+            )
+            self._bytes += len(conteudo)
+            for etiqueta in etiquetas:
+                self._por_etiqueta.setdefault(etiqueta, set()).add(chave)
+
+            removidas = 0
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                self._remover(next(iter(self._entradas)))
+                removidas += 1
+            if removidas:
+                self._contar("remocao", removidas)
+            self._atualizar_gauges()
+
+    def invalidar(self, *etiquetas: str) -> None:
+        """Remove todas as entradas marcadas com alguma das etiquetas."""
+        with self._trava:
+            self._geracao += 1
+            chaves = set()
+            for etiqueta in etiquetas:
+                chaves.update(self._por_etiqueta.get(etiqueta, ()))
+            for chave in chaves:
+                self._remover(chave)
+            if chaves:
+                self._contar("invalidacao", len(chaves))
+            self._atualizar_gauges()
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._geracao += 1
+            self._entradas.clear()
+            self._por_etiqueta.clear()
+            self._bytes = 0
+            self._atualizar_gauges()
+
+    def estatisticas(self) -> dict:
+        with self._trava:
+            return {
+                **self.contadores,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "geracao": self._geracao,
+            }
+
+
+catalogo = CacheRespostas(
+    "catalogo",
+    ttl=CACHE_CATALOGO_TTL,
+    max_entradas=CACHE_CATALOGO_MAX_ENTRADAS,
+    max_bytes=CACHE_CATALOGO_MAX_BYTES,
+)
+
+
+def chave_requisicao(request: Request) -> str:
+    """Caminho + parâmetros da query em ordem canônica."""
+    parametros = "&".join(f"{nome}={valor}" for nome, valor in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{parametros}"
+
+
+def etiquetas_lista(tabela: str) -> set[str]:
+    return {tabela, f"{tabela}:lista"}
+
+
+def etiquetas_registro(tabela: str, id_: str) -> set[str]:
+    return {tabela, f"{tabela}:{id_}"}
+
+
+def resposta_json(conteudo: bytes, cabecalhos: dict | None = None) -> Response:
+    return Response(content=conteudo, media_type="application/json", headers=cabecalhos)
+
+
+def resposta_em_cache(request: Request, entrada: _Entrada) -> Response:
+    """Responde a partir do cache: 304 se a cópia do cliente ainda vale."""
+    if entrada.cabecalhos and nao_modificado(request, entrada.cabecalhos):
+        return resposta_nao_modificada(entrada.cabecalhos)
+    return resposta_json(entrada.conteudo, entrada.cabecalhos)
+
+
+def guardar_resposta(
+    cache: CacheRespostas,
+    chave: str,
+    modelo: BaseModel,
+    etiquetas: set[str],
+    geracao: int,
+    cabecalhos: dict | None = None,
+) -> Response:
+    """Serializa o modelo de resposta, guarda no cache e devolve a resposta."""
+    conteudo = modelo.model_dump_json().encode()
+    cache.guardar(chave, conteudo, etiquetas, geracao, cabecalhos)
+    return resposta_json(conteudo, cabecalhos)
+
+
+# --- Invalidação a partir das escritas -------------------------------------
+
+@barramento.inscrever
+def _invalidar_catalogo(eventos: list[Evento]) -> None:
+    etiquetas = set()
+    for evento in eventos:
+        if evento.tabela not in TABELAS_CACHEADAS:
+            continue
+        if evento.id is None:
+            etiquetas.add(evento.tabela)
+        else:
+            etiquetas.add(f"{evento.tabela}:lista")
+            etiquetas.add(f"{evento.tabela}:{evento.id}")
+    if etiquetas:
+        catalogo.invalidar(*etiquetas)
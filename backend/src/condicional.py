@@ -0,0 +1,109 @@
+"""
+Requisições condicionais: ETag / If-None-Match e Last-Modified / If-Modified-Since.
+
+Os validadores saem de `atualizadoEm`, que todo modelo atualiza a cada
+escrita (inclusive nos UPDATE em massa, pelo onupdate da coluna):
+
+- registro: ETag forte a partir de id + atualizadoEm;
+- coleção: ETag fraco a partir de max(atualizado_em) + quantidade de linhas
+  do filtro, calculados numa única consulta de agregação, sem carregar as
+  linhas. Inserções mudam a quantidade e o máximo, alterações o máximo e
+  exclusões a quantidade. A agregação percorre o filtro inteiro, então só é
+  feita na primeira página ou quando o cliente manda um validador (ver
+  calcular_validadores_colecao): as páginas seguintes por cursor mantêm o
+  custo constante da paginação por chave.
+
+Quando o validador do cliente confere, a resposta é 304 sem corpo e nada é
+serializado. `Cache-Control: no-cache` faz o navegador revalidar a cada uso
+em vez de aplicar validade heurística a partir do Last-Modified.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+
+
+def _resumo(*partes) -> str:
+    return hashlib.sha1("|".join(str(parte) for parte in partes).encode()).hexdigest()[:32]
+
+
+def _data_http(momento: datetime) -> str:
+    # atualizadoEm é gravado em UTC sem fuso (datetime.utcnow)
+    return format_datetime(momento.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def _cabecalhos(etag: str, ultima_alteracao: datetime | None) -> dict[str, str]:
+    cabecalhos = {"ETag": etag, "Cache-Control": "no-cache"}
+    if ultima_alteracao is not None:
+        cabecalhos["Last-Modified"] = _data_http(ultima_alteracao)
+    return cabecalhos
+
+
+def validadores_registro(registro) -> dict[str, str]:
+    """Cabeçalhos ETag (forte) e Last-Modified de um registro."""
+    return _cabecalhos(f'"{_resumo(registro.id, registro.atualizadoEm.isoformat())}"', registro.atualizadoEm)
+
+
+def validadores_colecao(query: Query, modelo, chave: str) -> dict[str, str]:
+    """
+    Cabeçalhos ETag (fraco) e Last-Modified de uma listagem.
+
+    Args:
+        query: Consulta já filtrada, sem ordenação nem paginação
+        modelo: Modelo consultado
+        chave: Identifica a listagem (caminho + parâmetros, ver chave_requisicao)
+    """
+    ultima_alteracao, total = query.with_entities(
+        func.max(modelo.atualizadoEm), func.count(modelo.id)
+    ).one()
+    ultima = ultima_alteracao.isoformat() if ultima_alteracao else ""
+    return _cabecalhos(f'W/"{_resumo(chave, ultima, total)}"', ultima_alteracao)
+
+
+def calcular_validadores_colecao(request: Request, cursor: str | None) -> bool:
+    """Se a listagem deve calcular seus validadores (primeira página ou requisição condicional)."""
+    return cursor is None or "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def _etags(valor: str) -> set[str]:
+    # comparação fraca (RFC 9110, 13.1.2): o prefixo W/ é ignorado
+    return {etag.strip().removeprefix("W/") for etag in valor.split(",")}
+
+
+def nao_modificado(request: Request, cabecalhos: dict[str, str]) -> bool:
+    """Indica se a cópia do cliente ainda vale para os validadores dados."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = _etags(if_none_match)
+        return "*" in etags or cabecalhos["ETag"].removeprefix("W/") in etags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or "Last-Modified" not in cabecalhos:
+        return False
+    try:
+        desde = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if desde.tzinfo is None:
+        return False
+    return parsedate_to_datetime(cabecalhos["Last-Modified"]) <= desde
+
+
+def resposta_nao_modificada(cabecalhos: dict[str, str]) -> Response:
+    return Response(status_code=304, headers=cabecalhos)
+
+
+def responder_registro(request: Request, registro, schema: type[BaseModel]) -> Response:
+    """304 se a cópia do cliente vale; senão o registro serializado com validadores."""
+    cabecalhos = validadores_registro(registro)
+    if nao_modificado(request, cabecalhos):
+        return resposta_nao_modificada(cabecalhos)
+    return Response(
+        content=schema.model_validate(registro).model_dump_json(),
+        media_type="application/json",
+        headers=cabecalhos,
+    )
@@ -4,12 +4,12 @@ Solicita dados via terminal e cria usuário + administrador.
 """
 
 from database import SessionLocal, init_db
+from identificadores import gerar_id
 from models.usuario import Usuario
 from models.administrador import Administrador
 from services.senha_service import hash_senha
 from services.auth_service import validar_cpf
-import uuid
-from datetime import datetime
+from datetime import date
 
 
 def criar_admin():
@@ -118,8 +118,8 @@ def criar_admin():
         # Criar usuário
         print("\nCriando usuário...")
         
-        usuario_id = str(uuid.uuid4())
-        data_cadastro = datetime.now().strftime('%Y-%m-%d')
+        usuario_id = gerar_id()
+        data_cadastro = date.today()
         
         usuario = Usuario(
             id=usuario_id,
@@ -141,7 +141,7 @@ def criar_admin():
         # Criar administrador
         print("Vinculando privilégios de administrador...")
         
-        admin_id = str(uuid.uuid4())
+        admin_id = gerar_id()
         admin = Administrador(
             id=admin_id,
             usuarioId=usuario_id,
@@ -2,9 +2,14 @@ import logging
 import os
 
 from dotenv import load_dotenv
+from fastapi import Request
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.concurrency import run_in_threadpool
 
 load_dotenv()
 
@@ -12,32 +17,236 @@ logger = logging.getLogger(__name__)
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./veridian.db")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-)
+# Perfil de conexão SQLite. WAL permite leituras concorrentes durante escritas;
+# synchronous=NORMAL é seguro em WAL (só perde transações em queda de energia).
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negativo = KiB (64 MiB)
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),  # ms
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # s, só servidores
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", "30000"))  # ms, só PostgreSQL
+
+# DB_ASYNC=1 usa driver assíncrono (aiosqlite/asyncpg) nas rotas async;
+# caso contrário elas executam a sessão síncrona no threadpool.
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"
+
+if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
+    SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+EH_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+
+def _opcoes_engine(assincrono: bool = False) -> dict:
+    """Parâmetros de create_engine conforme o dialeto da URL."""
+    opcoes = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+    if EH_SQLITE:
+        if assincrono:
+            # aiosqlite usa NullPool por padrão; o pool evita reabrir conexões a cada sessão
+            opcoes["poolclass"] = AsyncAdaptedQueuePool
+        else:
+            opcoes["connect_args"] = {"check_same_thread": False}
+        return opcoes
+
+    opcoes["pool_pre_ping"] = True
+    opcoes["pool_recycle"] = DB_POOL_RECYCLE
+    if assincrono:
+        opcoes["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT)}}
+    else:
+        opcoes["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"}
+    return opcoes
+
 
-@event.listens_for(engine, "connect")
 def set_sqlite_pragma(dbapi_conn, connection_record):
     cursor = dbapi_conn.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
+    for pragma, valor in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={valor}")
     cursor.close()
 
+
+def set_sqlite_pragma_leitura(dbapi_conn, connection_record):
+    # journal_mode não pode ser alterado por conexão somente leitura
+    cursor = dbapi_conn.cursor()
+    for pragma, valor in SQLITE_PRAGMAS.items():
+        if pragma != "journal_mode":
+            cursor.execute(f"PRAGMA {pragma}={valor}")
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def _url_assincrona(url: str) -> str:
+    """Troca o driver da URL pelo equivalente assíncrono."""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+def _url_leitura() -> str | None:
+    """
+    URL do banco usado pelas leituras.
+
+    DATABASE_REPLICA_URL aponta para uma réplica; sem ela, bancos SQLite em
+    arquivo são reabertos em modo somente leitura (mode=ro). Retorna None
+    quando as leituras devem usar o banco principal.
+    """
+    replica = os.getenv("DATABASE_REPLICA_URL")
+    if replica:
+        return replica.replace("postgres://", "postgresql://", 1)
+
+    if EH_SQLITE:
+        caminho = make_url(SQLALCHEMY_DATABASE_URL).database
+        if caminho and caminho != ":memory:" and not caminho.startswith("file:"):
+            return f"sqlite:///file:{os.path.abspath(caminho)}?mode=ro&uri=true"
+    return None
+
+
+def _criar_engine(url: str, assincrono: bool = False, somente_leitura: bool = False):
+    if assincrono:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        novo_engine = create_async_engine(_url_assincrona(url), **_opcoes_engine(assincrono=True))
+        alvo_eventos = novo_engine.sync_engine
+    else:
+        novo_engine = create_engine(url, **_opcoes_engine())
+        alvo_eventos = novo_engine
+
+    if EH_SQLITE:
+        pragmas = set_sqlite_pragma_leitura if somente_leitura else set_sqlite_pragma
+        event.listen(alvo_eventos, "connect", pragmas)
+    return novo_engine
+
+
+URL_LEITURA = _url_leitura()
+
+engine = _criar_engine(SQLALCHEMY_DATABASE_URL)
+engine_leitura = _criar_engine(URL_LEITURA, somente_leitura=True) if URL_LEITURA else engine
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLeitura = sessionmaker(autocommit=False, autoflush=False, bind=engine_leitura)
+
+async_engine = None
+async_engine_leitura = None
+AsyncSessionLocal = None
+AsyncSessionLeitura = None
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = _criar_engine(SQLALCHEMY_DATABASE_URL, assincrono=True)
+    async_engine_leitura = (
+        _criar_engine(URL_LEITURA, assincrono=True, somente_leitura=True)
+        if URL_LEITURA
+        else async_engine
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    AsyncSessionLeitura = async_sessionmaker(
+        async_engine_leitura, autoflush=False, expire_on_commit=False
+    )
+
+# Métodos HTTP atendidos pelo banco de leitura quando a rota não força outro
+METODOS_LEITURA = {"GET", "HEAD", "OPTIONS"}
+
+
+class SessaoEmThread:
+    """
+    Sessão síncrona com a interface run_sync de AsyncSession.
+
+    Permite que as rotas async usem o mesmo código com DB_ASYNC desligado,
+    executando as operações no threadpool.
+    """
+
+    def __init__(self, sessao: Session):
+        self.sessao = sessao
+
+    async def run_sync(self, funcao, *args, **kwargs):
+        return await run_in_threadpool(funcao, self.sessao, *args, **kwargs)
+
+
+SessaoAssincrona = AsyncSession | SessaoEmThread
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+def _sessao_sincrona(fabrica):
+    db = fabrica()
     try:
         yield db
     finally:
         db.close()
 
 
-def init_db():
-    """Inicializa o banco criando todas as tabelas conhecidas."""
+async def _sessao_assincrona(fabrica_async, fabrica_sync):
+    if fabrica_async is not None:
+        async with fabrica_async() as db:
+            yield db
+        return
+
+    db = fabrica_sync()
+    try:
+        yield SessaoEmThread(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+def get_db(request: Request):
+    """Sessão conforme o método da rota: leituras vão para o banco de leitura."""
+    if request.method in METODOS_LEITURA:
+        yield from _sessao_sincrona(SessionLeitura)
+    else:
+        yield from _sessao_sincrona(SessionLocal)
+
+
+def get_db_escrita():
+    """Força o banco principal (sobrescreve a escolha automática de get_db)."""
+    yield from _sessao_sincrona(SessionLocal)
+
+
+def get_db_leitura():
+    """Força o banco de leitura (sobrescreve a escolha automática de get_db)."""
+    yield from _sessao_sincrona(SessionLeitura)
+
+
+async def get_async_db(request: Request):
+    """Dependência das rotas async: AsyncSession ou sessão síncrona em thread."""
+    if request.method in METODOS_LEITURA:
+        sessoes = _sessao_assincrona(AsyncSessionLeitura, SessionLeitura)
+    else:
+        sessoes = _sessao_assincrona(AsyncSessionLocal, SessionLocal)
+    async for db in sessoes:
+        yield db
+
+
+async def get_async_db_escrita():
+    """Versão async de get_db_escrita."""
+    async for db in _sessao_assincrona(AsyncSessionLocal, SessionLocal):
+        yield db
+
+
+async def get_async_db_leitura():
+    """Versão async de get_db_leitura (ex.: leituras em lote feitas por POST)."""
+    async for db in _sessao_assincrona(AsyncSessionLeitura, SessionLeitura):
+        yield db
+
+
+def importar_modelos():
+    """Registra todos os modelos em Base.metadata."""
     from models.usuario import Usuario  # noqa: F401
     from models.administrador import Administrador  # noqa: F401
     from models.categoria import Categoria  # noqa: F401
@@ -45,6 +254,27 @@ def init_db():
     from models.exemplar import Exemplar  # noqa: F401
     from models.emprestimo import Emprestimo  # noqa: F401
     from models.reserva import Reserva  # noqa: F401
+    from models.registro_exclusao import RegistroExclusao  # noqa: F401
+
+
+def init_db():
+    """Inicializa o banco criando todas as tabelas conhecidas."""
+    importar_modelos()
 
     Base.metadata.create_all(bind=engine)
+
+    from migracoes import aplicar_migracoes
+    aplicar_migracoes(engine)
+
+    # create_all não cria índices novos em tabelas que já existem
+    for tabela in Base.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            indice.create(bind=engine, checkfirst=True)
+
+    from services.busca_service import instalar_busca
+    instalar_busca(engine)
+
+    from services.sincronizacao_service import instalar_registro_exclusoes
+    instalar_registro_exclusoes(engine)
+
     logger.info("Banco de dados inicializado com sucesso")
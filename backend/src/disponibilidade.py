@@ -0,0 +1,156 @@
+"""
+Transmissão (Server-Sent Events) das mudanças de disponibilidade das obras.
+
+GET /obras/disponibilidade/stream mantém a conexão aberta e envia um evento
+{obraId, exemplaresDisponiveis, totalExemplares} a cada commit que altera
+esses contadores: empréstimos e devoluções (o UPDATE de circulacao_service
+devolve os novos valores por RETURNING) e alterações de obras e exemplares
+pelo ORM.
+
+Um único Difusor por processo serializa cada lote uma vez e o repassa às
+filas dos clientes, todas no loop do asyncio; conexões ociosas custam só a
+fila e a corrotina. As filas são limitadas: o cliente que não acompanha é
+desconectado (o EventSource do navegador reconecta sozinho) em vez de
+acumular eventos sem limite. Comentários periódicos mantêm a conexão viva
+através de proxies.
+
+O difusor é por processo: com vários workers, cada conexão recebe as
+mudanças feitas no worker que a atende.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import AsyncIterator
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from metricas import sse_clientes, sse_descartes
+
+logger = logging.getLogger(__name__)
+
+DISPONIBILIDADE_FILA = int(os.getenv("DISPONIBILIDADE_FILA", "64"))  # eventos por cliente
+DISPONIBILIDADE_PULSO = float(os.getenv("DISPONIBILIDADE_PULSO", "15"))  # s entre keep-alives
+
+_CHAVE_SESSAO = "disponibilidade_obras"
+
+# intervalo de reconexão sugerido ao EventSource (ms)
+_RETRY = b"retry: 3000\n\n"
+_PULSO = b": pulso\n\n"
+
+
+class Difusor:
+    """Repassa eventos a todos os clientes conectados, com filas limitadas."""
+
+    def __init__(self, tamanho_fila: int = DISPONIBILIDADE_FILA, pulso: float = DISPONIBILIDADE_PULSO):
+        self.tamanho_fila = tamanho_fila
+        self.pulso = pulso
+        self._clientes: set[asyncio.Queue] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def conectados(self) -> int:
+        return len(self._clientes)
+
+    def _inscrever(self) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        fila: asyncio.Queue = asyncio.Queue(self.tamanho_fila)
+        self._clientes.add(fila)
+        sse_clientes.inc()
+        return fila
+
+    def _cancelar(self, fila: asyncio.Queue) -> None:
+        if fila in self._clientes:
+            self._clientes.discard(fila)
+            sse_clientes.dec()
+
+    def publicar(self, alteracoes: list[dict]) -> None:
+        """Envia as alterações aos clientes; pode ser chamado de qualquer thread."""
+        loop = self._loop
+        if not alteracoes or not self._clientes or loop is None or loop.is_closed():
+            return
+        mensagem = b"".join(
+            b"event: disponibilidade\ndata: " + json.dumps(alteracao).encode() + b"\n\n"
+            for alteracao in alteracoes
+        )
+        loop.call_soon_threadsafe(self._distribuir, mensagem)
+
+    def _distribuir(self, mensagem: bytes) -> None:
+        for fila in list(self._clientes):
+            try:
+                fila.put_nowait(mensagem)
+            except asyncio.QueueFull:
+                self._descartar(fila)
+
+    def _descartar(self, fila: asyncio.Queue) -> None:
+        """Desconecta o cliente lento: a fila fica só com o aviso de fim."""
+        self._cancelar(fila)
+        while not fila.empty():
+            fila.get_nowait()
+        fila.put_nowait(None)
+        sse_descartes.inc()
+        logger.info("Disponibilidade: cliente lento desconectado")
+
+    async def transmitir(self) -> AsyncIterator[bytes]:
+        """Corpo da resposta text/event-stream de um cliente."""
+        fila = self._inscrever()
+        try:
+            yield _RETRY
+            while True:
+                try:
+                    mensagem = await asyncio.wait_for(fila.get(), self.pulso)
+                except asyncio.TimeoutError:
+                    yield _PULSO
+                    continue
+                if mensagem is None:
+                    return
+                yield mensagem
+        finally:
+            self._cancelar(fila)
+
+
+difusor = Difusor()
+
+
+# --- Eventos a partir das escritas -----------------------------------------
+
+def _alteracoes_da_sessao(session: Session) -> dict[str, tuple[int, int]]:
+    return session.info.setdefault(_CHAVE_SESSAO, {})
+
+
+def registrar_disponibilidade(session: Session, linhas) -> None:
+    """Registra (obra_id, disponíveis, total) para publicar após o commit."""
+    alteracoes = _alteracoes_da_sessao(session)
+    for obra_id, disponiveis, total in linhas:
+        alteracoes[obra_id] = (disponiveis, total)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_flush(session, flush_context):
+    for objeto in list(session.new) + list(session.dirty):
+        if getattr(objeto, "__tablename__", None) != "obras":
+            continue
+        estado = inspect(objeto)
+        if objeto in session.new or any(
+            estado.attrs[atributo].history.has_changes()
+            for atributo in ("exemplaresDisponiveis", "totalExemplares")
+        ):
+            registrar_disponibilidade(
+                session, [(objeto.id, objeto.exemplaresDisponiveis, objeto.totalExemplares)]
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_apos_commit(session):
+    alteracoes = session.info.pop(_CHAVE_SESSAO, None)
+    if alteracoes:
+        difusor.publicar([
+            {"obraId": obra_id, "exemplaresDisponiveis": disponiveis, "totalExemplares": total}
+            for obra_id, (disponiveis, total) in alteracoes.items()
+        ])
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_apos_rollback(session):
+    session.info.pop(_CHAVE_SESSAO, None)
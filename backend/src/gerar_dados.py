@@ -0,0 +1,345 @@
+"""
+Gerador de massa de dados sintética para testes de capacidade.
+
+Diferente de dados_bd.py (catálogo pequeno, interativo), este script não faz
+perguntas e insere em lote com Core insert() (executemany em blocos), a partir
+de uma semente fixa: a mesma linha de comando gera sempre os mesmos dados.
+
+Uso:
+    python gerar_dados.py --recriar --emprestimos 1000000
+    python gerar_dados.py --obras 5000 --usuarios 2000 --seed 7
+"""
+import argparse
+import logging
+import random
+import time
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from database import engine, init_db
+from models.categoria import Categoria
+from models.emprestimo import Emprestimo
+from models.exemplar import Exemplar
+from models.obra import Obra
+from models.reserva import Reserva
+from models.usuario import Usuario
+from services.senha_service import hash_senha
+
+SENHA_PADRAO = "senha123"
+PRAZO_EMPRESTIMO = 14  # dias
+VALIDADE_RESERVA = 7  # dias
+
+NOMES_CATEGORIAS = [
+    "Ficção", "Não-Ficção", "Ciência", "Tecnologia", "História", "Filosofia",
+    "Autoajuda", "Poesia", "Biografia", "Infantil", "Direito", "Economia",
+    "Psicologia", "Arte", "Religião", "Geografia", "Matemática", "Medicina",
+]
+PALAVRAS_TITULO = [
+    "Sombra", "Cidade", "Memórias", "Caminho", "Silêncio", "Mar", "Noite",
+    "Jardim", "Tempo", "Segredo", "Viagem", "Luz", "Guerra", "Casa", "Rio",
+    "Sertão", "Estrela", "Vento", "Espelho", "Ilha", "Fronteira", "Destino",
+]
+COMPLEMENTOS_TITULO = [
+    "do Norte", "Perdido", "das Águas", "Eterno", "sem Fim", "de Outono",
+    "Proibido", "da Manhã", "Esquecido", "de Pedra", "Infinito", "Distante",
+]
+PRENOMES = [
+    "Ana", "João", "Maria", "Pedro", "Lucas", "Júlia", "Carlos", "Beatriz",
+    "Rafael", "Fernanda", "Gabriel", "Larissa", "Marcos", "Camila", "Tiago",
+    "Patrícia", "Bruno", "Helena", "Diego", "Luana",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+    "Pereira", "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho",
+    "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+]
+EDITORAS = [
+    "Companhia das Letras", "Rocco", "Record", "Intrínseca", "Sextante",
+    "Saraiva", "Objetiva", "Zahar", "Novatec", "Alta Books",
+]
+
+
+def _novo_id(rng: random.Random, sequencia: int) -> str:
+    """
+    UUID (versão 4) com os 32 bits mais altos crescentes.
+
+    Ids em ordem de inserção mantêm as escritas no fim do índice da chave
+    primária, em vez de espalhá-las pela árvore inteira. Montado à mão porque
+    uuid.UUID pesa com milhões de linhas.
+    """
+    valor = (sequencia << 96) | rng.getrandbits(96)
+    valor = (valor & ~(0xF000 << 64)) | (0x4000 << 64)  # versão 4
+    valor = (valor & ~(0xC000 << 48)) | (0x8000 << 48)  # variante RFC 4122
+    h = f"{valor:032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _carimbo(momento: datetime) -> str:
+    """Data/hora no formato em que o SQLAlchemy grava DateTime no SQLite."""
+    return momento.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _nome(rng: random.Random) -> str:
+    return f"{rng.choice(PRENOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+
+
+def _momento(dia: date, rng: random.Random) -> datetime:
+    """Horário aleatório de expediente no dia informado."""
+    return datetime(dia.year, dia.month, dia.day, 8) + timedelta(seconds=rng.randrange(12 * 3600))
+
+
+def _inserir(conn, tabela, linhas, lote: int) -> int:
+    """
+    Insere as linhas (iterável de dicts) em blocos de `lote` via executemany.
+
+    O INSERT é compilado uma vez pelo Core; com driver de parâmetros
+    posicionais (SQLite) os blocos vão direto para o executemany do DBAPI como
+    tuplas, sem o processamento de tipos por linha do SQLAlchemy, que domina o
+    tempo com milhões de linhas. Os valores já chegam no formato gravado.
+    """
+    instrucao = insert(tabela)
+    compilado = instrucao.compile(dialect=conn.dialect)
+    if compilado.positional:
+        sql = str(compilado)
+        para_tupla = itemgetter(*compilado.positiontup)
+
+        def executar(bloco):
+            conn.exec_driver_sql(sql, [para_tupla(linha) for linha in bloco])
+    else:
+        def executar(bloco):
+            conn.execute(instrucao, bloco)
+
+    total = 0
+    for bloco in iter(lambda: list(islice(linhas, lote)), []):
+        executar(bloco)
+        total += len(bloco)
+    return total
+
+
+def gerar(args):
+    """Gera e insere todos os registros conforme os argumentos da linha de comando."""
+    rng = random.Random(args.seed)
+    hoje = args.data_referencia
+    agora = _carimbo(datetime.utcnow())
+
+    # Planejamento: que exemplares estão emprestados hoje, para manter
+    # status do exemplar e exemplares disponíveis da obra coerentes.
+    total_exemplares = args.obras * args.exemplares_por_obra
+    em_aberto = min(round(args.emprestimos * args.fracao_em_aberto), total_exemplares)
+    exemplares_em_aberto = rng.sample(range(total_exemplares), em_aberto)
+    emprestados_por_obra = Counter(i // args.exemplares_por_obra for i in exemplares_em_aberto)
+    conjunto_em_aberto = set(exemplares_em_aberto)
+
+    categoria_ids = [_novo_id(rng, i) for i in range(args.categorias)]
+    obra_ids = [_novo_id(rng, i) for i in range(args.obras)]
+    exemplar_ids = [_novo_id(rng, i) for i in range(total_exemplares)]
+    usuario_ids = [_novo_id(rng, i) for i in range(args.usuarios)]
+    autores = [_nome(rng) for _ in range(max(1, args.obras // 20))]
+
+    def categorias():
+        for i, categoria_id in enumerate(categoria_ids):
+            base = NOMES_CATEGORIAS[i % len(NOMES_CATEGORIAS)]
+            yield {
+                "id": categoria_id,
+                "nome": base if i < len(NOMES_CATEGORIAS) else f"{base} {i // len(NOMES_CATEGORIAS) + 1}",
+                "descricao": f"Obras de {base.lower()}",
+                "criado_em": agora,
+                "atualizado_em": agora,
+            }
+
+    def obras():
+        for i, obra_id in enumerate(obra_ids):
+            titulo = f"{rng.choice(PALAVRAS_TITULO)} {rng.choice(COMPLEMENTOS_TITULO)}"
+            if rng.random() < 0.5:
+                titulo = f"O {titulo}" if rng.random() < 0.5 else f"{titulo} {rng.randint(2, 9)}"
+            yield {
+                "id": obra_id,
+                "titulo": titulo,
+                "autor": rng.choice(autores),
+                "isbn": f"978{i:010d}",
+                "categoria_id": rng.choice(categoria_ids),
+                "editora": rng.choice(EDITORAS),
+                "ano_publicacao": rng.randint(1900, hoje.year),
+                "descricao": f"{titulo}: edição {rng.randint(1, 12)}",
+                "capa": None,
+                "total_exemplares": args.exemplares_por_obra,
+                "exemplares_disponiveis": args.exemplares_por_obra - emprestados_por_obra[i],
+                "criado_em": agora,
+                "atualizado_em": agora,
+            }
+
+    def exemplares():
+        for i, exemplar_id in enumerate(exemplar_ids):
+            obra = i // args.exemplares_por_obra
+            yield {
+                "id": exemplar_id,
+                "obra_id": obra_ids[obra],
+                "codigo": f"EX{i:08d}",
+                "status": "emprestado" if i in conjunto_em_aberto else "disponivel",
+                "localizacao": f"Estante {obra % 50 + 1}, Prateleira {i % args.exemplares_por_obra + 1}",
+                "versao": 1,
+                "criado_em": agora,
+                "atualizado_em": agora,
+            }
+
+    def usuarios():
+        senha_hash = hash_senha(SENHA_PADRAO)  # bcrypt é caro: um hash para todos
+        for i, usuario_id in enumerate(usuario_ids):
+            cadastro = hoje - timedelta(days=rng.randrange(args.dias_historico + 365))
+            sorteio = rng.random()
+            yield {
+                "id": usuario_id,
+                "nome": _nome(rng),
+                "cpf": f"{i:011d}",
+                "email": f"usuario{i}@exemplo.com",
+                "senha_hash": senha_hash,
+                "telefone": f"(11) 9{rng.randrange(10**8):08d}",
+                "endereco": None,
+                "data_cadastro": cadastro.isoformat(),
+                "status": "ativo" if sorteio < 0.9 else ("inativo" if sorteio < 0.97 else "suspenso"),
+                "role": "user",
+                "criado_em": _carimbo(_momento(cadastro, rng)),
+                "atualizado_em": agora,
+            }
+
+    # Datas pré-formatadas por deslocamento em dias a partir de hoje e
+    # horários do expediente: evita formatar milhões de datas no laço
+    dias_iso = [
+        (hoje - timedelta(days=d)).isoformat()
+        for d in range(-PRAZO_EMPRESTIMO - 7, args.dias_historico + 2 * PRAZO_EMPRESTIMO + 60)
+    ]
+    desloc = PRAZO_EMPRESTIMO + 7  # índice de hoje em dias_iso
+    horarios = [f"{8 + s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}.000000" for s in range(12 * 3600)]
+
+    def emprestimos():
+        aleatorio = rng.random
+        for n in range(args.emprestimos):
+            # atraso = dias desde o empréstimo
+            if n < em_aberto:
+                exemplar = exemplares_em_aberto[n]
+                # ~30% dos empréstimos em aberto já venceram
+                if aleatorio() < 0.3:
+                    atraso = PRAZO_EMPRESTIMO + 1 + int(aleatorio() * 45)
+                    status = "atrasado"
+                else:
+                    atraso = int(aleatorio() * PRAZO_EMPRESTIMO)
+                    status = "ativo"
+                devolucao = None
+            else:
+                exemplar = int(aleatorio() * total_exemplares)
+                atraso = PRAZO_EMPRESTIMO + int(aleatorio() * args.dias_historico)
+                devolucao = dias_iso[desloc + atraso - 1 - int(aleatorio() * min(PRAZO_EMPRESTIMO + 7, atraso))]
+                status = "devolvido"
+            inicio = dias_iso[desloc + atraso]
+            criado = f"{inicio} {horarios[int(aleatorio() * len(horarios))]}"
+            yield {
+                "id": _novo_id(rng, n),
+                "usuario_id": usuario_ids[int(aleatorio() * args.usuarios)],
+                "exemplar_id": exemplar_ids[exemplar],
+                "obra_id": obra_ids[exemplar // args.exemplares_por_obra],
+                "data_emprestimo": inicio,
+                "data_prevista_devolucao": dias_iso[desloc + atraso - PRAZO_EMPRESTIMO],
+                "data_devolucao": devolucao,
+                "status": status,
+                "renovacoes": 0 if aleatorio() < 0.8 else 1 + int(aleatorio() * 2),
+                "criado_em": criado,
+                "atualizado_em": criado,
+            }
+
+    def reservas():
+        for n in range(args.reservas):
+            dia = hoje - timedelta(days=rng.randrange(args.dias_historico))
+            sorteio = rng.random()
+            if dia >= hoje - timedelta(days=VALIDADE_RESERVA) and sorteio < 0.7:
+                status = "ativa"
+            else:
+                status = "concluida" if sorteio < 0.75 else "cancelada"
+            criado = _carimbo(_momento(dia, rng))
+            yield {
+                "id": _novo_id(rng, n),
+                "usuario_id": usuario_ids[rng.randrange(args.usuarios)],
+                "obra_id": obra_ids[rng.randrange(args.obras)],
+                "data_reserva": dia.isoformat(),
+                "status": status,
+                "data_expiracao": (dia + timedelta(days=VALIDADE_RESERVA)).isoformat(),
+                "criado_em": criado,
+                "atualizado_em": criado,
+            }
+
+    etapas = [
+        ("🏷️ ", "categorias", Categoria, categorias),
+        ("📖", "obras", Obra, obras),
+        ("📚", "exemplares", Exemplar, exemplares),
+        ("👤", "usuários", Usuario, usuarios),
+        ("🔄", "empréstimos", Emprestimo, emprestimos),
+        ("📌", "reservas", Reserva, reservas),
+    ]
+    for icone, nome, modelo, linhas in etapas:
+        tabela = modelo.__table__
+        inicio = time.perf_counter()
+        with engine.begin() as conn:
+            # Manter os índices secundários a cada linha custa mais que
+            # recriá-los no fim, de uma vez, a partir dos dados já gravados
+            for indice in tabela.indexes:
+                indice.drop(bind=conn, checkfirst=True)
+            total = _inserir(conn, tabela, linhas(), args.lote)
+            for indice in tabela.indexes:
+                indice.create(bind=conn)
+        print(f"{icone} {total} {nome} em {time.perf_counter() - inicio:.1f}s")
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description="Gera massa de dados sintética para testes de capacidade.")
+    parser.add_argument("--categorias", type=int, default=18)
+    parser.add_argument("--obras", type=int, default=20000)
+    parser.add_argument("--exemplares-por-obra", type=int, default=3)
+    parser.add_argument("--usuarios", type=int, default=50000)
+    parser.add_argument("--emprestimos", type=int, default=200000)
+    parser.add_argument("--reservas", type=int, default=20000)
+    parser.add_argument(
+        "--fracao-em-aberto", type=float, default=0.05,
+        help="fração dos empréstimos ainda não devolvidos (limitada ao total de exemplares)",
+    )
+    parser.add_argument("--dias-historico", type=int, default=730, help="janela de datas dos empréstimos")
+    parser.add_argument(
+        "--data-referencia", type=date.fromisoformat, default=date.today(),
+        help="data considerada 'hoje' (YYYY-MM-DD)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--lote", type=int, default=10000, help="linhas por executemany")
+    parser.add_argument("--recriar", action="store_true", help="apaga e recria o banco antes de gerar")
+    args = parser.parse_args()
+
+    if min(args.categorias, args.obras, args.exemplares_por_obra, args.usuarios) < 1:
+        parser.error("categorias, obras, exemplares por obra e usuários devem ser ao menos 1")
+    return args
+
+
+def main():
+    args = _argumentos()
+    # Cada bloco do executemany passaria do limite de consulta lenta
+    logging.getLogger("monitoramento").setLevel(logging.ERROR)
+
+    if args.recriar:
+        from recriar_bd import recriar_banco
+        recriar_banco()
+    else:
+        init_db()
+        with engine.connect() as conn:
+            if conn.execute(select(func.count()).select_from(Obra.__table__)).scalar():
+                print("❌ Banco de dados já possui dados. Use --recriar para gerar do zero.")
+                raise SystemExit(1)
+
+    print(f"\n🎲 Gerando dados (seed={args.seed}, referência={args.data_referencia})...")
+    inicio = time.perf_counter()
+    gerar(args)
+    print(f"\n✅ Dados gerados em {time.perf_counter() - inicio:.1f}s")
+    print(f"🔑 Senha de todos os usuários: {SENHA_PADRAO}")
+
+
+if __name__ == "__main__":
+    main()
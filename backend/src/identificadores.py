@@ -0,0 +1,80 @@
+"""
+Geração das chaves primárias.
+
+Por padrão os ids são UUIDv7 (RFC 9562): os 48 bits iniciais são o instante
+em milissegundos, então ids novos caem sempre no fim dos índices B-tree da
+chave primária e das chaves estrangeiras, em vez de espalhados como no UUID4.
+O formato textual é o mesmo (36 caracteres), então a API, as URLs e os
+cursores de paginação não mudam.
+
+ID_ESTRATEGIA=uuid4 volta aos ids totalmente aleatórios.
+"""
+import os
+import secrets
+import threading
+import time
+import uuid
+
+ESTRATEGIAS = ("uuid7", "uuid4")
+ID_ESTRATEGIA = os.getenv("ID_ESTRATEGIA", "uuid7").lower()
+if ID_ESTRATEGIA not in ESTRATEGIAS:
+    raise ValueError(f"ID_ESTRATEGIA inválida: {ID_ESTRATEGIA!r} (use {', '.join(ESTRATEGIAS)})")
+
+_trava = threading.Lock()
+_ultimo_ms = 0
+_sequencia = 0
+
+
+def uuid7(instante_ms: int | None = None) -> str:
+    """
+    Gera um UUIDv7 em texto.
+
+    Dentro do mesmo milissegundo os 12 bits de rand_a funcionam como contador
+    (método 1 da RFC 9562), então ids gerados pelo processo são estritamente
+    crescentes. Com instante_ms explícito (migração de dados antigos) o
+    contador não é usado.
+
+    Args:
+        instante_ms: Instante Unix em milissegundos; padrão é agora
+
+    Returns:
+        UUID no formato 8-4-4-4-12
+    """
+    global _ultimo_ms, _sequencia
+
+    if instante_ms is None:
+        with _trava:
+            agora = time.time_ns() // 1_000_000
+            if agora > _ultimo_ms:
+                _ultimo_ms = agora
+                # começa na metade inferior para sobrar espaço no contador
+                _sequencia = secrets.randbits(11)
+            else:
+                _sequencia += 1
+                if _sequencia > 0xFFF:
+                    _ultimo_ms += 1
+                    _sequencia = 0
+            instante_ms, rand_a = _ultimo_ms, _sequencia
+    else:
+        rand_a = secrets.randbits(12)
+
+    valor = (
+        (instante_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | rand_a << 64
+        | 0b10 << 62
+        | secrets.randbits(62)
+    )
+    return str(uuid.UUID(int=valor))
+
+
+def gerar_id() -> str:
+    """Gera o id de um novo registro conforme ID_ESTRATEGIA."""
+    if ID_ESTRATEGIA == "uuid4":
+        return str(uuid.uuid4())
+    return uuid7()
+
+
+def eh_uuid7(valor: str) -> bool:
+    """Indica se o id já está no formato UUIDv7."""
+    return len(valor) == 36 and valor[14] == "7"
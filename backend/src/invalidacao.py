@@ -0,0 +1,355 @@
+"""
+Barramento de invalidação dos caches por processo.
+
+Depois de cada commit que altera obras, categorias ou usuários, os gatilhos
+de sessão deste módulo publicam eventos (tabela, id, versão). Os assinantes
+do próprio processo (ver cache.py) recebem na hora; com vários workers, um
+transporte leva os eventos aos demais:
+
+- INVALIDACAO_TRANSPORTE=redis: pub/sub do Redis (pacote redis, opcional).
+  A versão vem de um INCR por tabela; um salto na sequência indica mensagem
+  perdida e invalida a tabela inteira.
+- INVALIDACAO_TRANSPORTE=banco: sem dependências. Cada tabela tem uma linha
+  em versoes_tabelas cuja versão é incrementada a cada escrita; os workers
+  leem essas poucas linhas a cada INVALIDACAO_INTERVALO segundos e invalidam
+  a tabela cuja versão mudou.
+- vazio (padrão): só o processo atual, suficiente com um único worker.
+
+A publicação remota roda numa thread própria, fora da requisição.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from dataclasses import dataclass
+from itertools import chain
+from typing import Callable
+
+from sqlalchemy import BigInteger, Column, MetaData, String, Table, event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+INVALIDACAO_TRANSPORTE = os.getenv("INVALIDACAO_TRANSPORTE", "").lower()
+INVALIDACAO_INTERVALO = float(os.getenv("INVALIDACAO_INTERVALO", "1"))  # s, transporte banco
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CANAL_REDIS = "veridian:invalidacao"
+
+# Tabelas cujas escritas geram eventos
+TABELAS_INVALIDADAS = ("obras", "categorias", "usuarios")
+
+_CHAVE_SESSAO = "invalidacao_eventos"
+
+
+@dataclass(frozen=True)
+class Evento:
+    """Alteração em um registro; id None vale para a tabela inteira."""
+    tabela: str
+    id: str | None = None
+    versao: int | None = None
+
+
+Assinante = Callable[[list[Evento]], None]
+
+
+class Transporte:
+    """Leva os eventos deste processo aos demais workers."""
+
+    def iniciar(self, entregar: Assinante) -> None:
+        """Começa a receber eventos dos outros processos e a repassá-los a entregar."""
+
+    def publicar(self, eventos: list[Evento]) -> None:
+        """Envia eventos; chamado pela thread de publicação do barramento."""
+
+    def parar(self) -> None:
+        pass
+
+
+class TransporteRedis(Transporte):
+    """Pub/sub do Redis com versão por tabela (INCR) para detectar perdas."""
+
+    def __init__(self, cliente=None, url: str = REDIS_URL, canal: str = CANAL_REDIS):
+        if cliente is None:
+            try:
+                import redis
+            except ImportError as erro:
+                raise RuntimeError("INVALIDACAO_TRANSPORTE=redis requer o pacote redis (pip install redis)") from erro
+            cliente = redis.Redis.from_url(url)
+        self.cliente = cliente
+        self.canal = canal
+        # identifica as mensagens deste processo no canal
+        self.origem = uuid.uuid4().hex
+        self._versoes: dict[str, int] = {}
+        self._parar = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def publicar(self, eventos: list[Evento]) -> None:
+        versoes = {tabela: self.cliente.incr(f"{self.canal}:versao:{tabela}") for tabela in {e.tabela for e in eventos}}
+        mensagem = {
+            "origem": self.origem,
+            "eventos": [[e.tabela, e.id, versoes[e.tabela]] for e in eventos],
+        }
+        self.cliente.publish(self.canal, json.dumps(mensagem))
+
+    def _converter(self, mensagem: dict) -> list[Evento]:
+        """Aplica a checagem de sequência e devolve os eventos a entregar."""
+        eventos = []
+        for tabela, id_, versao in mensagem["eventos"]:
+            ultima = self._versoes.get(tabela)
+            if ultima is not None and versao > ultima + 1:
+                logger.warning("Invalidação: eventos de %s perdidos (%d -> %d)", tabela, ultima, versao)
+                id_ = None
+            self._versoes[tabela] = max(versao, ultima or 0)
+            eventos.append(Evento(tabela, id_, versao))
+        # as escritas do próprio processo já foram aplicadas localmente
+        return [] if mensagem["origem"] == self.origem else eventos
+
+    def _escutar(self, entregar: Assinante) -> None:
+        while not self._parar.is_set():
+            try:
+                assinatura = self.cliente.pubsub(ignore_subscribe_messages=True)
+                assinatura.subscribe(self.canal)
+                try:
+                    while not self._parar.is_set():
+                        mensagem = assinatura.get_message(timeout=1.0)
+                        if mensagem is None or mensagem.get("type") != "message":
+                            continue
+                        eventos = self._converter(json.loads(mensagem["data"]))
+                        if eventos:
+                            entregar(eventos)
+                finally:
+                    assinatura.close()
+            except Exception:
+                logger.exception("Invalidação: conexão com o Redis perdida; invalidando tudo")
+                # o que chegou enquanto desconectado não será entregue
+                entregar([Evento(tabela) for tabela in TABELAS_INVALIDADAS])
+                self._versoes.clear()
+                self._parar.wait(1.0)
+
+    def iniciar(self, entregar: Assinante) -> None:
+        self._thread = threading.Thread(target=self._escutar, args=(entregar,), name="invalidacao-redis", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+_metadata = MetaData()
+versoes_tabelas = Table(
+    "versoes_tabelas",
+    _metadata,
+    Column("tabela", String, primary_key=True),
+    Column("versao", BigInteger, nullable=False, default=0),
+)
+
+
+class TransporteBanco(Transporte):
+    """Versão por tabela numa linha do próprio banco, consultada periodicamente."""
+
+    def __init__(self, engine, intervalo: float = INVALIDACAO_INTERVALO):
+        self.engine = engine
+        self.intervalo = intervalo
+        self._vistas: dict[str, int] = {}
+        self._proprias: dict[str, set[int]] = {}
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._entregar: Assinante | None = None
+
+    def preparar(self) -> None:
+        """Cria a tabela de versões e as linhas que faltam."""
+        versoes_tabelas.create(self.engine, checkfirst=True)
+        with self.engine.connect() as conn:
+            existentes = set(conn.execute(select(versoes_tabelas.c.tabela)).scalars())
+        for tabela in set(TABELAS_INVALIDADAS) - existentes:
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(versoes_tabelas).values(tabela=tabela, versao=0))
+            except IntegrityError:
+                pass  # outro worker criou a linha antes
+
+    def _ler(self) -> dict[str, int]:
+        with self.engine.connect() as conn:
+            return dict(conn.execute(select(versoes_tabelas.c.tabela, versoes_tabelas.c.versao)).all())
+
+    def publicar(self, eventos: list[Evento]) -> None:
+        with self.engine.begin() as conn:
+            for tabela in sorted({e.tabela for e in eventos}):
+                versao = conn.execute(
+                    update(versoes_tabelas)
+                    .where(versoes_tabelas.c.tabela == tabela)
+                    .values(versao=versoes_tabelas.c.versao + 1)
+                    .returning(versoes_tabelas.c.versao)
+                ).scalar()
+                with self._trava:
+                    self._proprias.setdefault(tabela, set()).add(versao)
+
+    def verificar(self) -> None:
+        """Uma rodada de leitura: entrega as tabelas alteradas por outros processos."""
+        eventos = []
+        for tabela, versao in self._ler().items():
+            vista = self._vistas.get(tabela, versao)
+            self._vistas[tabela] = versao
+            if versao <= vista:
+                continue
+            with self._trava:
+                proprias = self._proprias.get(tabela, set())
+                novas = set(range(vista + 1, versao + 1))
+                externas = novas - proprias
+                proprias -= novas
+            if externas:
+                eventos.append(Evento(tabela, None, versao))
+        if eventos and self._entregar is not None:
+            self._entregar(eventos)
+
+    def _consultar(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception:
+                logger.exception("Invalidação: falha ao ler versoes_tabelas")
+
+    def iniciar(self, entregar: Assinante) -> None:
+        self.preparar()
+        self._entregar = entregar
+        self._vistas = self._ler()
+        self._thread = threading.Thread(target=self._consultar, name="invalidacao-banco", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+class Barramento:
+    """Distribui eventos aos assinantes locais e, se houver, ao transporte."""
+
+    def __init__(self):
+        self._assinantes: list[Assinante] = []
+        self.transporte: Transporte | None = None
+        self._fila: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+    def inscrever(self, assinante: Assinante) -> Assinante:
+        self._assinantes.append(assinante)
+        return assinante
+
+    def entregar(self, eventos: list[Evento]) -> None:
+        """Repassa eventos aos assinantes do processo."""
+        for assinante in self._assinantes:
+            try:
+                assinante(eventos)
+            except Exception:
+                logger.exception("Invalidação: assinante %r falhou", assinante)
+
+    def publicar(self, eventos: list[Evento]) -> None:
+        """Aplica no processo e enfileira para os demais workers."""
+        self.entregar(eventos)
+        if self.transporte is not None:
+            self._fila.put(eventos)
+
+    def _enviar(self) -> None:
+        while True:
+            eventos = self._fila.get()
+            if eventos is None:
+                return
+            try:
+                self.transporte.publicar(eventos)
+            except Exception:
+                logger.exception("Invalidação: falha ao publicar %d eventos", len(eventos))
+
+    def iniciar(self, transporte: Transporte | None) -> None:
+        if transporte is None:
+            return
+        self.transporte = transporte
+        transporte.iniciar(self.entregar)
+        self._thread = threading.Thread(target=self._enviar, name="invalidacao-publicacao", daemon=True)
+        self._thread.start()
+        logger.info("Barramento de invalidação iniciado (%s)", type(transporte).__name__)
+
+    def parar(self) -> None:
+        if self.transporte is None:
+            return
+        self._fila.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.transporte.parar()
+        self.transporte = None
+
+
+barramento = Barramento()
+
+
+def criar_transporte() -> Transporte | None:
+    """Transporte escolhido por INVALIDACAO_TRANSPORTE."""
+    if INVALIDACAO_TRANSPORTE == "redis":
+        return TransporteRedis()
+    if INVALIDACAO_TRANSPORTE == "banco":
+        from database import engine
+
+        return TransporteBanco(engine)
+    if INVALIDACAO_TRANSPORTE:
+        raise ValueError(f"INVALIDACAO_TRANSPORTE inválido: {INVALIDACAO_TRANSPORTE!r} (use redis ou banco)")
+    return None
+
+
+# --- Eventos a partir das escritas -----------------------------------------
+
+def _eventos_da_sessao(session: Session) -> set[tuple[str, str | None]]:
+    return session.info.setdefault(_CHAVE_SESSAO, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_flush(session, flush_context):
+    eventos = None
+    for objeto in chain(session.new, session.dirty, session.deleted):
+        tabela = getattr(objeto, "__tablename__", None)
+        if tabela in TABELAS_INVALIDADAS:
+            eventos = eventos if eventos is not None else _eventos_da_sessao(session)
+            eventos.add((tabela, objeto.id))
+
+
+def _posicao_do_id(instrucao) -> int | None:
+    """Posição da coluna id no RETURNING da instrução (None se não houver)."""
+    for posicao, coluna in enumerate(instrucao.returning_column_descriptions):
+        if coluna["name"] == "id":
+            return posicao
+    return None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _registrar_instrucao(estado):
+    if not (estado.is_update or estado.is_delete):
+        return
+    tabela = getattr(estado.statement, "table", None)
+    if tabela is None or tabela.name not in TABELAS_INVALIDADAS:
+        return
+    eventos = _eventos_da_sessao(estado.session)
+    posicao = _posicao_do_id(estado.statement)
+    if posicao is None:
+        # UPDATE/DELETE em massa sem RETURNING: os ids atingidos não são conhecidos
+        eventos.add((tabela.name, None))
+        return
+    # com RETURNING do id, a própria instrução diz quais registros mudaram; o
+    # resultado congelado é lido aqui e entregue intacto a quem executou
+    resultado = estado.invoke_statement().freeze()
+    eventos.update((tabela.name, linha[posicao]) for linha in resultado().all())
+    return resultado()
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_apos_commit(session):
+    pendentes = session.info.pop(_CHAVE_SESSAO, None)
+    if pendentes:
+        barramento.publicar([Evento(tabela, id_) for tabela, id_ in sorted(pendentes, key=str)])
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_apos_rollback(session):
+    session.info.pop(_CHAVE_SESSAO, None)
@@ -1,12 +1,16 @@
 import logging
 import os
+from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from database import init_db
+from database import async_engine, async_engine_leitura, init_db
+from invalidacao import barramento, criar_transporte
+from metricas import MetricasMiddleware, encerrar_processo, gerar_metricas
+from monitoramento import MonitoramentoSQLMiddleware
 from routes.administradores import router as administradores_router
 from routes.auth import router as auth_router
 from routes.categorias import router as categorias_router
@@ -15,17 +19,38 @@ from routes.exemplares import router as exemplares_router
 from routes.obras import router as obras_router
 from routes.reservas import router as reservas_router
 from routes.usuarios import router as usuarios_router
+from services.atraso_service import iniciar_varredura_atrasos, ultima_varredura
+from services.sincronizacao_service import iniciar_poda_exclusoes
 
 
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicializa o banco, o barramento de invalidação e as tarefas periódicas."""
+    init_db()
+    barramento.iniciar(criar_transporte())
+    tarefas = [iniciar_varredura_atrasos(), iniciar_poda_exclusoes()]
+    yield
+    barramento.parar()
+    for tarefa in tarefas:
+        if tarefa:
+            tarefa.cancel()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_engine_leitura is not None and async_engine_leitura is not async_engine:
+        await async_engine_leitura.dispose()
+    encerrar_processo()
+
+
 app = FastAPI(
     title="Veridian API",
     description="Sistema de Gerenciamento de Biblioteca",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -42,6 +67,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# MetricasMiddleware fica dentro do MonitoramentoSQLMiddleware (adicionado por último)
+app.add_middleware(MetricasMiddleware)
+app.add_middleware(MonitoramentoSQLMiddleware)
+
 if os.path.exists("static"):
     app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -69,13 +98,23 @@ def root():
 @app.get("/health")
 def health_check():
     """Verifica status da API."""
-    return {"status": "ok", "message": "API funcionando corretamente"}
+    return {
+        "status": "ok",
+        "message": "API funcionando corretamente",
+        "varreduraAtrasos": ultima_varredura,
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas no formato Prometheus."""
+    conteudo, tipo = gerar_metricas()
+    # no cabeçalho direto: media_type acrescentaria um segundo charset
+    return Response(content=conteudo, headers={"Content-Type": tipo})
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    logger.info("Inicializando banco de dados")
-    init_db()
     logger.info("Iniciando servidor FastAPI em http://127.0.0.1:8000")
 
     uvicorn.run(
@@ -0,0 +1,228 @@
+"""
+Métricas no formato Prometheus, expostas em GET /metrics.
+
+Com PROMETHEUS_MULTIPROC_DIR definido (antes de iniciar os workers do
+uvicorn) cada processo grava seus valores no diretório compartilhado e a
+coleta soma todos eles; sem a variável vale só o processo atual.
+"""
+import os
+import time
+
+import anyio.to_thread
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    disable_created_metrics,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+from database import async_engine, async_engine_leitura, engine, engine_leitura
+from monitoramento import estatisticas_atuais
+
+MULTIPROCESSO = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+ROTA_DESCONHECIDA = "<sem rota>"
+
+# Formato texto 0.0.4, o que generate_latest produz; fixado aqui porque o
+# CONTENT_TYPE_LATEST das versões novas do prometheus_client anuncia 1.0.0
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+# As séries *_created dobram o tamanho da coleta sem uso para nós
+disable_created_metrics()
+
+requisicoes_total = Counter(
+    "veridian_requisicoes_total",
+    "Requisições HTTP atendidas",
+    ["metodo", "rota", "status"],
+)
+requisicao_duracao = Histogram(
+    "veridian_requisicao_duracao_segundos",
+    "Latência das requisições HTTP",
+    ["metodo", "rota"],
+)
+requisicoes_em_andamento = Gauge(
+    "veridian_requisicoes_em_andamento",
+    "Requisições HTTP em processamento",
+    multiprocess_mode="livesum",
+)
+db_consultas_total = Counter(
+    "veridian_db_consultas_total",
+    "Instruções SQL executadas, por rota",
+    ["metodo", "rota"],
+)
+db_tempo_total = Counter(
+    "veridian_db_tempo_segundos_total",
+    "Tempo gasto no banco, por rota",
+    ["metodo", "rota"],
+)
+pool_conexoes_em_uso = Gauge(
+    "veridian_pool_conexoes_em_uso",
+    "Conexões retiradas do pool do SQLAlchemy",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+pool_overflow = Gauge(
+    "veridian_pool_overflow",
+    "Conexões abertas além de pool_size (negativo = vagas no pool)",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+threadpool_em_uso = Gauge(
+    "veridian_threadpool_em_uso",
+    "Threads do threadpool do anyio ocupadas",
+    multiprocess_mode="livesum",
+)
+threadpool_limite = Gauge(
+    "veridian_threadpool_limite",
+    "Tamanho do threadpool do anyio",
+    multiprocess_mode="livesum",
+)
+bcrypt_duracao = Histogram(
+    "veridian_bcrypt_duracao_segundos",
+    "Tempo de hash/verificação de senhas com bcrypt",
+    ["operacao"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+
+cache_operacoes = Counter(
+    "veridian_cache_operacoes_total",
+    "Operações dos caches de resposta (acerto, falha, remocao, invalidacao)",
+    ["cache", "resultado"],
+)
+cache_bytes = Gauge(
+    "veridian_cache_bytes",
+    "Bytes de respostas guardados no cache",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+cache_entradas = Gauge(
+    "veridian_cache_entradas",
+    "Respostas guardadas no cache",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+sse_clientes = Gauge(
+    "veridian_sse_clientes",
+    "Conexões abertas em /obras/disponibilidade/stream",
+    multiprocess_mode="livesum",
+)
+sse_descartes = Counter(
+    "veridian_sse_descartes_total",
+    "Clientes do stream de disponibilidade desconectados por não acompanharem os eventos",
+)
+
+
+def _instrumentar_pool(alvo, nome: str):
+    """Atualiza os gauges do pool a cada checkout/checkin."""
+    pool = alvo.pool
+    em_uso = pool_conexoes_em_uso.labels(nome)
+    overflow = pool_overflow.labels(nome)
+
+    def atualizar(*args):
+        em_uso.set(pool.checkedout())
+        if hasattr(pool, "overflow"):
+            overflow.set(pool.overflow())
+
+    event.listen(pool, "checkout", atualizar)
+    event.listen(pool, "checkin", atualizar)
+
+
+_instrumentar_pool(engine, "principal")
+if engine_leitura is not engine:
+    _instrumentar_pool(engine_leitura, "leitura")
+if async_engine is not None:
+    _instrumentar_pool(async_engine.sync_engine, "principal_async")
+if async_engine_leitura is not None and async_engine_leitura is not async_engine:
+    _instrumentar_pool(async_engine_leitura.sync_engine, "leitura_async")
+
+
+# Séries já resolvidas, para não validar os rótulos a cada requisição
+_series_requisicao: dict = {}
+
+
+def _series(metodo: str, rota: str, status: str):
+    chave = (metodo, rota, status)
+    series = _series_requisicao.get(chave)
+    if series is None:
+        series = (
+            requisicoes_total.labels(metodo, rota, status),
+            requisicao_duracao.labels(metodo, rota),
+            db_consultas_total.labels(metodo, rota),
+            db_tempo_total.labels(metodo, rota),
+        )
+        _series_requisicao[chave] = series
+    return series
+
+
+def _atualizar_threadpool():
+    limitador = anyio.to_thread.current_default_thread_limiter()
+    threadpool_em_uso.set(limitador.borrowed_tokens)
+    threadpool_limite.set(limitador.total_tokens)
+
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI que registra latência e contagens por rota.
+
+    Usa o template da rota (/obras/{obra_id}) como rótulo, não o caminho, para
+    manter a cardinalidade fixa. Deve ficar dentro de MonitoramentoSQLMiddleware
+    para ler as estatísticas de SQL da requisição.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = str(mensagem["status"])
+            await send(mensagem)
+
+        requisicoes_em_andamento.inc()
+        _atualizar_threadpool()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            requisicoes_em_andamento.dec()
+            _atualizar_threadpool()
+
+            rota = scope.get("route")
+            total, latencia, consultas, tempo_db = _series(
+                scope["method"], rota.path if rota is not None else ROTA_DESCONHECIDA, status
+            )
+            total.inc()
+            latencia.observe(duracao)
+            estatisticas = estatisticas_atuais.get()
+            if estatisticas is not None:
+                consultas.inc(estatisticas.consultas)
+                tempo_db.inc(estatisticas.tempo_db)
+
+
+def gerar_metricas() -> tuple[bytes, str]:
+    """Serializa as métricas (de todos os workers, em modo multiprocesso)."""
+    if MULTIPROCESSO:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = REGISTRY
+    return generate_latest(registro), TIPO_CONTEUDO
+
+
+def encerrar_processo():
+    """Remove os gauges 'live' deste worker do diretório compartilhado."""
+    if MULTIPROCESSO:
+        multiprocess.mark_process_dead(os.getpid())
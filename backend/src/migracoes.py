@@ -0,0 +1,92 @@
+"""
+Migrações de esquema para bancos já existentes.
+
+create_all só cria tabelas novas; colunas acrescentadas depois aos modelos
+são adicionadas aqui. Cada migração verifica o esquema atual antes de agir,
+então aplicar_migracoes pode rodar a cada inicialização.
+"""
+import logging
+
+from sqlalchemy import Date, inspect, text
+
+from database import Base
+
+logger = logging.getLogger(__name__)
+
+
+def _colunas(conn, tabela: str) -> set[str]:
+    return {coluna["name"] for coluna in inspect(conn).get_columns(tabela)}
+
+
+def _adicionar_coluna(conn, tabela: str, coluna: str, definicao: str) -> None:
+    if coluna in _colunas(conn, tabela):
+        return
+    conn.execute(text(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}"))
+    logger.info("Migração: coluna %s.%s adicionada", tabela, coluna)
+
+
+def _converter_para_date(conn, tabela: str, coluna: str) -> None:
+    """Converte uma coluna de data guardada como texto para DATE nativo."""
+    if conn.dialect.name == "sqlite":
+        # SQLite não tem tipo DATE: o Date do SQLAlchemy grava ISO 8601
+        # (YYYY-MM-DD), que ordena e compara corretamente como texto. Basta
+        # normalizar valores com hora ou em outro formato aceito por date().
+        resultado = conn.execute(text(
+            f"UPDATE {tabela} SET {coluna} = date({coluna}) "
+            f"WHERE {coluna} IS NOT NULL AND date({coluna}) IS NOT NULL "
+            f"AND {coluna} <> date({coluna})"
+        ))
+        if resultado.rowcount:
+            logger.info("Migração: %d valores de %s.%s normalizados", resultado.rowcount, tabela, coluna)
+        return
+
+    tipo = next(c["type"] for c in inspect(conn).get_columns(tabela) if c["name"] == coluna)
+    if isinstance(tipo, Date):
+        return
+    conn.execute(text(
+        f"ALTER TABLE {tabela} ALTER COLUMN {coluna} TYPE DATE USING {coluna}::date"
+    ))
+    logger.info("Migração: coluna %s.%s convertida para DATE", tabela, coluna)
+
+
+def _remover_indice(conn, tabela: str, indice: str) -> None:
+    if indice not in {i["name"] for i in inspect(conn).get_indexes(tabela)}:
+        return
+    conn.execute(text(f"DROP INDEX {indice}"))
+    logger.info("Migração: índice %s removido", indice)
+
+
+def _criar_indices(conn) -> None:
+    """Cria os índices declarados nos modelos que ainda não existem no banco."""
+    # create_all só cria índices junto com a tabela
+    for tabela in Base.metadata.sorted_tables:
+        existentes = {i["name"] for i in inspect(conn).get_indexes(tabela.name)}
+        for indice in tabela.indexes:
+            if indice.name not in existentes:
+                indice.create(conn)
+                logger.info("Migração: índice %s criado", indice.name)
+
+
+def aplicar_migracoes(engine) -> None:
+    """Aplica as migrações pendentes (idempotente)."""
+    with engine.begin() as conn:
+        # Controle de concorrência otimista dos exemplares
+        _adicionar_coluna(conn, "exemplares", "versao", "INTEGER NOT NULL DEFAULT 1")
+
+        # Datas de circulação e cadastro como DATE nativo
+        for tabela, colunas in (
+            ("emprestimos", ("data_emprestimo", "data_prevista_devolucao", "data_devolucao")),
+            ("reservas", ("data_reserva", "data_expiracao")),
+            ("usuarios", ("data_cadastro",)),
+        ):
+            for coluna in colunas:
+                _converter_para_date(conn, tabela, coluna)
+
+        # Substituído pelo índice que também cobre data_devolucao
+        _remover_indice(conn, "emprestimos", "ix_emprestimos_status_data_prevista")
+        # Substituído por ix_obras_titulo_id, que também cobre o desempate por id
+        _remover_indice(conn, "obras", "ix_obras_titulo")
+        # Índices duplicados da chave primária (os modelos usavam index=True no id)
+        for tabela in Base.metadata.sorted_tables:
+            _remover_indice(conn, tabela.name, f"ix_{tabela.name}_id")
+        _criar_indices(conn)
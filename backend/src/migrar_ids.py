@@ -0,0 +1,116 @@
+"""
+Reescreve os ids existentes como UUIDv7.
+
+Bancos criados antes de identificadores.py têm chaves UUID4 aleatórias. Este
+script troca cada id que ainda não é UUIDv7 por um novo, derivado do
+criado_em do registro (a ordem dos ids passa a seguir a ordem de criação),
+e atualiza todas as chaves estrangeiras na mesma transação.
+
+É opcional: ids novos já saem como UUIDv7 e os antigos continuam válidos.
+Rode com a aplicação parada; links e cursores de paginação emitidos antes
+deixam de apontar para os mesmos registros. No PostgreSQL o usuário precisa
+poder definir session_replication_role (superusuário ou dono do banco com
+essa permissão), usado para adiar a checagem das chaves estrangeiras.
+
+Uso:
+    python migrar_ids.py
+"""
+import argparse
+from datetime import timezone
+
+from sqlalchemy import String, select, text
+
+from database import Base, EH_SQLITE, engine, init_db
+from identificadores import eh_uuid7, uuid7
+from models.registro_exclusao import RegistroExclusao
+
+
+def _instante_ms(criado_em) -> int:
+    return int(criado_em.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _tabelas_com_ids() -> list:
+    """Tabelas de entidades: id texto e criado_em (registros_exclusao fica de fora)."""
+    return [
+        tabela
+        for tabela in Base.metadata.sorted_tables
+        if isinstance(tabela.c.id.type, String) and "criado_em" in tabela.c
+    ]
+
+
+def _montar_mapa(conn, lote: int) -> int:
+    """Preenche mapa_ids (antigo -> novo) com os ids que ainda não são UUIDv7."""
+    conn.execute(text(
+        "CREATE TEMP TABLE mapa_ids (antigo VARCHAR PRIMARY KEY, novo VARCHAR NOT NULL)"
+    ))
+    total = 0
+    for tabela in _tabelas_com_ids():
+        linhas = conn.execute(select(tabela.c.id, tabela.c.criado_em)).all()
+        pares = [
+            {"antigo": id_, "novo": uuid7(_instante_ms(criado_em))}
+            for id_, criado_em in linhas
+            if not eh_uuid7(id_)
+        ]
+        for inicio in range(0, len(pares), lote):
+            conn.execute(
+                text("INSERT INTO mapa_ids (antigo, novo) VALUES (:antigo, :novo)"),
+                pares[inicio:inicio + lote],
+            )
+        print(f"   {tabela.name}: {len(pares)} ids")
+        total += len(pares)
+    return total
+
+
+def _reescrever(conn) -> None:
+    """Aplica o mapa nas chaves primárias e estrangeiras de todas as tabelas."""
+    colunas = [
+        (tabela.name, coluna)
+        for tabela in _tabelas_com_ids()
+        for coluna in ["id"] + [fk.parent.name for fk in tabela.foreign_keys]
+    ]
+    # registros de exclusão guardam ids sem chave estrangeira: os que estão
+    # no mapa seguem o mesmo antigo -> novo das tabelas
+    colunas.append((RegistroExclusao.__tablename__, "registro_id"))
+    for tabela, coluna in colunas:
+        conn.execute(text(
+            f"UPDATE {tabela} SET {coluna} = mapa_ids.novo "
+            f"FROM mapa_ids WHERE mapa_ids.antigo = {tabela}.{coluna}"
+        ))
+
+
+def migrar_ids(lote: int = 5000) -> None:
+    init_db()
+
+    with engine.connect() as conn:
+        if EH_SQLITE:
+            # precisa ser definido fora de transação
+            conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            conn.commit()
+        with conn.begin():
+            if not EH_SQLITE:
+                conn.execute(text("SET LOCAL session_replication_role = replica"))
+
+            print("🔎 Gerando novos ids...")
+            total = _montar_mapa(conn, lote)
+            if total:
+                print("✏️  Reescrevendo chaves primárias e estrangeiras...")
+                _reescrever(conn)
+            conn.execute(text("DROP TABLE mapa_ids"))
+
+            if EH_SQLITE:
+                violacoes = conn.exec_driver_sql("PRAGMA foreign_key_check").all()
+                if violacoes:
+                    raise RuntimeError(f"Chaves estrangeiras inconsistentes: {violacoes[:5]}")
+        if EH_SQLITE:
+            conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+
+    if total:
+        print(f"✅ {total} ids reescritos como UUIDv7")
+    else:
+        print("✅ Todos os ids já estão no formato UUIDv7")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reescreve os ids existentes como UUIDv7")
+    parser.add_argument("--lote", type=int, default=5000, help="Linhas por INSERT no mapa de ids")
+    migrar_ids(parser.parse_args().lote)
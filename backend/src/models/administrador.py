@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Index
+from sqlalchemy.orm import backref, relationship
 from datetime import datetime
 from database import Base
+from identificadores import gerar_id
 
 
 class Administrador(Base):
@@ -10,8 +11,12 @@ class Administrador(Base):
     Relação 1:1 com Usuario - todo administrador é um usuário com privilégios elevados.
     """
     __tablename__ = "administradores"
+    __table_args__ = (
+        # Ordem estável da paginação por cursor
+        Index("ix_administradores_criado_em_id", "criado_em", "id"),
+    )
     
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True, default=gerar_id)
     usuarioId = Column('usuario_id', String, ForeignKey("usuarios.id", ondelete="CASCADE"), unique=True, nullable=False)
     nivelAcesso = Column('nivel_acesso', Integer, default=1, nullable=False)  # 1=básico, 2=intermediário, 3=total
     
@@ -20,7 +25,7 @@ class Administrador(Base):
     atualizadoEm = Column('atualizado_em', DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
     # Relacionamento com Usuario
-    usuario = relationship("Usuario", backref="administrador", foreign_keys=[usuarioId])
+    usuario = relationship("Usuario", backref=backref("administrador", passive_deletes=True), foreign_keys=[usuarioId])
     
     def __repr__(self):
         return f"<Administrador(id={self.id}, usuario_id={self.usuario_id}, nivel_acesso={self.nivel_acesso})>"
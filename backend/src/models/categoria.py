@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index
 from datetime import datetime
 from database import Base
+from identificadores import gerar_id
 
 
 class Categoria(Base):
@@ -9,8 +10,14 @@ class Categoria(Base):
     Categoriza as obras da biblioteca (Ficção, Tecnologia, etc).
     """
     __tablename__ = "categorias"
+    __table_args__ = (
+        # Ordem estável da paginação por cursor
+        Index("ix_categorias_criado_em_id", "criado_em", "id"),
+        # Validadores das listagens: max(atualizado_em) + count (condicional.py)
+        Index("ix_categorias_atualizado_em_id", "atualizado_em", "id"),
+    )
     
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True, default=gerar_id)
     nome = Column(String, unique=True, nullable=False)
     descricao = Column(String, nullable=True)
     
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, ForeignKey, Date, DateTime, Enum, Index, text
+from sqlalchemy.orm import backref, relationship
 from datetime import datetime
 from database import Base
+from identificadores import gerar_id
 import enum
 
 
@@ -18,14 +19,42 @@ class Emprestimo(Base):
     Registra empréstimos de exemplares para usuários.
     """
     __tablename__ = "emprestimos"
+    __table_args__ = (
+        # Ordem estável da paginação por cursor
+        Index("ix_emprestimos_criado_em_id", "criado_em", "id"),
+        # Varredura de atrasos e consultas de vencimento: o predicado inteiro
+        # (status, data prevista, data de devolução) é resolvido só pelo índice
+        Index(
+            "ix_emprestimos_status_prevista_devolucao",
+            "status",
+            "data_prevista_devolucao",
+            "data_devolucao",
+        ),
+        # Índice parcial: só empréstimos ativos (SQLite e PostgreSQL)
+        Index(
+            "ix_emprestimos_ativos_data_prevista",
+            "data_prevista_devolucao",
+            sqlite_where=text("status = 'ativo'"),
+            postgresql_where=text("status = 'ativo'"),
+        ),
+        # Filtros e ordenações de GET /emprestimos/
+        Index("ix_emprestimos_usuario_id", "usuario_id"),
+        Index("ix_emprestimos_obra_id", "obra_id"),
+        # Chave estrangeira do exemplar + empréstimo em aberto (devolução por código)
+        Index("ix_emprestimos_exemplar_id_devolucao", "exemplar_id", "data_devolucao"),
+        Index("ix_emprestimos_data_prevista_id", "data_prevista_devolucao", "id"),
+        Index("ix_emprestimos_data_emprestimo_id", "data_emprestimo", "id"),
+        # Feed de alterações: atualizado_em > since, na ordem (atualizado_em, id)
+        Index("ix_emprestimos_atualizado_em_id", "atualizado_em", "id"),
+    )
     
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True, default=gerar_id)
     usuarioId = Column('usuario_id', String, ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False)
     exemplarId = Column('exemplar_id', String, ForeignKey("exemplares.id", ondelete="CASCADE"), nullable=False)
     obraId = Column('obra_id', String, ForeignKey("obras.id", ondelete="CASCADE"), nullable=False)
-    dataEmprestimo = Column('data_emprestimo', String, nullable=False)  # Formato: YYYY-MM-DD
-    dataPrevistaDevolucao = Column('data_prevista_devolucao', String, nullable=False)  # Formato: YYYY-MM-DD
-    dataDevolucao = Column('data_devolucao', String, nullable=True)  # Formato: YYYY-MM-DD
+    dataEmprestimo = Column('data_emprestimo', Date, nullable=False)
+    dataPrevistaDevolucao = Column('data_prevista_devolucao', Date, nullable=False)
+    dataDevolucao = Column('data_devolucao', Date, nullable=True)
     status = Column(Enum(StatusEmprestimo), default=StatusEmprestimo.ativo, nullable=False)
     renovacoes = Column(Integer, default=0, nullable=False)
     
@@ -33,9 +62,10 @@ class Emprestimo(Base):
     criadoEm = Column('criado_em', DateTime, default=datetime.utcnow, nullable=False)
     atualizadoEm = Column('atualizado_em', DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
-    # Relacionamentos
-    usuario = relationship("Usuario", backref="emprestimos", foreign_keys=[usuarioId])
-    exemplar = relationship("Exemplar", backref="emprestimos", foreign_keys=[exemplarId])
+    # Relacionamentos. passive_deletes: ao excluir usuário ou exemplar, o ORM não
+    # carrega os empréstimos; o ON DELETE CASCADE das chaves remove no banco
+    usuario = relationship("Usuario", backref=backref("emprestimos", passive_deletes=True), foreign_keys=[usuarioId])
+    exemplar = relationship("Exemplar", backref=backref("emprestimos", passive_deletes=True), foreign_keys=[exemplarId])
     
     def __repr__(self):
         return f"<Emprestimo(id={self.id}, usuario_id={self.usuario_id}, obra_id={self.obra_id}, status={self.status.value})>"
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
+from identificadores import gerar_id
 import enum
 
 
@@ -20,16 +21,29 @@ class Exemplar(Base):
     Uma obra pode ter vários exemplares.
     """
     __tablename__ = "exemplares"
+    __table_args__ = (
+        # Ordem estável da paginação por cursor
+        Index("ix_exemplares_criado_em_id", "criado_em", "id"),
+        # Chave estrangeira da obra + status (exemplares disponíveis de uma obra)
+        Index("ix_exemplares_obra_id_status", "obra_id", "status"),
+        # Feed de alterações: atualizado_em > since, na ordem (atualizado_em, id)
+        Index("ix_exemplares_atualizado_em_id", "atualizado_em", "id"),
+    )
     
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True, default=gerar_id)
     obraId = Column('obra_id', String, ForeignKey("obras.id", ondelete="CASCADE"), nullable=False)
     codigo = Column(String, unique=True, nullable=False, index=True)  # Código de barras/etiqueta
     status = Column(Enum(StatusExemplar), default=StatusExemplar.disponivel, nullable=False)
     localizacao = Column(String, nullable=True)  # Estante/prateleira
+    versao = Column(Integer, default=1, server_default="1", nullable=False)  # Bloqueio otimista
     
     # Timestamps automáticos
     criadoEm = Column('criado_em', DateTime, default=datetime.utcnow, nullable=False)
     atualizadoEm = Column('atualizado_em', DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # UPDATEs pelo ORM incluem "WHERE versao = :lida" e incrementam a versão;
+    # se outra transação alterou a linha antes, o flush levanta StaleDataError
+    __mapper_args__ = {"version_id_col": versao}
+    
     def __repr__(self):
         return f"<Exemplar(id={self.id}, codigo={self.codigo}, status={self.status.value})>"
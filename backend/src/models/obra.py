@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
+from identificadores import gerar_id
 
 
 class Obra(Base):
@@ -10,9 +11,21 @@ class Obra(Base):
     Representa um livro/publicação na biblioteca.
     """
     __tablename__ = "obras"
+    __table_args__ = (
+        # Ordem estável da paginação por cursor
+        Index("ix_obras_criado_em_id", "criado_em", "id"),
+        # Filtros e ordenações de GET /obras/
+        Index("ix_obras_categoria_id", "categoria_id"),
+        Index("ix_obras_titulo_id", "titulo", "id"),
+        Index("ix_obras_autor_id", "autor", "id"),
+        Index("ix_obras_ano_publicacao", "ano_publicacao"),
+        Index("ix_obras_exemplares_disponiveis", "exemplares_disponiveis"),
+        # Validadores das listagens (max(atualizado_em) + count) e feed de alterações
+        Index("ix_obras_atualizado_em_id", "atualizado_em", "id"),
+    )
     
-    id = Column(String, primary_key=True, index=True)
-    titulo = Column(String, nullable=False, index=True)
+    id = Column(String, primary_key=True, default=gerar_id)
+    titulo = Column(String, nullable=False)
     autor = Column(String, nullable=False)
     isbn = Column(String, unique=True, nullable=False)
     categoriaId = Column('categoria_id', String, ForeignKey("categorias.id"), nullable=False)
@@ -30,7 +43,8 @@ class Obra(Base):
     # Relacionamento com Categoria
     categoria = relationship("Categoria", backref="obras", foreign_keys=[categoriaId])
     
-    # Relacionamentos com cascade delete
+    # Relacionamentos com cascade delete. passive_deletes: filhos que não estão na
+    # sessão não são carregados; o ON DELETE CASCADE das chaves os remove no banco
     exemplares = relationship("Exemplar", backref="obra_rel", cascade="all, delete-orphan", passive_deletes=True)
     emprestimos = relationship("Emprestimo", backref="obra_rel_emp", cascade="all, delete-orphan", passive_deletes=True)
     reservas = relationship("Reserva", backref="obra_rel_res", cascade="all, delete-orphan", passive_deletes=True)
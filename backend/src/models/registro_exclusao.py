@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Integer, DateTime, Index
+from database import Base
+
+
+class RegistroExclusao(Base):
+    """
+    Modelo de Registro de Exclusão.
+    Marca (tombstone) de uma linha removida, lida pelos feeds de alterações.
+    Preenchido por gatilhos no banco (ver sincronizacao_service), inclusive
+    nas exclusões em cascata.
+    """
+    __tablename__ = "registros_exclusao"
+    __table_args__ = (
+        # Leitura do feed e poda por tabela, na ordem (excluido_em, id)
+        Index("ix_registros_exclusao_tabela_excluido_em_id", "tabela", "excluido_em", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tabela = Column(String, nullable=False)
+    registroId = Column('registro_id', String, nullable=False)
+    excluidoEm = Column('excluido_em', DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<RegistroExclusao(tabela={self.tabela}, registroId={self.registroId})>"
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, ForeignKey, Date, DateTime, Enum, Index, text
+from sqlalchemy.orm import backref, relationship
 from datetime import datetime
 from database import Base
+from identificadores import gerar_id
 import enum
 
 
@@ -18,20 +19,39 @@ class Reserva(Base):
     Permite usuários reservarem obras que estão emprestadas.
     """
     __tablename__ = "reservas"
+    __table_args__ = (
+        # Ordem estável da paginação por cursor
+        Index("ix_reservas_criado_em_id", "criado_em", "id"),
+        # Feed de alterações: atualizado_em > since, na ordem (atualizado_em, id)
+        Index("ix_reservas_atualizado_em_id", "atualizado_em", "id"),
+        # Reservas a expirar (status + data de expiração)
+        Index("ix_reservas_status_data_expiracao", "status", "data_expiracao"),
+        # Chaves estrangeiras (dependências do usuário, exclusões em cascata)
+        Index("ix_reservas_usuario_id", "usuario_id"),
+        Index("ix_reservas_obra_id", "obra_id"),
+        # Índice parcial: fila de reservas ativas de cada obra
+        Index(
+            "ix_reservas_ativas_obra_data",
+            "obra_id",
+            "data_reserva",
+            sqlite_where=text("status = 'ativa'"),
+            postgresql_where=text("status = 'ativa'"),
+        ),
+    )
     
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True, default=gerar_id)
     usuarioId = Column('usuario_id', String, ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False)
     obraId = Column('obra_id', String, ForeignKey("obras.id", ondelete="CASCADE"), nullable=False)
-    dataReserva = Column('data_reserva', String, nullable=False)  # Formato: YYYY-MM-DD
+    dataReserva = Column('data_reserva', Date, nullable=False)
     status = Column(Enum(StatusReserva), default=StatusReserva.ativa, nullable=False)
-    dataExpiracao = Column('data_expiracao', String, nullable=False)  # Formato: YYYY-MM-DD
+    dataExpiracao = Column('data_expiracao', Date, nullable=False)
     
     # Timestamps automáticos
     criadoEm = Column('criado_em', DateTime, default=datetime.utcnow, nullable=False)
     atualizadoEm = Column('atualizado_em', DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
     # Relacionamentos
-    usuario = relationship("Usuario", backref="reservas", foreign_keys=[usuarioId])
+    usuario = relationship("Usuario", backref=backref("reservas", passive_deletes=True), foreign_keys=[usuarioId])
     
     def __repr__(self):
         return f"<Reserva(id={self.id}, usuario_id={self.usuario_id}, obra_id={self.obra_id}, status={self.status.value})>"
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, DateTime, Enum
+from sqlalchemy import Column, String, Date, DateTime, Enum, Index
 from datetime import datetime
 from database import Base
+from identificadores import gerar_id
 import enum
 
 
@@ -23,15 +24,19 @@ class Usuario(Base):
     Representa tanto usuários comuns quanto administradores.
     """
     __tablename__ = "usuarios"
+    __table_args__ = (
+        # Ordem estável da paginação por cursor
+        Index("ix_usuarios_criado_em_id", "criado_em", "id"),
+    )
     
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True, default=gerar_id)
     nome = Column(String, nullable=False)
     cpf = Column(String(11), unique=True, nullable=False, index=True)
     email = Column(String, unique=True, nullable=False, index=True)
     senhaHash = Column('senha_hash', String, nullable=False)
     telefone = Column(String, nullable=True)
     endereco = Column(String, nullable=True)
-    dataCadastro = Column('data_cadastro', String, nullable=False)  # Formato: YYYY-MM-DD
+    dataCadastro = Column('data_cadastro', Date, nullable=False)
     status = Column(Enum(StatusUsuario), default=StatusUsuario.ativo, nullable=False)
     role = Column(Enum(RoleUsuario), default=RoleUsuario.user, nullable=False)
     
@@ -0,0 +1,138 @@
+"""
+Instrumentação de SQL por requisição.
+
+Os eventos before/after_cursor_execute (registrados na classe Engine, valendo
+para todos os engines, inclusive os assíncronos) contam as consultas e o tempo
+gasto no banco. O middleware abre o contexto da requisição, devolve os totais
+no cabeçalho Server-Timing e registra no log consultas repetidas (padrão N+1)
+e consultas lentas, com os parâmetros ocultados.
+"""
+import logging
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Consultas acima deste tempo (ms) vão para o log; 0 desliga
+SQL_LENTA_MS = float(os.getenv("SQL_LENTA_MS", "200"))
+# Mesma instrução repetida a partir deste número de vezes indica N+1; 0 desliga
+N_MAIS_UM_LIMIAR = int(os.getenv("N_MAIS_UM_LIMIAR", "5"))
+
+
+@dataclass
+class EstatisticasRequisicao:
+    """Totais de SQL acumulados durante uma requisição."""
+
+    consultas: int = 0
+    tempo_db: float = 0.0  # segundos
+    por_instrucao: dict = field(default_factory=dict)
+
+    def repetidas(self) -> list[tuple[str, int]]:
+        """Instruções executadas pelo menos N_MAIS_UM_LIMIAR vezes."""
+        if N_MAIS_UM_LIMIAR <= 0:
+            return []
+        return [
+            (instrucao, vezes)
+            for instrucao, vezes in self.por_instrucao.items()
+            if vezes >= N_MAIS_UM_LIMIAR
+        ]
+
+
+# O objeto é mutável: alterações feitas no threadpool (que copia o contexto)
+# continuam visíveis para o middleware.
+estatisticas_atuais: ContextVar[EstatisticasRequisicao | None] = ContextVar(
+    "estatisticas_atuais", default=None
+)
+
+
+def _ocultar_parametros(parametros) -> str:
+    """Mostra só o tipo de cada parâmetro, nunca o valor."""
+    if isinstance(parametros, dict):
+        return repr({chave: type(valor).__name__ for chave, valor in parametros.items()})
+    if isinstance(parametros, (list, tuple)):
+        if parametros and isinstance(parametros[0], (list, tuple, dict)):
+            # executemany
+            return f"<{len(parametros)} conjuntos de parâmetros>"
+        return repr(tuple(type(valor).__name__ for valor in parametros))
+    return "<parâmetros ocultos>"
+
+
+# O início fica no contexto de execução da instrução, não em conn.info: se a
+# instrução falha, after_cursor_execute não roda e nada sobra na conexão que
+# volta ao pool.
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._inicio_monitoramento = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "_inicio_monitoramento", None)
+    if inicio is None:
+        return
+    duracao = time.perf_counter() - inicio
+
+    estatisticas = estatisticas_atuais.get()
+    if estatisticas is not None:
+        estatisticas.consultas += 1
+        estatisticas.tempo_db += duracao
+        estatisticas.por_instrucao[statement] = estatisticas.por_instrucao.get(statement, 0) + 1
+
+    if SQL_LENTA_MS > 0 and duracao * 1000 >= SQL_LENTA_MS:
+        logger.warning(
+            "Consulta lenta (%.1f ms): %s | parâmetros: %s",
+            duracao * 1000,
+            " ".join(statement.split()),
+            _ocultar_parametros(parameters),
+        )
+
+
+def _server_timing(estatisticas: EstatisticasRequisicao, total: float) -> bytes:
+    return (
+        f'db;dur={estatisticas.tempo_db * 1000:.1f};desc="{estatisticas.consultas} consultas", '
+        f"app;dur={total * 1000:.1f}"
+    ).encode("latin-1")
+
+
+class MonitoramentoSQLMiddleware:
+    """Middleware ASGI que mede o SQL de cada requisição HTTP."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estatisticas = EstatisticasRequisicao()
+        token = estatisticas_atuais.set(estatisticas)
+        inicio = time.perf_counter()
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                cabecalhos = list(mensagem.get("headers", []))
+                cabecalhos.append(
+                    (b"server-timing", _server_timing(estatisticas, time.perf_counter() - inicio))
+                )
+                mensagem = {**mensagem, "headers": cabecalhos}
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            estatisticas_atuais.reset(token)
+            for instrucao, vezes in estatisticas.repetidas():
+                logger.warning(
+                    "Possível N+1 em %s %s: instrução executada %d vezes: %s",
+                    scope["method"],
+                    scope["path"],
+                    vezes,
+                    " ".join(instrucao.split())[:200],
+                )
@@ -1,17 +1,27 @@
 import os
-from database import Base, engine, init_db
+from database import Base, EH_SQLITE, engine, importar_modelos, init_db
 
 def recriar_banco():
     """Remove e recria o banco de dados do zero."""
     
-    db_path = "veridian.db"
-    
-    if os.path.exists(db_path):
-        print(f"🗑️  Removendo banco de dados antigo: {db_path}")
-        os.remove(db_path)
+    if EH_SQLITE:
+        db_path = engine.url.database or "veridian.db"
+        
+        engine.dispose()
+        if os.path.exists(db_path):
+            print(f"🗑️  Removendo banco de dados antigo: {db_path}")
+            os.remove(db_path)
+        # arquivos auxiliares do modo WAL
+        for sufixo in ("-wal", "-shm"):
+            if os.path.exists(db_path + sufixo):
+                os.remove(db_path + sufixo)
+    else:
+        print(f"🗑️  Removendo tabelas de {engine.url.render_as_string(hide_password=True)}")
+        importar_modelos()
+        Base.metadata.drop_all(bind=engine)
     
     print("🔨 Criando novo banco de dados com estrutura atualizada...")
-    Base.metadata.create_all(bind=engine)
+    init_db()
     
     print("✅ Banco de dados recriado com sucesso!")
     print("📝 Execute 'python dados_bd.py' para popular com dados de exemplo")
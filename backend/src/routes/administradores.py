@@ -1,20 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
 from database import get_db
+from identificadores import gerar_id
 from models.administrador import Administrador
 from models.usuario import Usuario
 from schemas.administrador import AdministradorCreate, AdministradorUpdate, AdministradorResponse
-import uuid
+from schemas.paginacao import Pagina
+from services.paginacao_service import LIMITE_MAXIMO, LIMITE_PADRAO, paginar
 
 router = APIRouter(prefix="/administradores", tags=["Administradores"])
 
 
-@router.get("/", response_model=List[AdministradorResponse])
-def listar_administradores(db: Session = Depends(get_db)):
-    """Lista todos os administradores"""
-    administradores = db.query(Administrador).all()
-    return administradores
+@router.get("/", response_model=Pagina[AdministradorResponse])
+def listar_administradores(
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: Session = Depends(get_db),
+):
+    """Lista administradores paginados por cursor"""
+    return paginar(db.query(Administrador), Administrador, cursor, limit)
 
 
 @router.get("/{admin_id}", response_model=AdministradorResponse)
@@ -66,7 +71,7 @@ def criar_administrador(admin_data: AdministradorCreate, db: Session = Depends(g
     
     # Criar administrador
     novo_admin = Administrador(
-        id=str(uuid.uuid4()),
+        id=gerar_id(),
         usuarioId=admin_data.usuarioId,
         nivelAcesso=admin_data.nivelAcesso
     )
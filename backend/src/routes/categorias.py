@@ -1,24 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
+from cache import catalogo, chave_requisicao, etiquetas_lista, etiquetas_registro, guardar_resposta, resposta_em_cache
+from condicional import calcular_validadores_colecao, nao_modificado, resposta_nao_modificada, validadores_colecao, validadores_registro
 from database import get_db
+from identificadores import gerar_id
 from models.categoria import Categoria
+from models.obra import Obra
 from schemas.categoria import CategoriaCreate, CategoriaUpdate, CategoriaResponse
-import uuid
+from schemas.paginacao import Pagina
+from services.paginacao_service import LIMITE_MAXIMO, LIMITE_PADRAO, paginar
 
 router = APIRouter(prefix="/categorias", tags=["Categorias"])
 
 
-@router.get("/", response_model=List[CategoriaResponse])
-def listar_categorias(db: Session = Depends(get_db)):
-    """Lista todas as categorias"""
-    categorias = db.query(Categoria).all()
-    return categorias
+@router.get("/", response_model=Pagina[CategoriaResponse])
+def listar_categorias(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: Session = Depends(get_db),
+):
+    """Lista categorias paginadas por cursor"""
+    chave = chave_requisicao(request)
+    if (entrada := catalogo.obter_entrada(chave)) is not None:
+        return resposta_em_cache(request, entrada)
+    geracao = catalogo.geracao
+    cabecalhos = None
+    if calcular_validadores_colecao(request, cursor):
+        cabecalhos = validadores_colecao(db.query(Categoria), Categoria, chave)
+        if nao_modificado(request, cabecalhos):
+            return resposta_nao_modificada(cabecalhos)
+    pagina = paginar(db.query(Categoria), Categoria, cursor, limit)
+    return guardar_resposta(
+        catalogo, chave, Pagina[CategoriaResponse].model_validate(pagina), etiquetas_lista("categorias"), geracao, cabecalhos
+    )
 
 
 @router.get("/{categoria_id}", response_model=CategoriaResponse)
-def buscar_categoria(categoria_id: str, db: Session = Depends(get_db)):
+def buscar_categoria(categoria_id: str, request: Request, db: Session = Depends(get_db)):
     """Busca categoria por ID"""
+    chave = chave_requisicao(request)
+    if (entrada := catalogo.obter_entrada(chave)) is not None:
+        return resposta_em_cache(request, entrada)
+    geracao = catalogo.geracao
     categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
     
     if not categoria:
@@ -27,7 +53,13 @@ def buscar_categoria(categoria_id: str, db: Session = Depends(get_db)):
             detail="Categoria não encontrada"
         )
     
-    return categoria
+    cabecalhos = validadores_registro(categoria)
+    if nao_modificado(request, cabecalhos):
+        return resposta_nao_modificada(cabecalhos)
+    
+    return guardar_resposta(
+        catalogo, chave, CategoriaResponse.model_validate(categoria), etiquetas_registro("categorias", categoria_id), geracao, cabecalhos
+    )
 
 
 @router.post("/", response_model=CategoriaResponse, status_code=status.HTTP_201_CREATED)
@@ -47,7 +79,7 @@ def criar_categoria(categoria_data: CategoriaCreate, db: Session = Depends(get_d
     
     # Criar categoria
     nova_categoria = Categoria(
-        id=str(uuid.uuid4()),
+        id=gerar_id(),
         nome=categoria_data.nome,
         descricao=categoria_data.descricao
     )
@@ -87,15 +119,23 @@ def atualizar_categoria(categoria_id: str, categoria_data: CategoriaUpdate, db:
 def deletar_categoria(categoria_id: str, db: Session = Depends(get_db)):
     """Deleta categoria"""
     
-    categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
+    if db.query(Obra.id).filter(Obra.categoriaId == categoria_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Categoria possui obras cadastradas"
+        )
     
-    if not categoria:
+    excluida = db.execute(
+        delete(Categoria).where(Categoria.id == categoria_id).returning(Categoria.id)
+    ).first()
+    
+    if excluida is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Categoria não encontrada"
         )
     
-    db.delete(categoria)
     db.commit()
     
     return None
@@ -1,39 +1,35 @@
-import uuid
 from datetime import date
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 
-from database import get_db
-from models.emprestimo import Emprestimo
+from condicional import responder_registro
+from database import SessaoAssincrona, get_async_db
+from identificadores import gerar_id
+from models.emprestimo import Emprestimo, StatusEmprestimo
 from models.exemplar import Exemplar
 from models.obra import Obra
 from models.usuario import Usuario
-from schemas.emprestimo import EmprestimoCreate, EmprestimoResponse, EmprestimoUpdate
-
-
-def atualizar_status_atrasados(db: Session) -> None:
-    """Atualiza automaticamente empréstimos que já passaram da data."""
-    hoje = date.today()
-    emprestimos_ativos = db.query(Emprestimo).filter(
-        Emprestimo.status == "ativo",
-        Emprestimo.dataDevolucao.is_(None),
-    ).all()
-
-    houve_atualizacao = False
-    for emprestimo in emprestimos_ativos:
-        data_prevista = (
-            date.fromisoformat(emprestimo.dataPrevistaDevolucao)
-            if isinstance(emprestimo.dataPrevistaDevolucao, str)
-            else emprestimo.dataPrevistaDevolucao
-        )
-        if data_prevista < hoje:
-            emprestimo.status = "atrasado"
-            houve_atualizacao = True
-
-    if houve_atualizacao:
-        db.commit()
+from schemas.emprestimo import (
+    DevolucaoLoteCreate,
+    EmprestimoCreate,
+    EmprestimoLoteCreate,
+    EmprestimoResponse,
+    EmprestimoUpdate,
+    LoteResponse,
+)
+from schemas.paginacao import Pagina
+from schemas.sincronizacao import Alteracoes
+from services.circulacao_service import (
+    ajustar_disponiveis,
+    devolver_lote,
+    emprestar_lote,
+    registrar_devolucao,
+    retirar_exemplar,
+)
+from services.paginacao_service import LIMITE_MAXIMO, LIMITE_PADRAO, paginar
+from services.sincronizacao_service import listar_alteracoes
 
 
 def _get_status_value(status_field) -> str:
@@ -49,19 +45,117 @@ def _get_or_404(db: Session, model, entity_id: str, mensagem: str):
 
 router = APIRouter(prefix="/emprestimos", tags=["Empréstimos"])
 
+ORDENACOES = {
+    "criadoEm": Emprestimo.criadoEm,
+    "dataEmprestimo": Emprestimo.dataEmprestimo,
+    "dataPrevistaDevolucao": Emprestimo.dataPrevistaDevolucao,
+}
+
+
+def _listar_emprestimos(
+    db: Session,
+    usuarioId: Optional[str],
+    obraId: Optional[str],
+    status_emprestimo: Optional[str],
+    dataPrevistaDe: Optional[date],
+    dataPrevistaAte: Optional[date],
+    ordenar: str,
+    cursor: Optional[str],
+    limit: int,
+):
+    query = db.query(Emprestimo)
+
+    if usuarioId is not None:
+        query = query.filter(Emprestimo.usuarioId == usuarioId)
+    if obraId is not None:
+        query = query.filter(Emprestimo.obraId == obraId)
+    if status_emprestimo is not None:
+        query = query.filter(Emprestimo.status == StatusEmprestimo(status_emprestimo))
+    if dataPrevistaDe is not None:
+        query = query.filter(Emprestimo.dataPrevistaDevolucao >= dataPrevistaDe)
+    if dataPrevistaAte is not None:
+        query = query.filter(Emprestimo.dataPrevistaDevolucao <= dataPrevistaAte)
+
+    return paginar(query, Emprestimo, cursor, limit, ordenar, ORDENACOES)
+
+
+@router.get("/", response_model=Pagina[EmprestimoResponse])
+async def listar_emprestimos(
+    usuarioId: Optional[str] = None,
+    obraId: Optional[str] = None,
+    status_emprestimo: Optional[str] = Query(None, alias="status", pattern=r'^(ativo|devolvido|atrasado)$'),
+    dataPrevistaDe: Optional[date] = None,
+    dataPrevistaAte: Optional[date] = None,
+    ordenar: str = "criadoEm",
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: SessaoAssincrona = Depends(get_async_db),
+):
+    """Lista empréstimos paginados, com filtros e ordenação aplicados no banco"""
+    return await db.run_sync(
+        _listar_emprestimos,
+        usuarioId=usuarioId,
+        obraId=obraId,
+        status_emprestimo=status_emprestimo,
+        dataPrevistaDe=dataPrevistaDe,
+        dataPrevistaAte=dataPrevistaAte,
+        ordenar=ordenar,
+        cursor=cursor,
+        limit=limit,
+    )
 
-@router.get("/", response_model=List[EmprestimoResponse])
-def listar_emprestimos(db: Session = Depends(get_db)):
-    """Lista todos os empréstimos e atualiza status de atrasados"""
-    atualizar_status_atrasados(db)
-    emprestimos = db.query(Emprestimo).all()
-    return emprestimos
 
+def _resumo_lote(itens: list[dict]) -> LoteResponse:
+    # Serializado antes do commit: depois dele os empréstimos expiram e
+    # seriam recarregados um a um
+    falhas = sum(1 for item in itens if not item["sucesso"])
+    return LoteResponse.model_validate({"itens": itens, "processados": len(itens) - falhas, "falhas": falhas})
 
-@router.get("/{emprestimo_id}", response_model=EmprestimoResponse)
-def buscar_emprestimo(emprestimo_id: str, db: Session = Depends(get_db)):
-    """Busca empréstimo por ID"""
-    atualizar_status_atrasados(db)
+
+def _criar_emprestimos_lote(db: Session, dados: EmprestimoLoteCreate):
+    usuario = _get_or_404(db, Usuario, dados.usuarioId, "Usuário não encontrado")
+    if _get_status_value(usuario.status) != "ativo":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Usuário está inativo ou suspenso",
+        )
+
+    resumo = _resumo_lote(
+        emprestar_lote(db, usuario, dados.codigos, dados.dataEmprestimo, dados.dataPrevistaDevolucao)
+    )
+    db.commit()
+    return resumo
+
+
+@router.post("/lote", response_model=LoteResponse)
+async def criar_emprestimos_lote(dados: EmprestimoLoteCreate, db: SessaoAssincrona = Depends(get_async_db)):
+    """Empresta vários exemplares (por código) ao mesmo usuário, com resultado por item"""
+    return await db.run_sync(_criar_emprestimos_lote, dados)
+
+
+def _devolver_lote(db: Session, dados: DevolucaoLoteCreate):
+    resumo = _resumo_lote(devolver_lote(db, dados.codigos, dados.dataDevolucao))
+    db.commit()
+    return resumo
+
+
+@router.post("/devolucoes/lote", response_model=LoteResponse)
+async def devolver_emprestimos_lote(dados: DevolucaoLoteCreate, db: SessaoAssincrona = Depends(get_async_db)):
+    """Devolve vários exemplares (por código), com resultado por item"""
+    return await db.run_sync(_devolver_lote, dados)
+
+
+@router.get("/changes", response_model=Alteracoes[EmprestimoResponse])
+async def listar_alteracoes_emprestimos(
+    since: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: SessaoAssincrona = Depends(get_async_db),
+):
+    """Empréstimos alterados e removidos desde o token de sincronização"""
+    return await db.run_sync(listar_alteracoes, Emprestimo, since, limit)
+
+
+def _buscar_emprestimo(db: Session, emprestimo_id: str):
     emprestimo = db.query(Emprestimo).filter(Emprestimo.id == emprestimo_id).first()
     
     if not emprestimo:
@@ -73,10 +167,13 @@ def buscar_emprestimo(emprestimo_id: str, db: Session = Depends(get_db)):
     return emprestimo
 
 
-@router.post("/", response_model=EmprestimoResponse, status_code=status.HTTP_201_CREATED)
-def criar_emprestimo(emprestimo_data: EmprestimoCreate, db: Session = Depends(get_db)):
-    """Cria novo empréstimo"""
+@router.get("/{emprestimo_id}", response_model=EmprestimoResponse)
+async def buscar_emprestimo(emprestimo_id: str, request: Request, db: SessaoAssincrona = Depends(get_async_db)):
+    """Busca empréstimo por ID"""
+    return responder_registro(request, await db.run_sync(_buscar_emprestimo, emprestimo_id), EmprestimoResponse)
 
+
+def _criar_emprestimo(db: Session, emprestimo_data: EmprestimoCreate):
     usuario = _get_or_404(db, Usuario, emprestimo_data.usuarioId, "Usuário não encontrado")
     if _get_status_value(usuario.status) != "ativo":
         raise HTTPException(
@@ -84,17 +181,14 @@ def criar_emprestimo(emprestimo_data: EmprestimoCreate, db: Session = Depends(ge
             detail="Usuário está inativo ou suspenso",
         )
 
-    exemplar = _get_or_404(db, Exemplar, emprestimo_data.exemplarId, "Exemplar não encontrado")
-    if _get_status_value(exemplar.status) != "disponivel":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Exemplar não está disponível",
-        )
+    _get_or_404(db, Obra, emprestimo_data.obraId, "Obra não encontrada")
 
-    obra = _get_or_404(db, Obra, emprestimo_data.obraId, "Obra não encontrada")
+    # Verificação e troca de status numa única instrução: só um de dois
+    # empréstimos simultâneos do mesmo exemplar passa daqui
+    retirar_exemplar(db, emprestimo_data.exemplarId)
 
     novo_emprestimo = Emprestimo(
-        id=str(uuid.uuid4()),
+        id=gerar_id(),
         usuarioId=emprestimo_data.usuarioId,
         exemplarId=emprestimo_data.exemplarId,
         obraId=emprestimo_data.obraId,
@@ -106,9 +200,7 @@ def criar_emprestimo(emprestimo_data: EmprestimoCreate, db: Session = Depends(ge
     )
 
     db.add(novo_emprestimo)
-
-    exemplar.status = "emprestado"
-    obra.exemplaresDisponiveis = max(obra.exemplaresDisponiveis - 1, 0)
+    ajustar_disponiveis(db, emprestimo_data.obraId, -1)
 
     db.commit()
     db.refresh(novo_emprestimo)
@@ -116,29 +208,27 @@ def criar_emprestimo(emprestimo_data: EmprestimoCreate, db: Session = Depends(ge
     return novo_emprestimo
 
 
-@router.put("/{emprestimo_id}", response_model=EmprestimoResponse)
-def atualizar_emprestimo(emprestimo_id: str, emprestimo_data: EmprestimoUpdate, db: Session = Depends(get_db)):
-    """Atualiza dados do empréstimo"""
-    
-    emprestimo = db.query(Emprestimo).filter(Emprestimo.id == emprestimo_id).first()
-    
-    if not emprestimo:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Empréstimo não encontrado",
-        )
+@router.post("/", response_model=EmprestimoResponse, status_code=status.HTTP_201_CREATED)
+async def criar_emprestimo(emprestimo_data: EmprestimoCreate, db: SessaoAssincrona = Depends(get_async_db)):
+    """Cria novo empréstimo"""
+    return await db.run_sync(_criar_emprestimo, emprestimo_data)
+
 
+def _atualizar_emprestimo(db: Session, emprestimo_id: str, emprestimo_data: EmprestimoUpdate):
     # Atualizar apenas campos fornecidos
     update_data = emprestimo_data.model_dump(exclude_unset=True)
 
     if update_data.get("dataDevolucao"):
-        exemplar = _get_or_404(db, Exemplar, emprestimo.exemplarId, "Exemplar não encontrado")
-        exemplar.status = "disponivel"
+        emprestimo = registrar_devolucao(db, emprestimo_id, update_data.pop("dataDevolucao"))
+        update_data.pop("status", None)
+    else:
+        emprestimo = db.query(Emprestimo).filter(Emprestimo.id == emprestimo_id).first()
 
-        obra = _get_or_404(db, Obra, emprestimo.obraId, "Obra não encontrada")
-        obra.exemplaresDisponiveis += 1
-
-        update_data["status"] = "devolvido"
+    if not emprestimo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Empréstimo não encontrado",
+        )
 
     for campo, valor in update_data.items():
         setattr(emprestimo, campo, valor)
@@ -149,10 +239,17 @@ def atualizar_emprestimo(emprestimo_id: str, emprestimo_data: EmprestimoUpdate,
     return emprestimo
 
 
-@router.delete("/{emprestimo_id}", status_code=status.HTTP_204_NO_CONTENT)
-def deletar_emprestimo(emprestimo_id: str, db: Session = Depends(get_db)):
-    """Deleta empréstimo"""
-    
+@router.put("/{emprestimo_id}", response_model=EmprestimoResponse)
+async def atualizar_emprestimo(
+    emprestimo_id: str,
+    emprestimo_data: EmprestimoUpdate,
+    db: SessaoAssincrona = Depends(get_async_db),
+):
+    """Atualiza dados do empréstimo"""
+    return await db.run_sync(_atualizar_emprestimo, emprestimo_id, emprestimo_data)
+
+
+def _deletar_emprestimo(db: Session, emprestimo_id: str):
     emprestimo = db.query(Emprestimo).filter(Emprestimo.id == emprestimo_id).first()
     
     if not emprestimo:
@@ -163,5 +260,10 @@ def deletar_emprestimo(emprestimo_id: str, db: Session = Depends(get_db)):
     
     db.delete(emprestimo)
     db.commit()
-    
+
+
+@router.delete("/{emprestimo_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def deletar_emprestimo(emprestimo_id: str, db: SessaoAssincrona = Depends(get_async_db)):
+    """Deleta empréstimo"""
+    await db.run_sync(_deletar_emprestimo, emprestimo_id)
     return None
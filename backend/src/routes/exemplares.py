@@ -1,25 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from sqlalchemy.orm.exc import StaleDataError
+from typing import Optional
+from condicional import responder_registro
+from database import SessaoAssincrona, get_async_db, get_async_db_leitura
+from identificadores import gerar_id
 from models.exemplar import Exemplar
 from models.obra import Obra
 from schemas.exemplar import ExemplarCreate, ExemplarUpdate, ExemplarResponse
-import uuid
+from schemas.lote import IdsLote, ResultadoLote
+from schemas.paginacao import Pagina
+from schemas.sincronizacao import Alteracoes
+from services.circulacao_service import ajustar_disponiveis, ajustar_exemplares
+from services.lote_service import buscar_em_lote
+from services.paginacao_service import LIMITE_MAXIMO, LIMITE_PADRAO, paginar
+from services.sincronizacao_service import listar_alteracoes
 
 router = APIRouter(prefix="/exemplares", tags=["Exemplares"])
 
 
-@router.get("/", response_model=List[ExemplarResponse])
-def listar_exemplares(db: Session = Depends(get_db)):
-    """Lista todos os exemplares"""
-    exemplares = db.query(Exemplar).all()
-    return exemplares
+def _listar_exemplares(db: Session, cursor: Optional[str], limit: int):
+    return paginar(db.query(Exemplar), Exemplar, cursor, limit)
 
 
-@router.get("/{exemplar_id}", response_model=ExemplarResponse)
-def buscar_exemplar(exemplar_id: str, db: Session = Depends(get_db)):
-    """Busca exemplar por ID"""
+@router.get("/", response_model=Pagina[ExemplarResponse])
+async def listar_exemplares(
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: SessaoAssincrona = Depends(get_async_db),
+):
+    """Lista exemplares paginados por cursor"""
+    return await db.run_sync(_listar_exemplares, cursor, limit)
+
+
+@router.get("/changes", response_model=Alteracoes[ExemplarResponse])
+async def listar_alteracoes_exemplares(
+    since: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: SessaoAssincrona = Depends(get_async_db),
+):
+    """Exemplares alterados e removidos desde o token de sincronização"""
+    return await db.run_sync(listar_alteracoes, Exemplar, since, limit)
+
+
+def _buscar_exemplar(db: Session, exemplar_id: str):
     exemplar = db.query(Exemplar).filter(Exemplar.id == exemplar_id).first()
     
     if not exemplar:
@@ -31,12 +55,15 @@ def buscar_exemplar(exemplar_id: str, db: Session = Depends(get_db)):
     return exemplar
 
 
-@router.post("/", response_model=ExemplarResponse, status_code=status.HTTP_201_CREATED)
-def criar_exemplar(exemplar_data: ExemplarCreate, db: Session = Depends(get_db)):
-    """Cria novo exemplar"""
-    
+@router.get("/{exemplar_id}", response_model=ExemplarResponse)
+async def buscar_exemplar(exemplar_id: str, request: Request, db: SessaoAssincrona = Depends(get_async_db)):
+    """Busca exemplar por ID"""
+    return responder_registro(request, await db.run_sync(_buscar_exemplar, exemplar_id), ExemplarResponse)
+
+
+def _criar_exemplar(db: Session, exemplar_data: ExemplarCreate):
     # Verificar se obra existe
-    obra = db.query(Obra).filter(Obra.id == exemplar_data.obraId).first()
+    obra = db.query(Obra.id).filter(Obra.id == exemplar_data.obraId).first()
     if not obra:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -56,7 +83,7 @@ def criar_exemplar(exemplar_data: ExemplarCreate, db: Session = Depends(get_db))
     
     # Criar exemplar
     novo_exemplar = Exemplar(
-        id=str(uuid.uuid4()),
+        id=gerar_id(),
         obraId=exemplar_data.obraId,
         codigo=exemplar_data.codigo,
         status=exemplar_data.status,
@@ -65,10 +92,9 @@ def criar_exemplar(exemplar_data: ExemplarCreate, db: Session = Depends(get_db))
     
     db.add(novo_exemplar)
     
-    # Atualizar total de exemplares da obra
-    obra.totalExemplares += 1
-    if exemplar_data.status == "disponivel":
-        obra.exemplaresDisponiveis += 1
+    # Atualizar total de exemplares da obra (no banco, sem ler os contadores)
+    disponivel = exemplar_data.status == "disponivel"
+    ajustar_exemplares(db, exemplar_data.obraId, +1, +1 if disponivel else 0)
     
     db.commit()
     db.refresh(novo_exemplar)
@@ -76,10 +102,19 @@ def criar_exemplar(exemplar_data: ExemplarCreate, db: Session = Depends(get_db))
     return novo_exemplar
 
 
-@router.put("/{exemplar_id}", response_model=ExemplarResponse)
-def atualizar_exemplar(exemplar_id: str, exemplar_data: ExemplarUpdate, db: Session = Depends(get_db)):
-    """Atualiza dados do exemplar"""
-    
+@router.post("/", response_model=ExemplarResponse, status_code=status.HTTP_201_CREATED)
+async def criar_exemplar(exemplar_data: ExemplarCreate, db: SessaoAssincrona = Depends(get_async_db)):
+    """Cria novo exemplar"""
+    return await db.run_sync(_criar_exemplar, exemplar_data)
+
+
+@router.post("/batch", response_model=ResultadoLote[ExemplarResponse])
+async def buscar_exemplares_lote(dados: IdsLote, db: SessaoAssincrona = Depends(get_async_db_leitura)):
+    """Busca vários exemplares por ID numa consulta, na ordem pedida"""
+    return await db.run_sync(buscar_em_lote, Exemplar, dados.ids)
+
+
+def _atualizar_exemplar(db: Session, exemplar_id: str, exemplar_data: ExemplarUpdate):
     exemplar = db.query(Exemplar).filter(Exemplar.id == exemplar_id).first()
     
     if not exemplar:
@@ -91,29 +126,41 @@ def atualizar_exemplar(exemplar_id: str, exemplar_data: ExemplarUpdate, db: Sess
     # Atualizar apenas campos fornecidos
     update_data = exemplar_data.model_dump(exclude_unset=True)
     
-    # Se status mudou, atualizar disponibilidade da obra
+    # Se status mudou, atualizar disponibilidade da obra (incremento no banco)
     if "status" in update_data:
-        obra = db.query(Obra).filter(Obra.id == exemplar.obraId).first()
-        
-        # Status antigo -> novo
         if exemplar.status.value == "disponivel" and update_data["status"] != "disponivel":
-            obra.exemplaresDisponiveis -= 1
+            ajustar_disponiveis(db, exemplar.obraId, -1)
         elif exemplar.status.value != "disponivel" and update_data["status"] == "disponivel":
-            obra.exemplaresDisponiveis += 1
+            ajustar_disponiveis(db, exemplar.obraId, +1)
     
     for campo, valor in update_data.items():
         setattr(exemplar, campo, valor)
     
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError:
+        # Outra transação alterou o exemplar (versão diferente da lida)
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Exemplar foi alterado por outra operação; tente novamente"
+        )
     db.refresh(exemplar)
     
     return exemplar
 
 
-@router.delete("/{exemplar_id}", status_code=status.HTTP_204_NO_CONTENT)
-def deletar_exemplar(exemplar_id: str, db: Session = Depends(get_db)):
-    """Deleta exemplar"""
-    
+@router.put("/{exemplar_id}", response_model=ExemplarResponse)
+async def atualizar_exemplar(
+    exemplar_id: str,
+    exemplar_data: ExemplarUpdate,
+    db: SessaoAssincrona = Depends(get_async_db),
+):
+    """Atualiza dados do exemplar"""
+    return await db.run_sync(_atualizar_exemplar, exemplar_id, exemplar_data)
+
+
+def _deletar_exemplar(db: Session, exemplar_id: str):
     exemplar = db.query(Exemplar).filter(Exemplar.id == exemplar_id).first()
     
     if not exemplar:
@@ -122,13 +169,16 @@ def deletar_exemplar(exemplar_id: str, db: Session = Depends(get_db)):
             detail="Exemplar não encontrado"
         )
     
-    # Atualizar total de exemplares da obra
-    obra = db.query(Obra).filter(Obra.id == exemplar.obraId).first()
-    obra.totalExemplares -= 1
-    if exemplar.status.value == "disponivel":
-        obra.exemplaresDisponiveis -= 1
+    # Atualizar total de exemplares da obra (no banco, sem ler os contadores)
+    disponivel = exemplar.status.value == "disponivel"
+    ajustar_exemplares(db, exemplar.obraId, -1, -1 if disponivel else 0)
     
     db.delete(exemplar)
     db.commit()
-    
+
+
+@router.delete("/{exemplar_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def deletar_exemplar(exemplar_id: str, db: SessaoAssincrona = Depends(get_async_db)):
+    """Deleta exemplar"""
+    await db.run_sync(_deletar_exemplar, exemplar_id)
     return None
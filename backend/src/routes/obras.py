@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import Optional
+from cache import catalogo, chave_requisicao, etiquetas_lista, etiquetas_registro, guardar_resposta, resposta_em_cache
+from condicional import calcular_validadores_colecao, nao_modificado, resposta_nao_modificada, validadores_colecao, validadores_registro
+from database import SessaoAssincrona, get_async_db, get_async_db_leitura
+from disponibilidade import difusor
+from identificadores import gerar_id
 from models.obra import Obra
 from models.categoria import Categoria
+from schemas.lote import IdsLote, ResultadoLote
 from schemas.obra import ObraCreate, ObraUpdate, ObraResponse
-import uuid
+from schemas.paginacao import Pagina
+from schemas.sincronizacao import Alteracoes
+from services.busca_service import buscar_obras
+from services.lote_service import buscar_em_lote
+from services.paginacao_service import LIMITE_MAXIMO, LIMITE_PADRAO, paginar
+from services.sincronizacao_service import listar_alteracoes
 import os
 import shutil
 from datetime import datetime
@@ -16,17 +28,119 @@ UPLOAD_DIR = os.path.join("static", "uploads", "capas")
 MAX_FILE_SIZE = 5 * 1024 * 1024
 ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp"}
 
+ORDENACOES = {
+    "titulo": Obra.titulo,
+    "autor": Obra.autor,
+    "criadoEm": Obra.criadoEm,
+    "exemplaresDisponiveis": Obra.exemplaresDisponiveis,
+}
 
-@router.get("/", response_model=List[ObraResponse])
-def listar_obras(db: Session = Depends(get_db)):
-    """retorna todas as obras cadastradas"""
-    obras = db.query(Obra).all()
-    return obras
 
+def _filtrar_obras(
+    db: Session,
+    categoriaId: Optional[str],
+    autor: Optional[str],
+    anoPublicacaoMin: Optional[int],
+    anoPublicacaoMax: Optional[int],
+    disponivel: Optional[bool],
+):
+    query = db.query(Obra)
 
-@router.get("/{obra_id}", response_model=ObraResponse)
-def buscar_obra(obra_id: str, db: Session = Depends(get_db)):
-    """busca obra específica por id"""
+    if categoriaId is not None:
+        query = query.filter(Obra.categoriaId == categoriaId)
+    if autor is not None:
+        query = query.filter(Obra.autor == autor)
+    if anoPublicacaoMin is not None:
+        query = query.filter(Obra.anoPublicacao >= anoPublicacaoMin)
+    if anoPublicacaoMax is not None:
+        query = query.filter(Obra.anoPublicacao <= anoPublicacaoMax)
+    if disponivel is True:
+        query = query.filter(Obra.exemplaresDisponiveis > 0)
+    elif disponivel is False:
+        query = query.filter(Obra.exemplaresDisponiveis == 0)
+
+    return query
+
+
+def _validadores_obras(db: Session, chave: str, **filtros):
+    return validadores_colecao(_filtrar_obras(db, **filtros), Obra, chave)
+
+
+def _listar_obras(db: Session, ordenar: str, cursor: Optional[str], limit: int, **filtros):
+    return paginar(_filtrar_obras(db, **filtros), Obra, cursor, limit, ordenar, ORDENACOES)
+
+
+@router.get("/", response_model=Pagina[ObraResponse])
+async def listar_obras(
+    request: Request,
+    categoriaId: Optional[str] = None,
+    autor: Optional[str] = None,
+    anoPublicacaoMin: Optional[int] = Query(None, ge=1000, le=9999),
+    anoPublicacaoMax: Optional[int] = Query(None, ge=1000, le=9999),
+    disponivel: Optional[bool] = None,
+    ordenar: str = "criadoEm",
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: SessaoAssincrona = Depends(get_async_db),
+):
+    """retorna uma página de obras, com filtros e ordenação aplicados no banco"""
+    chave = chave_requisicao(request)
+    if (entrada := catalogo.obter_entrada(chave)) is not None:
+        return resposta_em_cache(request, entrada)
+    geracao = catalogo.geracao
+    filtros = {
+        "categoriaId": categoriaId,
+        "autor": autor,
+        "anoPublicacaoMin": anoPublicacaoMin,
+        "anoPublicacaoMax": anoPublicacaoMax,
+        "disponivel": disponivel,
+    }
+    # validadores antes das linhas: se algo mudar no meio, o ETag fica
+    # mais velho que o conteúdo e a próxima revalidação apenas o renova
+    cabecalhos = None
+    if calcular_validadores_colecao(request, cursor):
+        cabecalhos = await db.run_sync(_validadores_obras, chave, **filtros)
+        if nao_modificado(request, cabecalhos):
+            return resposta_nao_modificada(cabecalhos)
+    pagina = await db.run_sync(_listar_obras, ordenar=ordenar, cursor=cursor, limit=limit, **filtros)
+    return guardar_resposta(
+        catalogo, chave, Pagina[ObraResponse].model_validate(pagina), etiquetas_lista("obras"), geracao, cabecalhos
+    )
+
+
+@router.get("/busca", response_model=Pagina[ObraResponse])
+async def buscar_obras_texto(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: SessaoAssincrona = Depends(get_async_db),
+):
+    """busca obras por título, autor ou descrição, ordenadas por relevância"""
+    return await db.run_sync(buscar_obras, q, cursor, limit)
+
+
+@router.get("/disponibilidade/stream")
+async def transmitir_disponibilidade():
+    """stream (SSE) de {obraId, exemplaresDisponiveis, totalExemplares} a cada mudança"""
+    return StreamingResponse(
+        difusor.transmitir(),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: o nginx repassa cada evento sem acumular
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/changes", response_model=Alteracoes[ObraResponse])
+async def listar_alteracoes_obras(
+    since: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: SessaoAssincrona = Depends(get_async_db),
+):
+    """obras alteradas e removidas desde o token de sincronização"""
+    return await db.run_sync(listar_alteracoes, Obra, since, limit)
+
+
+def _buscar_obra(db: Session, obra_id: str):
     obra = db.query(Obra).filter(Obra.id == obra_id).first()
     
     if not obra:
@@ -38,9 +152,23 @@ def buscar_obra(obra_id: str, db: Session = Depends(get_db)):
     return obra
 
 
-@router.post("/", response_model=ObraResponse, status_code=status.HTTP_201_CREATED)
-def criar_obra(obra_data: ObraCreate, db: Session = Depends(get_db)):
-    """cria obra e gera seus exemplares físicos automaticamente"""
+@router.get("/{obra_id}", response_model=ObraResponse)
+async def buscar_obra(obra_id: str, request: Request, db: SessaoAssincrona = Depends(get_async_db)):
+    """busca obra específica por id"""
+    chave = chave_requisicao(request)
+    if (entrada := catalogo.obter_entrada(chave)) is not None:
+        return resposta_em_cache(request, entrada)
+    geracao = catalogo.geracao
+    obra = await db.run_sync(_buscar_obra, obra_id)
+    cabecalhos = validadores_registro(obra)
+    if nao_modificado(request, cabecalhos):
+        return resposta_nao_modificada(cabecalhos)
+    return guardar_resposta(
+        catalogo, chave, ObraResponse.model_validate(obra), etiquetas_registro("obras", obra_id), geracao, cabecalhos
+    )
+
+
+def _criar_obra(db: Session, obra_data: ObraCreate):
     from models.exemplar import Exemplar, StatusExemplar
     
     categoria = db.query(Categoria).filter(Categoria.id == obra_data.categoriaId).first()
@@ -57,7 +185,7 @@ def criar_obra(obra_data: ObraCreate, db: Session = Depends(get_db)):
             detail="ISBN já cadastrado"
         )
     
-    obra_id = str(uuid.uuid4())
+    obra_id = gerar_id()
     nova_obra = Obra(
         id=obra_id,
         titulo=obra_data.titulo,
@@ -76,10 +204,11 @@ def criar_obra(obra_data: ObraCreate, db: Session = Depends(get_db)):
     db.flush()
     
     for i in range(1, obra_data.totalExemplares + 1):
-        codigo_exemplar = f"{obra_id[:8]}-{str(i).zfill(3)}"
+        # final do id: no UUIDv7 o início é o instante e se repete entre obras
+        codigo_exemplar = f"{obra_id[-8:]}-{str(i).zfill(3)}"
         
         exemplar = Exemplar(
-            id=str(uuid.uuid4()),
+            id=gerar_id(),
             obraId=obra_id,
             codigo=codigo_exemplar,
             status=StatusExemplar.disponivel,
@@ -93,10 +222,19 @@ def criar_obra(obra_data: ObraCreate, db: Session = Depends(get_db)):
     return nova_obra
 
 
-@router.put("/{obra_id}", response_model=ObraResponse)
-def atualizar_obra(obra_id: str, obra_data: ObraUpdate, db: Session = Depends(get_db)):
-    """atualiza campos de uma obra existente"""
-    
+@router.post("/", response_model=ObraResponse, status_code=status.HTTP_201_CREATED)
+async def criar_obra(obra_data: ObraCreate, db: SessaoAssincrona = Depends(get_async_db)):
+    """cria obra e gera seus exemplares físicos automaticamente"""
+    return await db.run_sync(_criar_obra, obra_data)
+
+
+@router.post("/batch", response_model=ResultadoLote[ObraResponse])
+async def buscar_obras_lote(dados: IdsLote, db: SessaoAssincrona = Depends(get_async_db_leitura)):
+    """busca várias obras por id numa consulta, na ordem pedida"""
+    return await db.run_sync(buscar_em_lote, Obra, dados.ids)
+
+
+def _atualizar_obra(db: Session, obra_id: str, obra_data: ObraUpdate):
     obra = db.query(Obra).filter(Obra.id == obra_id).first()
     
     if not obra:
@@ -116,34 +254,48 @@ def atualizar_obra(obra_id: str, obra_data: ObraUpdate, db: Session = Depends(ge
     return obra
 
 
-@router.delete("/{obra_id}", status_code=status.HTTP_204_NO_CONTENT)
-def deletar_obra(obra_id: str, db: Session = Depends(get_db)):
-    """remove obra do sistema"""
-    
-    obra = db.query(Obra).filter(Obra.id == obra_id).first()
+@router.put("/{obra_id}", response_model=ObraResponse)
+async def atualizar_obra(obra_id: str, obra_data: ObraUpdate, db: SessaoAssincrona = Depends(get_async_db)):
+    """atualiza campos de uma obra existente"""
+    return await db.run_sync(_atualizar_obra, obra_id, obra_data)
+
+
+def _deletar_obra(db: Session, obra_id: str):
+    # DELETE direto: exemplares, empréstimos e reservas saem pelo ON DELETE
+    # CASCADE do banco, sem passar pela sessão (obras antigas têm milhares)
+    # RETURNING: a invalidação do cache fica restrita a esta obra
+    excluida = db.execute(delete(Obra).where(Obra.id == obra_id).returning(Obra.id)).first()
     
-    if not obra:
+    if excluida is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Obra não encontrada"
         )
     
-    db.delete(obra)
     db.commit()
-    
+
+
+@router.delete("/{obra_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def deletar_obra(obra_id: str, db: SessaoAssincrona = Depends(get_async_db)):
+    """remove obra do sistema"""
+    await db.run_sync(_deletar_obra, obra_id)
     return None
 
 
+def _definir_capa(db: Session, obra_id: str, caminho: str):
+    obra = _buscar_obra(db, obra_id)
+    obra.capa = caminho
+    db.commit()
+    db.refresh(obra)
+    return obra
+
+
 @router.post("/{obra_id}/upload-capa")
-async def upload_capa(obra_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_capa(obra_id: str, file: UploadFile = File(...), db: SessaoAssincrona = Depends(get_async_db)):
     """recebe arquivo de imagem e define como capa da obra"""
     
-    obra = db.query(Obra).filter(Obra.id == obra_id).first()
-    if not obra:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Obra não encontrada"
-        )
+    await db.run_sync(_buscar_obra, obra_id)
     
     file_extension = file.filename.split(".")[-1].lower()
     if file_extension not in ALLOWED_EXTENSIONS:
@@ -167,9 +319,7 @@ async def upload_capa(obra_id: str, file: UploadFile = File(...), db: Session =
             detail=f"Erro ao salvar arquivo: {str(e)}"
         )
     
-    obra.capa = f"/static/uploads/capas/{filename}"
-    db.commit()
-    db.refresh(obra)
+    obra = await db.run_sync(_definir_capa, obra_id, f"/static/uploads/capas/{filename}")
     
     return {
         "message": "Capa enviada com sucesso",
@@ -1,25 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
+from condicional import responder_registro
 from database import get_db
+from identificadores import gerar_id
 from models.reserva import Reserva
 from models.usuario import Usuario
 from models.obra import Obra
 from schemas.reserva import ReservaCreate, ReservaUpdate, ReservaResponse
-import uuid
+from schemas.paginacao import Pagina
+from schemas.sincronizacao import Alteracoes
+from services.paginacao_service import LIMITE_MAXIMO, LIMITE_PADRAO, paginar
+from services.sincronizacao_service import listar_alteracoes
 
 router = APIRouter(prefix="/reservas", tags=["Reservas"])
 
 
-@router.get("/", response_model=List[ReservaResponse])
-def listar_reservas(db: Session = Depends(get_db)):
-    """Lista todas as reservas"""
-    reservas = db.query(Reserva).all()
-    return reservas
+@router.get("/", response_model=Pagina[ReservaResponse])
+def listar_reservas(
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: Session = Depends(get_db),
+):
+    """Lista reservas paginadas por cursor"""
+    return paginar(db.query(Reserva), Reserva, cursor, limit)
+
+
+@router.get("/changes", response_model=Alteracoes[ReservaResponse])
+def listar_alteracoes_reservas(
+    since: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: Session = Depends(get_db),
+):
+    """Reservas alteradas e removidas desde o token de sincronização"""
+    return listar_alteracoes(db, Reserva, since, limit)
 
 
 @router.get("/{reserva_id}", response_model=ReservaResponse)
-def buscar_reserva(reserva_id: str, db: Session = Depends(get_db)):
+def buscar_reserva(reserva_id: str, request: Request, db: Session = Depends(get_db)):
     """Busca reserva por ID"""
     reserva = db.query(Reserva).filter(Reserva.id == reserva_id).first()
     
@@ -29,7 +47,7 @@ def buscar_reserva(reserva_id: str, db: Session = Depends(get_db)):
             detail="Reserva não encontrada"
         )
     
-    return reserva
+    return responder_registro(request, reserva, ReservaResponse)
 
 
 @router.post("/", response_model=ReservaResponse, status_code=status.HTTP_201_CREATED)
@@ -37,7 +55,7 @@ def criar_reserva(reserva_data: ReservaCreate, db: Session = Depends(get_db)):
     """Cria nova reserva - VERSÃO SIMPLIFICADA"""
     
     nova_reserva = Reserva(
-        id=str(uuid.uuid4()),
+        id=gerar_id(),
         usuarioId=reserva_data.usuarioId,
         obraId=reserva_data.obraId,
         dataReserva=reserva_data.dataReserva,
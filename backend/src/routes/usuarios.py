@@ -1,13 +1,18 @@
-import uuid
-from typing import List
+from typing import Optional
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 
-from database import get_db
+from condicional import responder_registro
+from database import get_db, get_db_leitura
+from identificadores import gerar_id
 from models.usuario import Usuario
+from schemas.lote import IdsLote, ResultadoLote
 from schemas.usuario import UsuarioCreate, UsuarioResponse, UsuarioUpdate
+from schemas.paginacao import Pagina
+from services.lote_service import buscar_em_lote
+from services.paginacao_service import LIMITE_MAXIMO, LIMITE_PADRAO, paginar
 from services.senha_service import hash_senha
 from services.usuario_service import UsuarioService
 
@@ -28,14 +33,18 @@ def _ensure_unique(db: Session, field, value: str, message: str):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
 
 
-@router.get("/", response_model=List[UsuarioResponse])
-def listar_usuarios(db: Session = Depends(get_db)):
-    return db.query(Usuario).all()
+@router.get("/", response_model=Pagina[UsuarioResponse])
+def listar_usuarios(
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    db: Session = Depends(get_db),
+):
+    return paginar(db.query(Usuario), Usuario, cursor, limit)
 
 
 @router.get("/{usuario_id}", response_model=UsuarioResponse)
-def buscar_usuario(usuario_id: str, db: Session = Depends(get_db)):
-    return _get_usuario_or_404(db, usuario_id)
+def buscar_usuario(usuario_id: str, request: Request, db: Session = Depends(get_db)):
+    return responder_registro(request, _get_usuario_or_404(db, usuario_id), UsuarioResponse)
 
 
 @router.post("/", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
@@ -44,7 +53,7 @@ def criar_usuario(usuario_data: UsuarioCreate, db: Session = Depends(get_db)):
     _ensure_unique(db, Usuario.email, usuario_data.email, "Email já cadastrado")
 
     novo_usuario = Usuario(
-        id=str(uuid.uuid4()),
+        id=gerar_id(),
         nome=usuario_data.nome,
         cpf=usuario_data.cpf,
         email=usuario_data.email,
@@ -62,6 +71,11 @@ def criar_usuario(usuario_data: UsuarioCreate, db: Session = Depends(get_db)):
     return novo_usuario
 
 
+@router.post("/batch", response_model=ResultadoLote[UsuarioResponse])
+def buscar_usuarios_lote(dados: IdsLote, db: Session = Depends(get_db_leitura)):
+    return buscar_em_lote(db, Usuario, dados.ids)
+
+
 @router.put("/{usuario_id}", response_model=UsuarioResponse)
 def atualizar_usuario(usuario_id: str, usuario_data: UsuarioUpdate, db: Session = Depends(get_db)):
     usuario = _get_usuario_or_404(db, usuario_id)
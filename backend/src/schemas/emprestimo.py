@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict, Field
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
 
 
 class EmprestimoBase(BaseModel):
@@ -9,9 +9,9 @@ class EmprestimoBase(BaseModel):
     usuarioId: str
     exemplarId: str
     obraId: str
-    dataEmprestimo: str = Field(..., pattern=r'^\d{4}-\d{2}-\d{2}$')
-    dataPrevistaDevolucao: str = Field(..., pattern=r'^\d{4}-\d{2}-\d{2}$')
-    dataDevolucao: Optional[str] = Field(None, pattern=r'^\d{4}-\d{2}-\d{2}$')
+    dataEmprestimo: date  # YYYY-MM-DD
+    dataPrevistaDevolucao: date
+    dataDevolucao: Optional[date] = None
     status: str = Field(default="ativo", pattern=r'^(ativo|devolvido|atrasado)$')
     renovacoes: int = Field(default=0, ge=0)
 
@@ -23,8 +23,8 @@ class EmprestimoCreate(EmprestimoBase):
 class EmprestimoUpdate(BaseModel):
     model_config = ConfigDict(populate_by_name=True, from_attributes=True)
     
-    dataPrevistaDevolucao: Optional[str] = Field(None, pattern=r'^\d{4}-\d{2}-\d{2}$')
-    dataDevolucao: Optional[str] = Field(None, pattern=r'^\d{4}-\d{2}-\d{2}$')
+    dataPrevistaDevolucao: Optional[date] = None
+    dataDevolucao: Optional[date] = None
     status: Optional[str] = Field(None, pattern=r'^(ativo|devolvido|atrasado)$')
     renovacoes: Optional[int] = Field(None, ge=0)
 
@@ -33,3 +33,30 @@ class EmprestimoResponse(EmprestimoBase):
     id: str
     criadoEm: datetime
     atualizadoEm: datetime
+
+
+class EmprestimoLoteCreate(BaseModel):
+    """Empréstimo de vários exemplares (pelos códigos lidos no balcão) para um usuário."""
+    usuarioId: str
+    codigos: List[str] = Field(..., min_length=1, max_length=50)
+    dataEmprestimo: date
+    dataPrevistaDevolucao: date
+
+
+class DevolucaoLoteCreate(BaseModel):
+    """Devolução de vários exemplares pelos códigos."""
+    codigos: List[str] = Field(..., min_length=1, max_length=50)
+    dataDevolucao: date
+
+
+class ItemLoteResponse(BaseModel):
+    codigo: str
+    sucesso: bool
+    emprestimo: Optional[EmprestimoResponse] = None
+    erro: Optional[str] = None
+
+
+class LoteResponse(BaseModel):
+    itens: List[ItemLoteResponse]
+    processados: int
+    falhas: int
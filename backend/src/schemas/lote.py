@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import Generic, List, TypeVar
+
+T = TypeVar("T")
+
+
+class IdsLote(BaseModel):
+    """Ids a buscar numa única requisição."""
+    ids: List[str] = Field(..., min_length=1, max_length=200)
+
+
+class ResultadoLote(BaseModel, Generic[T]):
+    """Registros na ordem dos ids pedidos e os ids sem registro."""
+    items: List[T]
+    ausentes: List[str]
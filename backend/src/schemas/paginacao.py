@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Pagina(BaseModel, Generic[T]):
+    """Página de resultados com cursor opaco para a próxima página."""
+    items: List[T]
+    next_cursor: Optional[str] = None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 
 
 class ReservaBase(BaseModel):
@@ -8,8 +8,8 @@ class ReservaBase(BaseModel):
     
     usuarioId: str
     obraId: str
-    dataReserva: str
-    dataExpiracao: str
+    dataReserva: date  # YYYY-MM-DD
+    dataExpiracao: date
 
 
 class ReservaCreate(ReservaBase):
@@ -20,7 +20,7 @@ class ReservaUpdate(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
     
     status: Optional[str] = None
-    dataExpiracao: Optional[str] = None
+    dataExpiracao: Optional[date] = None
 
 
 class ReservaResponse(ReservaBase):
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Generic, List, TypeVar
+
+T = TypeVar("T")
+
+
+class Alteracoes(BaseModel, Generic[T]):
+    """Linhas alteradas e ids removidos desde um token de sincronização."""
+    items: List[T]
+    removidos: List[str]
+    sync_token: str
+    tem_mais: bool
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 
 
 class UsuarioBase(BaseModel):
@@ -17,7 +17,7 @@ class UsuarioBase(BaseModel):
 
 class UsuarioCreate(UsuarioBase):
     senha: str = Field(..., min_length=6, max_length=100)
-    dataCadastro: str = Field(..., pattern=r'^\d{4}-\d{2}-\d{2}$')
+    dataCadastro: date  # YYYY-MM-DD
     
     @field_validator('cpf')
     @classmethod
@@ -45,7 +45,7 @@ class UsuarioResponse(UsuarioBase):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
     
     id: str
-    dataCadastro: str
+    dataCadastro: date
     criadoEm: datetime
     atualizadoEm: datetime
 
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from models.emprestimo import Emprestimo, StatusEmprestimo
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_VARREDURA = int(os.getenv("VARREDURA_ATRASOS_INTERVALO", "300"))
+
+ultima_varredura = {
+    "executadaEm": None,
+    "atualizados": 0,
+    "totalAtualizados": 0,
+}
+
+
+def marcar_emprestimos_atrasados(db: Session, hoje: date | None = None) -> int:
+    """
+    Marca como atrasados os empréstimos ativos já vencidos.
+
+    Usa um único UPDATE filtrado por status e data prevista (coberto pelo
+    índice ix_emprestimos_status_prevista_devolucao), sem carregar linhas.
+
+    Returns:
+        Quantidade de empréstimos atualizados
+    """
+    hoje = hoje or date.today()
+    resultado = db.execute(
+        update(Emprestimo)
+        .where(
+            Emprestimo.status == StatusEmprestimo.ativo,
+            Emprestimo.dataPrevistaDevolucao < hoje,
+            Emprestimo.dataDevolucao.is_(None),
+        )
+        .values(status=StatusEmprestimo.atrasado)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return resultado.rowcount
+
+
+def executar_varredura() -> int:
+    """Executa uma varredura em sessão própria e registra o resultado."""
+    db = SessionLocal()
+    try:
+        atualizados = marcar_emprestimos_atrasados(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    ultima_varredura["executadaEm"] = datetime.utcnow()
+    ultima_varredura["atualizados"] = atualizados
+    ultima_varredura["totalAtualizados"] += atualizados
+
+    if atualizados:
+        logger.info(f"Varredura de atrasos: {atualizados} empréstimos marcados como atrasados")
+    return atualizados
+
+
+async def _loop_varredura(intervalo: int) -> None:
+    while True:
+        try:
+            await run_in_threadpool(executar_varredura)
+        except Exception as e:
+            logger.error(f"Erro na varredura de atrasos: {str(e)}")
+        await asyncio.sleep(intervalo)
+
+
+def iniciar_varredura_atrasos(intervalo: int = INTERVALO_VARREDURA) -> asyncio.Task | None:
+    """Agenda a varredura periódica no loop atual (intervalo <= 0 desativa)."""
+    if intervalo <= 0:
+        logger.info("Varredura de atrasos desativada")
+        return None
+    return asyncio.create_task(_loop_varredura(intervalo))
@@ -0,0 +1,186 @@
+import logging
+import re
+
+from fastapi import HTTPException, status
+from sqlalchemy import inspect, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.obra import Obra
+from services.paginacao_service import codificar_cursor, decodificar_cursor
+
+logger = logging.getLogger(__name__)
+
+# Índice externo (content='obras'): o FTS guarda só os tokens e a chave da obra.
+# A chave é obras.busca_id, um inteiro próprio: o rowid implícito de obras (cuja
+# chave primária é texto) pode ser renumerado por VACUUM ou por dump/restore, o
+# que desalinharia em silêncio o índice das linhas.
+# remove_diacritics 2 faz "memorias" casar com "Memórias".
+DDL_INDICE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS obras_fts USING fts5(
+    titulo, autor, descricao,
+    content='obras',
+    content_rowid='busca_id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+DDL_CHAVE = "CREATE UNIQUE INDEX IF NOT EXISTS ix_obras_busca_id ON obras (busca_id)"
+
+GATILHOS = ("obras_fts_ai", "obras_fts_ad", "obras_fts_au")
+
+DDL_GATILHOS = [
+    # a chave é atribuída aqui, pelo índice único: max + 1 custa uma busca
+    """
+    CREATE TRIGGER IF NOT EXISTS obras_fts_ai AFTER INSERT ON obras BEGIN
+        UPDATE obras SET busca_id = (SELECT coalesce(max(busca_id), 0) + 1 FROM obras)
+        WHERE rowid = new.rowid;
+        INSERT INTO obras_fts(rowid, titulo, autor, descricao)
+        SELECT busca_id, titulo, autor, descricao FROM obras WHERE rowid = new.rowid;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS obras_fts_ad AFTER DELETE ON obras BEGIN
+        INSERT INTO obras_fts(obras_fts, rowid, titulo, autor, descricao)
+        VALUES ('delete', old.busca_id, old.titulo, old.autor, old.descricao);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS obras_fts_au AFTER UPDATE OF titulo, autor, descricao ON obras BEGIN
+        INSERT INTO obras_fts(obras_fts, rowid, titulo, autor, descricao)
+        VALUES ('delete', old.busca_id, old.titulo, old.autor, old.descricao);
+        INSERT INTO obras_fts(rowid, titulo, autor, descricao)
+        VALUES (new.busca_id, new.titulo, new.autor, new.descricao);
+    END
+    """,
+]
+
+# Pesos do BM25 por coluna: titulo, autor, descricao
+CONSULTA_FTS = """
+SELECT obras.* FROM obras_fts
+JOIN obras ON obras.busca_id = obras_fts.rowid
+WHERE obras_fts MATCH :termos
+ORDER BY bm25(obras_fts, 10.0, 5.0, 1.0), obras.busca_id
+LIMIT :limite OFFSET :deslocamento
+"""
+
+ORDENACAO_BUSCA = "relevancia"
+
+
+def _migrar_chave(conn) -> bool:
+    """
+    Acrescenta obras.busca_id a bancos criados com o índice pelo rowid.
+
+    O índice e os gatilhos antigos são descartados para serem recriados
+    sobre a nova chave. Returns: True se a migração foi aplicada.
+    """
+    colunas = {coluna["name"] for coluna in inspect(conn).get_columns("obras")}
+    if "busca_id" in colunas:
+        return False
+    conn.exec_driver_sql("ALTER TABLE obras ADD COLUMN busca_id INTEGER")
+    conn.exec_driver_sql("UPDATE obras SET busca_id = rowid")
+    for gatilho in GATILHOS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {gatilho}")
+    conn.exec_driver_sql("DROP TABLE IF EXISTS obras_fts")
+    logger.info("Busca: coluna obras.busca_id criada como chave do índice")
+    return True
+
+
+def instalar_busca(engine: Engine) -> None:
+    """
+    Cria o índice FTS5 de obras e os gatilhos de sincronização (apenas SQLite).
+
+    Se o índice ainda não existia, é populado em uma única passada.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        migrado = _migrar_chave(conn)
+        ja_existia = not migrado and inspect(conn).has_table("obras_fts")
+        conn.exec_driver_sql(DDL_CHAVE)
+        conn.exec_driver_sql(DDL_INDICE)
+        for ddl in DDL_GATILHOS:
+            conn.exec_driver_sql(ddl)
+
+    if not ja_existia:
+        reconstruir_indice_busca(engine)
+
+
+def reconstruir_indice_busca(engine: Engine) -> None:
+    """
+    Reconstrói o índice de busca a partir da tabela obras.
+
+    Necessário só se obras for alterada com os gatilhos ausentes (ex.: carga
+    direta pelo shell do sqlite3 num banco sem o índice instalado).
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO obras_fts(obras_fts) VALUES ('rebuild')")
+    logger.info("Índice de busca de obras reconstruído")
+
+
+def _montar_termos(consulta: str) -> str:
+    """Converte texto livre em consulta FTS5: todas as palavras, por prefixo."""
+    palavras = re.findall(r"\w+", consulta)
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def _padrao_contem(consulta: str) -> str:
+    """Padrão LIKE "contém", com %, _ e a barra do texto tratados como literais."""
+    literal = consulta.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{literal}%"
+
+
+def _buscar_por_padrao(db: Session, consulta: str, deslocamento: int, limite: int) -> list[Obra]:
+    """Alternativa sem FTS (outros bancos): ILIKE em título, autor e descrição."""
+    padrao = _padrao_contem(consulta)
+    return (
+        db.query(Obra)
+        .filter(or_(
+            Obra.titulo.ilike(padrao, escape="\\"),
+            Obra.autor.ilike(padrao, escape="\\"),
+            Obra.descricao.ilike(padrao, escape="\\"),
+        ))
+        .order_by(Obra.titulo, Obra.id)
+        .offset(deslocamento)
+        .limit(limite)
+        .all()
+    )
+
+
+def buscar_obras(db: Session, consulta: str, cursor: str | None, limite: int) -> dict:
+    """
+    Busca obras por título, autor e descrição ordenando por relevância.
+
+    Returns:
+        Dicionário com `items` e `next_cursor` (None na última página)
+    """
+    deslocamento = 0
+    if cursor:
+        ordenacao, valor, _ = decodificar_cursor(cursor)
+        if ordenacao != ORDENACAO_BUSCA or not isinstance(valor, int) or valor < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor de paginação inválido",
+            )
+        deslocamento = valor
+
+    termos = _montar_termos(consulta)
+    if not termos:
+        return {"items": [], "next_cursor": None}
+
+    if db.bind.dialect.name == "sqlite":
+        obras = db.query(Obra).from_statement(text(CONSULTA_FTS)).params(
+            termos=termos, limite=limite + 1, deslocamento=deslocamento
+        ).all()
+    else:
+        obras = _buscar_por_padrao(db, consulta, deslocamento, limite + 1)
+
+    proximo_cursor = None
+    if len(obras) > limite:
+        obras = obras[:limite]
+        proximo_cursor = codificar_cursor(ORDENACAO_BUSCA, deslocamento + limite, "")
+
+    return {"items": obras, "next_cursor": proximo_cursor}
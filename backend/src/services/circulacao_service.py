@@ -0,0 +1,280 @@
+from collections import Counter
+from datetime import date, datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, insert, update
+from sqlalchemy.orm import Session
+
+from disponibilidade import registrar_disponibilidade
+from identificadores import gerar_id
+from models.emprestimo import Emprestimo, StatusEmprestimo
+from models.exemplar import Exemplar, StatusExemplar
+from models.obra import Obra
+from models.usuario import Usuario
+
+
+def _trocar_status_exemplar(db: Session, exemplar_id: str, de: StatusExemplar, para: StatusExemplar) -> bool:
+    """
+    UPDATE condicional (compare-and-set) do status do exemplar.
+
+    Só altera a linha se o status atual for `de`, incrementando a versão;
+    a verificação e a escrita acontecem na mesma instrução, então duas
+    transações concorrentes nunca passam as duas.
+
+    Returns:
+        True se a linha foi alterada
+    """
+    resultado = db.execute(
+        update(Exemplar)
+        .where(Exemplar.id == exemplar_id, Exemplar.status == de)
+        .values(status=para, versao=Exemplar.versao + 1, atualizadoEm=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount == 1
+
+
+def retirar_exemplar(db: Session, exemplar_id: str) -> None:
+    """
+    Marca o exemplar como emprestado se ele estiver disponível.
+
+    Raises:
+        HTTPException: 404 se o exemplar não existe, 400 se não está disponível
+    """
+    if _trocar_status_exemplar(db, exemplar_id, StatusExemplar.disponivel, StatusExemplar.emprestado):
+        return
+    if db.query(Exemplar.id).filter(Exemplar.id == exemplar_id).first() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exemplar não encontrado")
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Exemplar não está disponível")
+
+
+def devolver_exemplar(db: Session, exemplar_id: str) -> bool:
+    """Volta o exemplar emprestado para disponível; False se ele não estava emprestado."""
+    return _trocar_status_exemplar(db, exemplar_id, StatusExemplar.emprestado, StatusExemplar.disponivel)
+
+
+def ajustar_disponiveis(db: Session, obra_id: str, delta: int) -> None:
+    """
+    Soma `delta` a exemplares_disponiveis no próprio banco, limitado a
+    [0, total_exemplares], sem ler o valor antes.
+    """
+    ajustar_disponiveis_em_lote(db, {obra_id: delta})
+
+
+def ajustar_disponiveis_em_lote(db: Session, deltas: dict[str, int]) -> None:
+    """
+    Versão de ajustar_disponiveis para várias obras numa única instrução
+    (UPDATE ... SET x = x + CASE id WHEN ... END WHERE id IN (...)).
+
+    Os novos contadores voltam por RETURNING e são transmitidos após o
+    commit (ver disponibilidade.py).
+
+    Args:
+        deltas: obra_id -> quantidade a somar (negativa para retirar)
+    """
+    deltas = {obra_id: delta for obra_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    novo_valor = Obra.exemplaresDisponiveis + case(deltas, value=Obra.id)
+    linhas = db.execute(
+        update(Obra)
+        .where(Obra.id.in_(deltas))
+        .values(
+            exemplaresDisponiveis=case(
+                (novo_valor < 0, 0),
+                (novo_valor > Obra.totalExemplares, Obra.totalExemplares),
+                else_=novo_valor,
+            ),
+            atualizadoEm=datetime.utcnow(),
+        )
+        .returning(Obra.id, Obra.exemplaresDisponiveis, Obra.totalExemplares)
+        .execution_options(synchronize_session=False)
+    ).all()
+    registrar_disponibilidade(db, linhas)
+
+
+def ajustar_exemplares(db: Session, obra_id: str, total: int, disponiveis: int) -> None:
+    """
+    Cadastro e exclusão de exemplares: soma `total` a total_exemplares e
+    `disponiveis` a exemplares_disponiveis numa única instrução, mantendo
+    os disponíveis em [0, novo total].
+    """
+    novo_total = Obra.totalExemplares + total
+    novo_valor = Obra.exemplaresDisponiveis + disponiveis
+    linhas = db.execute(
+        update(Obra)
+        .where(Obra.id == obra_id)
+        .values(
+            totalExemplares=novo_total,
+            exemplaresDisponiveis=case(
+                (novo_valor < 0, 0),
+                (novo_valor > novo_total, novo_total),
+                else_=novo_valor,
+            ),
+            atualizadoEm=datetime.utcnow(),
+        )
+        .returning(Obra.id, Obra.exemplaresDisponiveis, Obra.totalExemplares)
+        .execution_options(synchronize_session=False)
+    ).all()
+    registrar_disponibilidade(db, linhas)
+
+
+def registrar_devolucao(db: Session, emprestimo_id: str, data_devolucao: date) -> Emprestimo:
+    """
+    Fecha o empréstimo (compare-and-set em data_devolucao IS NULL) e libera
+    o exemplar, devolvendo-o ao contador da obra.
+
+    Raises:
+        HTTPException: 404 se o empréstimo não existe, 400 se já foi devolvido
+    """
+    resultado = db.execute(
+        update(Emprestimo)
+        .where(Emprestimo.id == emprestimo_id, Emprestimo.dataDevolucao.is_(None))
+        .values(
+            dataDevolucao=data_devolucao,
+            status=StatusEmprestimo.devolvido,
+            atualizadoEm=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    emprestimo = db.query(Emprestimo).filter(Emprestimo.id == emprestimo_id).first()
+    if not emprestimo:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Empréstimo não encontrado")
+    if resultado.rowcount != 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empréstimo já foi devolvido")
+
+    # O contador só volta se o exemplar de fato estava emprestado
+    if devolver_exemplar(db, emprestimo.exemplarId):
+        ajustar_disponiveis(db, emprestimo.obraId, +1)
+    return emprestimo
+
+
+def _erro(codigo: str, mensagem: str) -> dict:
+    return {"codigo": codigo, "sucesso": False, "erro": mensagem}
+
+
+def _exemplares_por_codigo(db: Session, codigos: list[str]) -> dict[str, Exemplar]:
+    """Resolve todos os códigos com um único SELECT ... WHERE codigo IN (...)."""
+    exemplares = db.query(Exemplar).filter(Exemplar.codigo.in_(set(codigos))).all()
+    return {exemplar.codigo: exemplar for exemplar in exemplares}
+
+
+def emprestar_lote(
+    db: Session,
+    usuario: Usuario,
+    codigos: list[str],
+    data_emprestimo: date,
+    data_prevista: date,
+) -> list[dict]:
+    """
+    Empresta vários exemplares ao mesmo usuário numa transação.
+
+    Os exemplares são reservados com um único UPDATE condicional (RETURNING
+    dos que estavam disponíveis), os empréstimos inseridos com um executemany
+    e os contadores das obras ajustados com uma instrução agrupada. Falhas de
+    um item não impedem os demais.
+
+    Returns:
+        Um resultado por código, na ordem recebida
+    """
+    exemplares = _exemplares_por_codigo(db, codigos)
+    candidatos = {exemplares[c].id for c in codigos if c in exemplares}
+
+    retirados = set()
+    if candidatos:
+        retirados = set(db.scalars(
+            update(Exemplar)
+            .where(Exemplar.id.in_(candidatos), Exemplar.status == StatusExemplar.disponivel)
+            .values(status=StatusExemplar.emprestado, versao=Exemplar.versao + 1, atualizadoEm=datetime.utcnow())
+            .returning(Exemplar.id)
+            .execution_options(synchronize_session=False)
+        ))
+
+    agora = datetime.utcnow()
+    resultados = []
+    novos = []
+    vistos = set()
+    for codigo in codigos:
+        exemplar = exemplares.get(codigo)
+        if codigo in vistos:
+            resultados.append(_erro(codigo, "Código repetido no lote"))
+        elif exemplar is None:
+            resultados.append(_erro(codigo, "Exemplar não encontrado"))
+        elif exemplar.id not in retirados:
+            resultados.append(_erro(codigo, "Exemplar não está disponível"))
+        else:
+            emprestimo = {
+                "id": gerar_id(),
+                "usuarioId": usuario.id,
+                "exemplarId": exemplar.id,
+                "obraId": exemplar.obraId,
+                "dataEmprestimo": data_emprestimo,
+                "dataPrevistaDevolucao": data_prevista,
+                "dataDevolucao": None,
+                "status": StatusEmprestimo.ativo,
+                "renovacoes": 0,
+                "criadoEm": agora,
+                "atualizadoEm": agora,
+            }
+            novos.append(emprestimo)
+            resultados.append({"codigo": codigo, "sucesso": True, "emprestimo": {**emprestimo, "status": "ativo"}})
+        vistos.add(codigo)
+
+    if novos:
+        db.execute(insert(Emprestimo), novos)
+        retirados_por_obra = Counter(emprestimo["obraId"] for emprestimo in novos)
+        ajustar_disponiveis_em_lote(db, {obra_id: -n for obra_id, n in retirados_por_obra.items()})
+    return resultados
+
+
+def devolver_lote(db: Session, codigos: list[str], data_devolucao: date) -> list[dict]:
+    """
+    Devolve vários exemplares numa transação: fecha os empréstimos em aberto
+    com um UPDATE ... RETURNING, libera os exemplares com outro e ajusta os
+    contadores das obras com uma instrução agrupada.
+
+    Returns:
+        Um resultado por código, na ordem recebida
+    """
+    exemplares = _exemplares_por_codigo(db, codigos)
+    ids = {exemplar.id for exemplar in exemplares.values()}
+
+    fechados = {}
+    liberados = set()
+    if ids:
+        fechados = {
+            emprestimo.exemplarId: emprestimo
+            for emprestimo in db.scalars(
+                update(Emprestimo)
+                .where(Emprestimo.exemplarId.in_(ids), Emprestimo.dataDevolucao.is_(None))
+                .values(dataDevolucao=data_devolucao, status=StatusEmprestimo.devolvido, atualizadoEm=datetime.utcnow())
+                .returning(Emprestimo)
+                .execution_options(synchronize_session=False)
+            )
+        }
+    if fechados:
+        liberados = set(db.scalars(
+            update(Exemplar)
+            .where(Exemplar.id.in_(fechados), Exemplar.status == StatusExemplar.emprestado)
+            .values(status=StatusExemplar.disponivel, versao=Exemplar.versao + 1, atualizadoEm=datetime.utcnow())
+            .returning(Exemplar.id)
+            .execution_options(synchronize_session=False)
+        ))
+        ajustar_disponiveis_em_lote(
+            db, Counter(fechados[exemplar_id].obraId for exemplar_id in liberados)
+        )
+
+    resultados = []
+    vistos = set()
+    for codigo in codigos:
+        exemplar = exemplares.get(codigo)
+        if codigo in vistos:
+            resultados.append(_erro(codigo, "Código repetido no lote"))
+        elif exemplar is None:
+            resultados.append(_erro(codigo, "Exemplar não encontrado"))
+        elif exemplar.id not in fechados:
+            resultados.append(_erro(codigo, "Nenhum empréstimo em aberto para o exemplar"))
+        else:
+            resultados.append({"codigo": codigo, "sucesso": True, "emprestimo": fechados[exemplar.id]})
+        vistos.add(codigo)
+    return resultados
@@ -0,0 +1,20 @@
+from sqlalchemy.orm import Session
+
+
+def buscar_em_lote(db: Session, modelo, ids: list[str]) -> dict:
+    """
+    Busca vários registros por id numa única consulta (WHERE id IN (...)).
+
+    Substitui um GET /{id} por linha no frontend: uma tabela de 50
+    empréstimos resolve títulos e leitores com uma requisição por entidade.
+
+    Returns:
+        Dicionário com `items` na ordem dos ids pedidos (repetidos aparecem
+        uma vez) e `ausentes`, os ids sem registro
+    """
+    unicos = list(dict.fromkeys(ids))
+    encontrados = {registro.id: registro for registro in db.query(modelo).filter(modelo.id.in_(unicos))}
+    return {
+        "items": [encontrados[id_] for id_ in unicos if id_ in encontrados],
+        "ausentes": [id_ for id_ in unicos if id_ not in encontrados],
+    }
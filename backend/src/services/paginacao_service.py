@@ -0,0 +1,111 @@
+import base64
+import json
+from datetime import date, datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+
+def _cursor_invalido() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Cursor de paginação inválido",
+    )
+
+
+def _serializar_valor(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _restaurar_valor(coluna, valor):
+    tipo = coluna.type.python_type
+    if valor is None:
+        return None
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if tipo is date:
+        return date.fromisoformat(valor)
+    return tipo(valor)
+
+
+def codificar_cursor(ordenacao: str, valor, registro_id: str) -> str:
+    """Gera cursor opaco a partir da chave de ordenação (valor, id)."""
+    bruto = json.dumps([ordenacao, _serializar_valor(valor), registro_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[str, object, str]:
+    """Recupera (ordenação, valor, id) de um cursor gerado por codificar_cursor."""
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        ordenacao, valor, registro_id = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        return ordenacao, valor, str(registro_id)
+    except (ValueError, TypeError):
+        raise _cursor_invalido()
+
+
+def resolver_ordenacao(ordenar: str, permitidas: dict) -> tuple:
+    """
+    Converte o parâmetro `ordenar` ("campo" ou "-campo") em coluna e sentido.
+
+    Apenas campos presentes em `permitidas` são aceitos.
+    """
+    campo = ordenar.lstrip("-")
+    if campo not in permitidas:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ordenação inválida. Use: {', '.join(sorted(permitidas))}",
+        )
+    return permitidas[campo], ordenar.startswith("-")
+
+
+def paginar(
+    query: Query,
+    modelo,
+    cursor: str | None,
+    limite: int,
+    ordenar: str = "criadoEm",
+    permitidas: dict | None = None,
+) -> dict:
+    """
+    Aplica paginação por chave (keyset) ordenando por (campo, id).
+
+    O custo de cada página é constante: a posição é retomada pelo índice
+    do campo de ordenação em vez de OFFSET.
+
+    Returns:
+        Dicionário com `items` e `next_cursor` (None na última página)
+    """
+    coluna, descendente = resolver_ordenacao(ordenar, permitidas or {"criadoEm": modelo.criadoEm})
+    chave = tuple_(coluna, modelo.id)
+
+    if cursor:
+        ordenacao_cursor, valor, registro_id = decodificar_cursor(cursor)
+        if ordenacao_cursor != ordenar:
+            raise _cursor_invalido()
+        try:
+            posicao = tuple_(_restaurar_valor(coluna, valor), registro_id)
+        except (ValueError, TypeError):
+            raise _cursor_invalido()
+        query = query.filter(chave < posicao if descendente else chave > posicao)
+
+    if descendente:
+        query = query.order_by(coluna.desc(), modelo.id.desc())
+    else:
+        query = query.order_by(coluna, modelo.id)
+
+    registros = query.limit(limite + 1).all()
+
+    proximo_cursor = None
+    if len(registros) > limite:
+        registros = registros[:limite]
+        ultimo = registros[-1]
+        proximo_cursor = codificar_cursor(ordenar, getattr(ultimo, coluna.key), ultimo.id)
+
+    return {"items": registros, "next_cursor": proximo_cursor}
@@ -1,5 +1,7 @@
 import bcrypt
 
+from metricas import bcrypt_duracao
+
 
 def hash_senha(senha: str) -> str:
     """
@@ -13,7 +15,8 @@ def hash_senha(senha: str) -> str:
     """
     senha_bytes = senha.encode('utf-8')
     salt = bcrypt.gensalt()
-    hash_bytes = bcrypt.hashpw(senha_bytes, salt)
+    with bcrypt_duracao.labels("hash").time():
+        hash_bytes = bcrypt.hashpw(senha_bytes, salt)
     return hash_bytes.decode('utf-8')
 
 
@@ -30,4 +33,5 @@ def verificar_senha(senha: str, hash_senha: str) -> bool:
     """
     senha_bytes = senha.encode('utf-8')
     hash_bytes = hash_senha.encode('utf-8')
-    return bcrypt.checkpw(senha_bytes, hash_bytes)
+    with bcrypt_duracao.labels("verificar").time():
+        return bcrypt.checkpw(senha_bytes, hash_bytes)
@@ -0,0 +1,252 @@
+"""
+Feeds de alterações (GET /{coleção}/changes?since=) para sincronização incremental.
+
+Cada chamada devolve as linhas com atualizado_em posterior ao token, na ordem
+(atualizado_em, id) e pelo índice ix_<tabela>_atualizado_em_id, e os ids
+removidos desde o token, lidos de registros_exclusao. O token devolvido
+retoma exatamente do ponto em que a resposta parou.
+
+atualizado_em é gravado antes do commit: uma transação lenta pode tornar
+visível uma linha com instante anterior a outra já entregue. Por isso só
+entram no feed as alterações mais antigas que SINCRONIZACAO_JANELA segundos,
+prazo que deve cobrir a transação de escrita mais longa (e o atraso da
+réplica de leitura, se houver).
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from models.registro_exclusao import RegistroExclusao
+
+logger = logging.getLogger(__name__)
+
+SINCRONIZACAO_JANELA = float(os.getenv("SINCRONIZACAO_JANELA", "5"))  # s
+SINCRONIZACAO_RETENCAO_DIAS = int(os.getenv("SINCRONIZACAO_RETENCAO_DIAS", "30"))
+SINCRONIZACAO_PODA_INTERVALO = int(os.getenv("SINCRONIZACAO_PODA_INTERVALO", "3600"))  # s
+
+# Tabelas com feed de alterações
+TABELAS_SINCRONIZADAS = ("obras", "exemplares", "emprestimos", "reservas")
+
+# Gatilhos AFTER DELETE: também disparam nas exclusões em cascata do banco
+DDL_GATILHO_SQLITE = """
+CREATE TRIGGER IF NOT EXISTS {tabela}_exclusao_ad AFTER DELETE ON {tabela} BEGIN
+    INSERT INTO registros_exclusao (tabela, registro_id, excluido_em)
+    VALUES ('{tabela}', old.id, strftime('%Y-%m-%d %H:%M:%f000', 'now'));
+END
+"""
+
+# No PostgreSQL, um gatilho por instrução com tabela de transição: uma
+# exclusão em cascata de milhares de linhas vira um único INSERT ... SELECT
+DDL_FUNCAO_POSTGRES = """
+CREATE OR REPLACE FUNCTION registrar_exclusoes() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO registros_exclusao (tabela, registro_id, excluido_em)
+    SELECT TG_TABLE_NAME, id, clock_timestamp() AT TIME ZONE 'utc' FROM excluidas;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+DDL_GATILHO_POSTGRES = [
+    "DROP TRIGGER IF EXISTS {tabela}_exclusao_ad ON {tabela}",
+    """
+    CREATE TRIGGER {tabela}_exclusao_ad AFTER DELETE ON {tabela}
+    REFERENCING OLD TABLE AS excluidas
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_exclusoes()
+    """,
+]
+
+
+def instalar_registro_exclusoes(engine: Engine) -> None:
+    """Cria os gatilhos que registram as exclusões das tabelas sincronizadas."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            for tabela in TABELAS_SINCRONIZADAS:
+                conn.exec_driver_sql(DDL_GATILHO_SQLITE.format(tabela=tabela))
+        elif engine.dialect.name == "postgresql":
+            conn.exec_driver_sql(DDL_FUNCAO_POSTGRES)
+            for tabela in TABELAS_SINCRONIZADAS:
+                for ddl in DDL_GATILHO_POSTGRES:
+                    conn.exec_driver_sql(ddl.format(tabela=tabela))
+        else:
+            logger.warning("Feeds de alterações sem registro de exclusões no dialeto %s", engine.dialect.name)
+
+
+def podar_exclusoes(db: Session, agora: datetime | None = None) -> int:
+    """
+    Remove registros de exclusão mais antigos que a retenção.
+
+    Returns:
+        Quantidade de registros removidos
+    """
+    limite = (agora or datetime.utcnow()) - timedelta(days=SINCRONIZACAO_RETENCAO_DIAS)
+    removidos = 0
+    # uma instrução por tabela, para usar o índice (tabela, excluido_em, id)
+    for tabela in TABELAS_SINCRONIZADAS:
+        resultado = db.execute(
+            delete(RegistroExclusao).where(
+                RegistroExclusao.tabela == tabela,
+                RegistroExclusao.excluidoEm < limite,
+            )
+        )
+        removidos += resultado.rowcount
+    db.commit()
+    return removidos
+
+
+def executar_poda_exclusoes() -> int:
+    """Poda o registro de exclusões em sessão própria."""
+    db = SessionLocal()
+    try:
+        removidos = podar_exclusoes(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    if removidos:
+        logger.info(f"Poda de exclusões: {removidos} registros antigos removidos")
+    return removidos
+
+
+async def _loop_poda(intervalo: int) -> None:
+    while True:
+        try:
+            await run_in_threadpool(executar_poda_exclusoes)
+        except Exception as e:
+            logger.error(f"Erro na poda de exclusões: {str(e)}")
+        await asyncio.sleep(intervalo)
+
+
+def iniciar_poda_exclusoes(intervalo: int = SINCRONIZACAO_PODA_INTERVALO) -> asyncio.Task | None:
+    """Agenda a poda periódica do registro de exclusões (intervalo <= 0 desativa)."""
+    if intervalo <= 0:
+        logger.info("Poda do registro de exclusões desativada")
+        return None
+    return asyncio.create_task(_loop_poda(intervalo))
+
+
+def _token_invalido() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Token de sincronização inválido",
+    )
+
+
+def _codificar_posicao(posicao: tuple[datetime, object] | None) -> list | None:
+    return None if posicao is None else [posicao[0].isoformat(), posicao[1]]
+
+
+def _decodificar_posicao(valor) -> tuple[datetime, object] | None:
+    if valor is None:
+        return None
+    momento, registro_id = valor
+    return datetime.fromisoformat(momento), registro_id
+
+
+def codificar_token(tabela: str, alteracoes, exclusoes) -> str:
+    """Gera o token opaco a partir das posições (instante, id) dos dois fluxos."""
+    bruto = json.dumps(
+        [tabela, _codificar_posicao(alteracoes), _codificar_posicao(exclusoes)],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_token(token: str, tabela: str) -> tuple:
+    """Recupera as posições de um token gerado por codificar_token para a tabela."""
+    try:
+        preenchimento = "=" * (-len(token) % 4)
+        tabela_token, alteracoes, exclusoes = json.loads(base64.urlsafe_b64decode(token + preenchimento))
+        alteracoes, exclusoes = _decodificar_posicao(alteracoes), _decodificar_posicao(exclusoes)
+    except (ValueError, TypeError):
+        raise _token_invalido()
+    if tabela_token != tabela or exclusoes is None:
+        raise _token_invalido()
+    return alteracoes, exclusoes
+
+
+def _apos(query, coluna_momento, coluna_id, posicao):
+    """Filtra o que vem depois da posição; id None = todo o instante já foi lido."""
+    if posicao is None:
+        return query
+    momento, registro_id = posicao
+    if registro_id is None:
+        return query.filter(coluna_momento > momento)
+    return query.filter(tuple_(coluna_momento, coluna_id) > tuple_(momento, registro_id))
+
+
+def _avancar(registros, limite: int, momento_limite: datetime, posicao, chave) -> tuple:
+    """
+    Corta a página e calcula a nova posição do fluxo.
+
+    Returns:
+        (registros da página, nova posição, há mais registros)
+    """
+    if len(registros) > limite:
+        registros = registros[:limite]
+        return registros, chave(registros[-1]), True
+    # fluxo esgotado até momento_limite: a posição não recua
+    if posicao is not None and posicao[0] > momento_limite:
+        return registros, posicao, False
+    return registros, (momento_limite, None), False
+
+
+def listar_alteracoes(db: Session, modelo, since: str | None, limite: int) -> dict:
+    """
+    Alterações e exclusões de uma tabela desde o token `since`.
+
+    Sem token, entrega a tabela inteira (sincronização inicial) e só as
+    exclusões feitas a partir de agora.
+
+    Returns:
+        Dicionário com `items`, `removidos`, `sync_token` e `tem_mais`
+    """
+    tabela = modelo.__tablename__
+    agora = datetime.utcnow()
+    momento_limite = agora - timedelta(seconds=SINCRONIZACAO_JANELA)
+
+    if since:
+        pos_alteracoes, pos_exclusoes = decodificar_token(since, tabela)
+        if pos_exclusoes[0] < agora - timedelta(days=SINCRONIZACAO_RETENCAO_DIAS):
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Token de sincronização expirado; sincronize novamente sem since",
+            )
+    else:
+        pos_alteracoes, pos_exclusoes = None, (momento_limite, None)
+
+    query = db.query(modelo).filter(modelo.atualizadoEm <= momento_limite)
+    query = _apos(query, modelo.atualizadoEm, modelo.id, pos_alteracoes)
+    registros = query.order_by(modelo.atualizadoEm, modelo.id).limit(limite + 1).all()
+    registros, pos_alteracoes, mais_alteracoes = _avancar(
+        registros, limite, momento_limite, pos_alteracoes, lambda r: (r.atualizadoEm, r.id)
+    )
+
+    query = db.query(RegistroExclusao.id, RegistroExclusao.registroId, RegistroExclusao.excluidoEm).filter(
+        RegistroExclusao.tabela == tabela,
+        RegistroExclusao.excluidoEm <= momento_limite,
+    )
+    query = _apos(query, RegistroExclusao.excluidoEm, RegistroExclusao.id, pos_exclusoes)
+    exclusoes = query.order_by(RegistroExclusao.excluidoEm, RegistroExclusao.id).limit(limite + 1).all()
+    exclusoes, pos_exclusoes, mais_exclusoes = _avancar(
+        exclusoes, limite, momento_limite, pos_exclusoes, lambda e: (e.excluidoEm, e.id)
+    )
+
+    return {
+        "items": registros,
+        "removidos": [exclusao.registroId for exclusao in exclusoes],
+        "sync_token": codificar_token(tabela, pos_alteracoes, pos_exclusoes),
+        "tem_mais": mais_alteracoes or mais_exclusoes,
+    }
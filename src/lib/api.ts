@@ -13,6 +13,7 @@ import type {
   ObraCreate,
   ObraResponse,
   ObraUpdate,
+  Pagina,
   ReservaCreate,
   ReservaResponse,
   ReservaUpdate,
@@ -22,6 +23,27 @@ import type {
   UsuarioUpdate,
 } from "../types/api";
 
+const LIMITE_PAGINA = 200;
+
+async function listarTodasPaginas<T>(path: string): Promise<T[]> {
+  const itens: T[] = [];
+  let cursor: string | null = null;
+
+  do {
+    const params = new URLSearchParams({ limit: String(LIMITE_PAGINA) });
+    if (cursor) {
+      params.set("cursor", cursor);
+    }
+    const pagina: Pagina<T> = await httpRequest<Pagina<T>>(
+      `${path}?${params.toString()}`
+    );
+    itens.push(...pagina.items);
+    cursor = pagina.next_cursor;
+  } while (cursor);
+
+  return itens;
+}
+
 export async function login(
   cpf: string,
   senha: string
@@ -40,7 +62,7 @@ export async function logout(): Promise<void> {
 }
 
 export async function listarUsuarios(): Promise<UsuarioResponse[]> {
-  return httpRequest<UsuarioResponse[]>("/usuarios");
+  return listarTodasPaginas<UsuarioResponse>("/usuarios");
 }
 
 export async function buscarUsuario(id: string): Promise<UsuarioResponse> {
@@ -75,7 +97,7 @@ export async function deletarUsuario(id: string): Promise<void> {
 export async function listarAdministradores(): Promise<
   AdministradorResponse[]
 > {
-  return httpRequest<AdministradorResponse[]>("/administradores");
+  return listarTodasPaginas<AdministradorResponse>("/administradores");
 }
 
 export async function criarAdministrador(
@@ -88,7 +110,7 @@ export async function criarAdministrador(
 }
 
 export async function listarCategorias(): Promise<CategoriaResponse[]> {
-  return httpRequest<CategoriaResponse[]>("/categorias");
+  return listarTodasPaginas<CategoriaResponse>("/categorias");
 }
 
 export async function criarCategoria(
@@ -101,7 +123,7 @@ export async function criarCategoria(
 }
 
 export async function listarObras(): Promise<ObraResponse[]> {
-  return httpRequest<ObraResponse[]>("/obras");
+  return listarTodasPaginas<ObraResponse>("/obras");
 }
 
 export async function buscarObra(id: string): Promise<ObraResponse> {
@@ -142,7 +164,7 @@ export async function uploadCapaObra(id: string, file: File): Promise<void> {
 }
 
 export async function listarExemplares(): Promise<ExemplarResponse[]> {
-  return httpRequest<ExemplarResponse[]>("/exemplares");
+  return listarTodasPaginas<ExemplarResponse>("/exemplares");
 }
 
 export async function criarExemplar(
@@ -165,7 +187,7 @@ export async function atualizarExemplar(
 }
 
 export async function listarEmprestimos(): Promise<EmprestimoResponse[]> {
-  return httpRequest<EmprestimoResponse[]>("/emprestimos");
+  return listarTodasPaginas<EmprestimoResponse>("/emprestimos");
 }
 
 export async function buscarEmprestimo(
@@ -200,7 +222,7 @@ export async function deletarEmprestimo(id: string): Promise<void> {
 }
 
 export async function listarReservas(): Promise<ReservaResponse[]> {
-  return httpRequest<ReservaResponse[]>("/reservas");
+  return listarTodasPaginas<ReservaResponse>("/reservas");
 }
 
 export async function buscarReserva(id: string): Promise<ReservaResponse> {
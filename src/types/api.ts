@@ -211,6 +211,11 @@ export interface ReservaResponse {
   atualizadoEm: string;
 }
 
+export interface Pagina<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 export interface ValidationError {
   loc: Array<string | number>;
   msg: string;
@@ -0,0 +1,93 @@
+"""configuração compartilhada dos testes"""
+from __future__ import annotations
+
+import asyncio
+import re
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+BACKEND_SRC = Path(__file__).resolve().parent.parent / "backend" / "src"
+sys.path.insert(0, str(BACKEND_SRC))
+
+_CONSULTAS = re.compile(r'desc="(\d+) consultas"')
+
+
+@pytest.fixture(scope="session")
+def cliente():
+    from fastapi.testclient import TestClient
+
+    from database import init_db
+    from main import app
+
+    init_db()
+    return TestClient(app)
+
+
+@pytest.fixture
+def consultas():
+    """número de instruções SQL da requisição, lido do Server-Timing"""
+
+    def contar(response) -> int:
+        return int(_CONSULTAS.search(response.headers["server-timing"]).group(1))
+
+    return contar
+
+
+@pytest.fixture
+def criar_categoria(cliente):
+    def criar(prefixo: str = "Teste") -> dict:
+        response = cliente.post("/categorias/", json={"nome": f"{prefixo} {uuid.uuid4()}"})
+        assert response.status_code == 201
+        return response.json()
+
+    return criar
+
+
+@pytest.fixture
+def criar_obra(cliente, criar_categoria):
+    """cria uma obra (por padrão com um exemplar) numa categoria nova ou na informada"""
+
+    def criar(categoria_id: str | None = None, exemplares: int = 1, **campos) -> dict:
+        response = cliente.post("/obras/", json={
+            "titulo": "Obra de teste",
+            "autor": "Autor",
+            "isbn": f"978{uuid.uuid4().hex[:10]}",
+            "categoriaId": categoria_id or criar_categoria()["id"],
+            "totalExemplares": exemplares,
+            "exemplaresDisponiveis": exemplares,
+            **campos,
+        })
+        assert response.status_code == 201
+        return response.json()
+
+    return criar
+
+
+@pytest.fixture
+def criar_usuario(cliente):
+    def criar(**campos) -> dict:
+        response = cliente.post("/usuarios/", json={
+            "nome": "Leitor",
+            "cpf": str(uuid.uuid4().int)[:11],
+            "email": f"{uuid.uuid4().hex[:10]}@exemplo.com",
+            "senha": "segredo1",
+            "dataCadastro": "2025-01-01",
+            **campos,
+        })
+        assert response.status_code == 201
+        return response.json()
+
+    return criar
+
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    """fecha o pool assíncrono, papel do lifespan que o TestClient sem contexto não executa"""
+    import database
+
+    # cada conexão do aiosqlite tem uma thread própria (não daemon): abertas,
+    # impedem o processo de terminar ao fim da sessão com DB_ASYNC=1
+    for engine in {database.async_engine, database.async_engine_leitura} - {None}:
+        asyncio.run(engine.dispose())
@@ -0,0 +1,55 @@
+"""testes da varredura de empréstimos atrasados"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from database import SessionLocal, init_db
+from main import app
+from models.exemplar import Exemplar
+from services.atraso_service import executar_varredura
+
+init_db()
+client = TestClient(app)
+
+
+def test_varredura_marca_so_os_vencidos(criar_obra, criar_usuario) -> None:
+    """um UPDATE marca os vencidos; a segunda passada não muda nada"""
+    # empréstimos vencidos deixados pelos outros testes
+    executar_varredura()
+
+    obra = criar_obra(exemplares=4)
+    usuario = criar_usuario()
+    with SessionLocal() as db:
+        exemplares = [e.id for e in db.query(Exemplar).filter(Exemplar.obraId == obra["id"]).order_by(Exemplar.codigo)]
+
+    hoje = date.today()
+    previstas = [hoje - timedelta(days=10), hoje - timedelta(days=1), hoje, hoje + timedelta(days=7)]
+    emprestimos = []
+    for exemplar_id, prevista in zip(exemplares, previstas):
+        response = client.post("/emprestimos/", json={
+            "usuarioId": usuario["id"],
+            "exemplarId": exemplar_id,
+            "obraId": obra["id"],
+            "dataEmprestimo": (prevista - timedelta(days=14)).isoformat(),
+            "dataPrevistaDevolucao": prevista.isoformat(),
+        })
+        assert response.status_code == 201
+        emprestimos.append(response.json()["id"])
+
+    # vencido, mas já devolvido: continua devolvido
+    client.put(f"/emprestimos/{emprestimos[0]}", json={"dataDevolucao": hoje.isoformat()})
+
+    assert executar_varredura() == 1
+    status = [client.get(f"/emprestimos/{id_}").json()["status"] for id_ in emprestimos]
+    assert status == ["devolvido", "atrasado", "ativo", "ativo"]
+
+    saude = client.get("/health").json()["varreduraAtrasos"]
+    assert saude["atualizados"] == 1 and saude["executadaEm"] is not None
+    total = saude["totalAtualizados"]
+
+    assert executar_varredura() == 0
+    saude = client.get("/health").json()["varreduraAtrasos"]
+    assert saude["atualizados"] == 0 and saude["totalAtualizados"] == total
+    assert [client.get(f"/emprestimos/{id_}").json()["status"] for id_ in emprestimos] == status
@@ -0,0 +1,128 @@
+"""testes da busca textual de obras (GET /obras/busca: FTS5 do SQLite ou ILIKE)"""
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from database import SessionLocal, engine, init_db
+from main import app
+from services.busca_service import _buscar_por_padrao, reconstruir_indice_busca
+
+somente_sqlite = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="usa o índice FTS5 do SQLite")
+
+init_db()
+client = TestClient(app)
+
+
+def _marca() -> str:
+    """palavra que só as obras do teste contêm"""
+    return "xilo" + uuid.uuid4().hex[:8]
+
+
+def _buscar(q: str, **params) -> list[str]:
+    response = client.get("/obras/busca", params={"q": q, **params})
+    assert response.status_code == 200
+    return [item["id"] for item in response.json()["items"]]
+
+
+@somente_sqlite
+def test_relevancia_e_prefixo_sem_acentos(criar_categoria, criar_obra) -> None:
+    """título pesa mais que autor, que pesa mais que descrição; prefixos sem acento casam"""
+    marca = _marca()
+    categoria = criar_categoria("Busca")
+    na_descricao = criar_obra(categoria["id"], titulo="Outra obra", descricao=f"Cita {marca} de passagem")
+    no_autor = criar_obra(categoria["id"], titulo="Mais uma", autor=f"Autor {marca}")
+    no_titulo = criar_obra(categoria["id"], titulo=f"Memórias de {marca}")
+
+    assert _buscar(marca) == [no_titulo["id"], no_autor["id"], na_descricao["id"]]
+    assert _buscar(f"MEMO {marca[:6]}") == [no_titulo["id"]]
+    assert _buscar(f"memorias {marca}") == [no_titulo["id"]]
+    assert _buscar(f"{marca} inexistente") == []
+    assert client.get("/obras/busca", params={"q": "!!"}).json()["items"] == []
+
+
+@somente_sqlite
+def test_gatilhos_acompanham_alteracao_e_exclusao(criar_obra) -> None:
+    marca, nova = _marca(), _marca()
+    obra = criar_obra(titulo=f"Título {marca}")
+    assert _buscar(marca) == [obra["id"]]
+
+    client.put(f"/obras/{obra['id']}", json={"titulo": f"Título {nova}"})
+    assert _buscar(marca) == []
+    assert _buscar(nova) == [obra["id"]]
+
+    assert client.delete(f"/obras/{obra['id']}").status_code == 204
+    assert _buscar(nova) == []
+
+
+@somente_sqlite
+def test_paginacao_por_cursor(criar_categoria, criar_obra) -> None:
+    marca = _marca()
+    categoria = criar_categoria("Busca")
+    criadas = {criar_obra(categoria["id"], titulo=f"{marca} volume {i}")["id"] for i in range(5)}
+
+    vistas, cursor = [], None
+    while True:
+        params = {"q": marca, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        pagina = client.get("/obras/busca", params=params).json()
+        assert len(pagina["items"]) <= 2
+        vistas += [item["id"] for item in pagina["items"]]
+        cursor = pagina["next_cursor"]
+        if not cursor:
+            break
+    assert len(vistas) == len(criadas) and set(vistas) == criadas
+
+    assert client.get("/obras/busca", params={"q": marca, "cursor": "lixo"}).status_code == 400
+
+
+@somente_sqlite
+def test_indice_independe_do_rowid(criar_obra) -> None:
+    """o índice usa obras.busca_id: renumerar o rowid (como um VACUUM pode fazer) não o desalinha"""
+    marca = _marca()
+    obra = criar_obra(titulo=f"Renumerada {marca}")
+    vizinha = criar_obra(titulo="Vizinha sem a marca")
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE obras SET rowid = rowid + 1000000000 WHERE id = :id"), {"id": obra["id"]})
+
+    assert _buscar(marca) == [obra["id"]]
+    client.put(f"/obras/{vizinha['id']}", json={"titulo": f"Vizinha {marca}"})
+    assert set(_buscar(marca)) == {obra["id"], vizinha["id"]}
+    client.delete(f"/obras/{obra['id']}")
+    assert _buscar(marca) == [vizinha["id"]]
+
+
+@somente_sqlite
+def test_reconstrucao_do_indice(criar_obra) -> None:
+    """índice esvaziado (ex.: carga sem os gatilhos) volta com a reconstrução"""
+    marca = _marca()
+    obra = criar_obra(titulo=f"Reconstruída {marca}")
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO obras_fts(obras_fts) VALUES ('delete-all')")
+    assert _buscar(marca) == []
+
+    reconstruir_indice_busca(engine)
+    assert _buscar(marca) == [obra["id"]]
+
+
+def test_alternativa_sem_fts_trata_curingas_como_texto(criar_categoria, criar_obra) -> None:
+    """no ILIKE dos outros bancos, %, _ e \\ digitados na busca não são curingas"""
+    marca = _marca()
+    categoria = criar_categoria("Busca")
+    obras = {
+        titulo: criar_obra(categoria["id"], titulo=titulo)["id"]
+        for titulo in (f"{marca} 100% lã", f"{marca} 1000 lãs", f"{marca}_x", f"{marca}ax", f"{marca}\\y", f"{marca}y")
+    }
+
+    def buscar(consulta: str) -> set[str]:
+        with SessionLocal() as db:
+            return {obra.id for obra in _buscar_por_padrao(db, consulta, 0, 10)}
+
+    assert buscar(f"{marca} 100%") == {obras[f"{marca} 100% lã"]}
+    assert buscar(f"{marca}_x") == {obras[f"{marca}_x"]}
+    assert buscar(f"{marca}\\y") == {obras[f"{marca}\\y"]}
+    assert buscar(f"{marca.upper()} 100") == {obras[f"{marca} 100% lã"], obras[f"{marca} 1000 lãs"]}
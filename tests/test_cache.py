@@ -0,0 +1,131 @@
+"""testes do cache de respostas do catálogo"""
+from __future__ import annotations
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from cache import CacheRespostas
+from database import SessionLocal, init_db
+from main import app
+from models.exemplar import Exemplar
+
+init_db()
+client = TestClient(app)
+
+
+@pytest.fixture
+def ler(consultas):
+    def get(url: str, **kwargs) -> tuple[dict, int]:
+        """faz o GET e devolve (corpo, instruções SQL executadas)"""
+        response = client.get(url, **kwargs)
+        assert response.status_code == 200
+        return response.json(), consultas(response)
+
+    return get
+
+
+def test_acerto_e_invalidacao_pelas_escritas(ler, criar_categoria, criar_obra, criar_usuario) -> None:
+    """leituras repetidas não vão ao banco; escritas invalidam só o necessário"""
+    categoria = criar_categoria("Cache")
+    obra_a = criar_obra(categoria["id"])
+    obra_b = criar_obra(categoria["id"])
+    filtro = {"params": {"categoriaId": categoria["id"]}}
+
+    ler(f"/obras/{obra_a['id']}")
+    ler(f"/obras/{obra_b['id']}")
+    ler("/obras/", **filtro)
+    assert ler(f"/obras/{obra_a['id']}")[1] == 0
+    assert ler("/obras/", **filtro)[1] == 0
+
+    # atualizar A invalida A e as listagens, mas não B
+    client.put(f"/obras/{obra_a['id']}", json={"titulo": "Título novo"})
+    obra, consultas = ler(f"/obras/{obra_a['id']}")
+    assert obra["titulo"] == "Título novo" and consultas > 0
+    assert ler(f"/obras/{obra_b['id']}")[1] == 0
+    lista, consultas = ler("/obras/", **filtro)
+    assert consultas > 0
+    assert "Título novo" in [item["titulo"] for item in lista["items"]]
+
+    # empréstimo altera exemplaresDisponiveis por UPDATE em massa
+    usuario = criar_usuario()
+    with SessionLocal() as db:
+        exemplar_id = db.query(Exemplar.id).filter(Exemplar.obraId == obra_b["id"]).scalar()
+    response = client.post("/emprestimos/", json={
+        "usuarioId": usuario["id"],
+        "exemplarId": exemplar_id,
+        "obraId": obra_b["id"],
+        "dataEmprestimo": "2025-01-01",
+        "dataPrevistaDevolucao": "2025-01-15",
+    })
+    assert response.status_code == 201
+    assert ler(f"/obras/{obra_b['id']}")[0]["exemplaresDisponiveis"] == 0
+
+    # categorias
+    ler(f"/categorias/{categoria['id']}")
+    client.put(f"/categorias/{categoria['id']}", json={"descricao": "Atualizada"})
+    assert ler(f"/categorias/{categoria['id']}")[0]["descricao"] == "Atualizada"
+
+
+def test_circulacao_invalida_so_a_obra_emprestada(ler, criar_categoria, criar_obra, criar_usuario) -> None:
+    """o UPDATE dos contadores devolve os ids por RETURNING: as demais obras continuam em cache"""
+    categoria = criar_categoria("Cache")
+    obra_a = criar_obra(categoria["id"])
+    obra_b = criar_obra(categoria["id"])
+    usuario = criar_usuario()
+    with SessionLocal() as db:
+        exemplar_id = db.query(Exemplar.id).filter(Exemplar.obraId == obra_a["id"]).scalar()
+
+    ler(f"/obras/{obra_a['id']}")
+    ler(f"/obras/{obra_b['id']}")
+    response = client.post("/emprestimos/", json={
+        "usuarioId": usuario["id"],
+        "exemplarId": exemplar_id,
+        "obraId": obra_a["id"],
+        "dataEmprestimo": "2025-01-01",
+        "dataPrevistaDevolucao": "2025-01-15",
+    })
+    assert response.status_code == 201
+
+    obra, consultas = ler(f"/obras/{obra_a['id']}")
+    assert obra["exemplaresDisponiveis"] == 0 and consultas > 0
+    assert ler(f"/obras/{obra_b['id']}")[1] == 0
+
+    client.put(f"/emprestimos/{response.json()['id']}", json={"dataDevolucao": "2025-01-10"})
+    assert ler(f"/obras/{obra_a['id']}")[0]["exemplaresDisponiveis"] == 1
+    assert ler(f"/obras/{obra_b['id']}")[1] == 0
+
+    # exclusão por DELETE ... RETURNING também fica restrita à obra excluída
+    assert client.delete(f"/obras/{obra_a['id']}").status_code == 204
+    assert client.get(f"/obras/{obra_a['id']}").status_code == 404
+    assert ler(f"/obras/{obra_b['id']}")[1] == 0
+
+
+def test_limites_ttl_e_geracao() -> None:
+    """LRU por entradas e por bytes, expiração e descarte de respostas velhas"""
+    cache = CacheRespostas("teste", ttl=60, max_entradas=2, max_bytes=10)
+
+    cache.guardar("a", b"aaaa", {"t"}, cache.geracao)
+    cache.guardar("b", b"bbbb", {"t"}, cache.geracao)
+    assert cache.obter("a") == b"aaaa"
+    cache.guardar("c", b"cccc", {"u"}, cache.geracao)
+    # "b" era a menos usada; 12 bytes > 10 também forçaria a remoção
+    assert cache.obter("b") is None
+    assert cache.estatisticas()["entradas"] == 2
+    assert cache.estatisticas()["remocao"] == 1
+
+    cache.guardar("grande", b"x" * 11, {"u"}, cache.geracao)
+    assert cache.obter("grande") is None
+
+    geracao = cache.geracao
+    cache.invalidar("t")
+    assert cache.obter("a") is None
+    assert cache.obter("c") == b"cccc"
+    cache.guardar("a", b"velho", {"t"}, geracao)
+    assert cache.obter("a") is None
+
+    expira = CacheRespostas("teste_ttl", ttl=0.01, max_entradas=10, max_bytes=100)
+    expira.guardar("a", b"a", set(), expira.geracao)
+    time.sleep(0.02)
+    assert expira.obter("a") is None
@@ -0,0 +1,78 @@
+"""testes de empréstimo e devolução concorrentes do mesmo exemplar"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from database import SessionLocal
+from models.exemplar import Exemplar
+from routes.emprestimos import _atualizar_emprestimo, _criar_emprestimo
+from routes.exemplares import _criar_exemplar
+from schemas.emprestimo import EmprestimoCreate, EmprestimoUpdate
+from schemas.exemplar import ExemplarCreate
+
+THREADS = 16
+
+
+def _em_paralelo(funcao) -> list:
+    """executa funcao(db) em várias threads, cada uma com sua sessão"""
+    def executar(_):
+        db = SessionLocal()
+        try:
+            return funcao(db)
+        except HTTPException as erro:
+            return erro.status_code
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        return list(executor.map(executar, range(THREADS)))
+
+
+def test_mesmo_exemplar_emprestado_uma_unica_vez(cliente, criar_obra, criar_usuario) -> None:
+    """vários empréstimos simultâneos do mesmo exemplar: só um passa"""
+    obra_id, usuario_id = criar_obra(titulo="Obra disputada")["id"], criar_usuario()["id"]
+    with SessionLocal() as db:
+        exemplar_id = db.query(Exemplar.id).filter(Exemplar.obraId == obra_id).scalar()
+    dados = EmprestimoCreate(
+        usuarioId=usuario_id,
+        exemplarId=exemplar_id,
+        obraId=obra_id,
+        dataEmprestimo="2025-01-01",
+        dataPrevistaDevolucao="2025-01-15",
+    )
+
+    resultados = _em_paralelo(lambda db: _criar_emprestimo(db, dados).id)
+
+    sucessos = [r for r in resultados if isinstance(r, str)]
+    assert len(sucessos) == 1
+    assert all(r == 400 for r in resultados if not isinstance(r, str))
+    assert cliente.get(f"/obras/{obra_id}").json()["exemplaresDisponiveis"] == 0
+    assert cliente.get(f"/exemplares/{exemplar_id}").json()["status"] == "emprestado"
+
+    # devoluções simultâneas do mesmo empréstimo: o contador volta uma vez só
+    devolucao = EmprestimoUpdate(dataDevolucao="2025-01-10")
+    resultados = _em_paralelo(lambda db: _atualizar_emprestimo(db, sucessos[0], devolucao).id)
+
+    assert len([r for r in resultados if isinstance(r, str)]) == 1
+    assert cliente.get(f"/obras/{obra_id}").json()["exemplaresDisponiveis"] == 1
+    assert cliente.get(f"/exemplares/{exemplar_id}").json()["status"] == "disponivel"
+
+
+def test_cadastro_e_exclusao_simultaneos_de_exemplares(cliente, criar_obra) -> None:
+    """os contadores da obra são somados no banco: nenhum cadastro se perde"""
+    obra_id = criar_obra()["id"]
+    codigos = iter(range(THREADS))
+    criados = _em_paralelo(lambda db: _criar_exemplar(db, ExemplarCreate(
+        obraId=obra_id, codigo=f"{obra_id[:8]}-{next(codigos)}"
+    )).id)
+
+    obra = cliente.get(f"/obras/{obra_id}").json()
+    assert (obra["totalExemplares"], obra["exemplaresDisponiveis"]) == (THREADS + 1, THREADS + 1)
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        respostas = list(executor.map(lambda id_: cliente.delete(f"/exemplares/{id_}"), criados))
+    assert all(response.status_code == 204 for response in respostas)
+    obra = cliente.get(f"/obras/{obra_id}").json()
+    assert (obra["totalExemplares"], obra["exemplaresDisponiveis"]) == (1, 1)
@@ -0,0 +1,110 @@
+"""testes das requisições condicionais (ETag / Last-Modified)"""
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from cache import catalogo
+from database import init_db
+from main import app
+
+init_db()
+client = TestClient(app)
+
+
+def test_registro(criar_obra, consultas) -> None:
+    """ETag forte por registro; 304 com e sem cache, novo ETag após alteração"""
+    obra = criar_obra()
+    url = f"/obras/{obra['id']}"
+
+    response = client.get(url)
+    etag = response.headers["etag"]
+    assert not etag.startswith("W/")
+    assert response.headers["last-modified"].endswith("GMT")
+    assert response.headers["cache-control"] == "no-cache"
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+    assert response.headers["etag"] == etag and consultas(response) == 0
+
+    # fora do cache: uma consulta e nenhuma serialização
+    catalogo.limpar()
+    response = client.get(url, headers={"If-None-Match": f'"outro", {etag}'})
+    assert response.status_code == 304 and consultas(response) == 1
+
+    response = client.get(url, headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert response.status_code == 304
+
+    client.put(url, json={"titulo": "Novo título"})
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["titulo"] == "Novo título"
+    assert response.headers["etag"] != etag
+
+    # demais recursos
+    exemplar = client.get("/exemplares/", params={"limit": 1}).json()["items"][0]
+    response = client.get(f"/exemplares/{exemplar['id']}")
+    assert response.json()["id"] == exemplar["id"]
+    response = client.get(f"/exemplares/{exemplar['id']}", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+
+def test_colecao(criar_categoria, criar_obra, consultas) -> None:
+    """ETag fraco por listagem, calculado sem carregar as linhas"""
+    categoria = criar_categoria("Condicional")
+    obra = criar_obra(categoria["id"])
+    filtro = {"categoriaId": categoria["id"]}
+
+    response = client.get("/obras/", params=filtro)
+    etag = response.headers["etag"]
+    assert etag.startswith("W/")
+
+    catalogo.limpar()
+    response = client.get("/obras/", params=filtro, headers={"If-None-Match": etag})
+    assert response.status_code == 304 and consultas(response) == 1
+
+    # outro filtro, outra listagem
+    assert client.get("/obras/", params={**filtro, "limit": 1}).headers["etag"] != etag
+
+    # inclusão, alteração e exclusão mudam o validador
+    etags = {etag}
+    segunda = criar_obra(categoria["id"])
+    etags.add(client.get("/obras/", params=filtro).headers["etag"])
+    client.put(f"/obras/{obra['id']}", json={"descricao": "Alterada"})
+    etags.add(client.get("/obras/", params=filtro).headers["etag"])
+    client.delete(f"/obras/{segunda['id']}")
+    etags.add(client.get("/obras/", params=filtro).headers["etag"])
+    assert len(etags) == 4
+
+    response = client.get("/categorias/", headers={"If-None-Match": "*"})
+    assert response.status_code == 304
+
+
+def test_pagina_por_cursor_sem_validadores(criar_categoria, criar_obra) -> None:
+    """páginas seguintes só calculam o validador se a requisição for condicional"""
+    categoria = criar_categoria("Condicional")
+    for _ in range(3):
+        criar_obra(categoria["id"])
+    filtro = {"categoriaId": categoria["id"], "limit": 1}
+    cursor = client.get("/obras/", params=filtro).json()["next_cursor"]
+
+    instrucoes: list[str] = []
+
+    def capturar(conn, cursor_db, sql, parametros, contexto, executemany) -> None:
+        instrucoes.append(sql.lower())
+
+    catalogo.limpar()
+    event.listen(Engine, "before_cursor_execute", capturar)
+    try:
+        response = client.get("/obras/", params={**filtro, "cursor": cursor})
+        assert response.status_code == 200 and "etag" not in response.headers
+        assert instrucoes and not any("max(" in sql or "count(" in sql for sql in instrucoes)
+
+        instrucoes.clear()
+        catalogo.limpar()
+        response = client.get("/obras/", params={**filtro, "cursor": cursor}, headers={"If-None-Match": '"x"'})
+        assert response.status_code == 200 and response.headers["etag"].startswith("W/")
+        assert any("max(" in sql for sql in instrucoes)
+    finally:
+        event.remove(Engine, "before_cursor_execute", capturar)
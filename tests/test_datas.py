@@ -0,0 +1,125 @@
+"""testes das datas de circulação gravadas como DATE"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sqlalchemy import Date, inspect, text
+
+from database import SessionLocal, engine, init_db
+from models.exemplar import Exemplar
+from services.atraso_service import executar_varredura
+
+
+def test_formato_e_filtro_por_data_prevista(cliente, criar_obra, criar_usuario) -> None:
+    """as datas saem como YYYY-MM-DD e o filtro por período compara datas"""
+    obra = criar_obra(titulo="Obra datada")
+    usuario = criar_usuario()
+    assert usuario["dataCadastro"] == "2025-01-01"
+    with SessionLocal() as db:
+        exemplar_id = db.query(Exemplar.id).filter(Exemplar.obraId == obra["id"]).scalar()
+
+    response = cliente.post("/emprestimos/", json={
+        "usuarioId": usuario["id"],
+        "exemplarId": exemplar_id,
+        "obraId": obra["id"],
+        "dataEmprestimo": "2025-02-01",
+        "dataPrevistaDevolucao": "2025-02-15",
+    })
+    assert response.status_code == 201
+    emprestimo = response.json()
+    assert emprestimo["dataPrevistaDevolucao"] == "2025-02-15"
+    assert emprestimo["dataDevolucao"] is None
+
+    periodo = {"usuarioId": usuario["id"], "dataPrevistaDe": "2025-02-15", "dataPrevistaAte": "2025-02-15"}
+    ids = [item["id"] for item in cliente.get("/emprestimos/", params=periodo).json()["items"]]
+    assert ids == [emprestimo["id"]]
+
+    periodo["dataPrevistaDe"] = "2025-02-16"
+    periodo["dataPrevistaAte"] = "2025-12-31"
+    assert cliente.get("/emprestimos/", params=periodo).json()["items"] == []
+
+
+def test_data_invalida(cliente) -> None:
+    """datas fora do calendário são rejeitadas na validação"""
+    response = cliente.get("/emprestimos/", params={"dataPrevistaDe": "2025-02-30"})
+    assert response.status_code == 422
+
+
+def _gravar_como_texto(valores: list[tuple[str, str, str, str]]) -> None:
+    """simula um banco antigo: datas em colunas de texto, com hora"""
+    with engine.begin() as conn:
+        if conn.dialect.name != "sqlite":
+            for tabela, coluna in {(tabela, coluna) for tabela, coluna, _, _ in valores}:
+                conn.execute(text(
+                    f"ALTER TABLE {tabela} ALTER COLUMN {coluna} TYPE VARCHAR USING {coluna}::text"
+                ))
+        for tabela, coluna, id_, valor in valores:
+            conn.execute(text(f"UPDATE {tabela} SET {coluna} = :valor WHERE id = :id"), {"valor": valor, "id": id_})
+
+
+def test_migracao_de_datas_em_texto(cliente, criar_obra, criar_usuario) -> None:
+    """valores legados 'YYYY-MM-DD HH:MM:SS' viram datas e voltam a comparar certo"""
+    obra = criar_obra(exemplares=2)
+    usuario = criar_usuario()
+    with SessionLocal() as db:
+        exemplares = [e.id for e in db.query(Exemplar).filter(Exemplar.obraId == obra["id"])]
+    hoje = date.today()
+    ontem = hoje - timedelta(days=1)
+
+    emprestimos = []
+    for exemplar_id in exemplares:
+        response = cliente.post("/emprestimos/", json={
+            "usuarioId": usuario["id"],
+            "exemplarId": exemplar_id,
+            "obraId": obra["id"],
+            "dataEmprestimo": (hoje - timedelta(days=14)).isoformat(),
+            "dataPrevistaDevolucao": (hoje + timedelta(days=7)).isoformat(),
+        })
+        assert response.status_code == 201
+        emprestimos.append(response.json()["id"])
+    reserva = cliente.post("/reservas/", json={
+        "usuarioId": usuario["id"],
+        "obraId": obra["id"],
+        "dataReserva": hoje.isoformat(),
+        "dataExpiracao": (hoje + timedelta(days=3)).isoformat(),
+    })
+    assert reserva.status_code == 201
+    vencido, em_dia = emprestimos
+
+    _gravar_como_texto([
+        ("emprestimos", "data_emprestimo", vencido, f"{ontem - timedelta(days=14)} 00:00:00"),
+        ("emprestimos", "data_prevista_devolucao", vencido, f"{ontem} 00:00:00"),
+        ("emprestimos", "data_prevista_devolucao", em_dia, f"{hoje} 00:00:00"),
+        ("reservas", "data_reserva", reserva.json()["id"], f"{hoje} 09:30:00"),
+    ])
+
+    init_db()
+
+    with engine.connect() as conn:
+        if conn.dialect.name != "sqlite":
+            colunas = {c["name"]: c["type"] for c in inspect(conn).get_columns("emprestimos")}
+            assert isinstance(colunas["data_prevista_devolucao"], Date)
+        gravadas = dict(conn.execute(
+            text("SELECT id, data_prevista_devolucao FROM emprestimos WHERE id IN (:a, :b)"),
+            {"a": vencido, "b": em_dia},
+        ).all())
+        data_reserva = conn.execute(
+            text("SELECT data_reserva FROM reservas WHERE id = :id"), {"id": reserva.json()["id"]}
+        ).scalar()
+    assert {id_: str(valor) for id_, valor in gravadas.items()} == {vencido: str(ontem), em_dia: str(hoje)}
+    assert str(data_reserva) == str(hoje)
+
+    response = cliente.get(f"/emprestimos/{vencido}").json()
+    assert response["dataEmprestimo"] == str(ontem - timedelta(days=14))
+    assert cliente.get(f"/reservas/{reserva.json()['id']}").json()["dataReserva"] == str(hoje)
+
+    # vence ontem: atrasado; vence hoje: ainda ativo
+    executar_varredura()
+    assert cliente.get(f"/emprestimos/{vencido}").json()["status"] == "atrasado"
+    assert cliente.get(f"/emprestimos/{em_dia}").json()["status"] == "ativo"
+
+    # com hora, 'YYYY-MM-DD 00:00:00' ficava fora de um período que termina no mesmo dia
+    periodo = {"usuarioId": usuario["id"], "dataPrevistaDe": str(ontem), "dataPrevistaAte": str(hoje)}
+    assert {item["id"] for item in cliente.get("/emprestimos/", params=periodo).json()["items"]} == {vencido, em_dia}
+    periodo["dataPrevistaAte"] = str(ontem)
+    assert [item["id"] for item in cliente.get("/emprestimos/", params=periodo).json()["items"]] == [vencido]
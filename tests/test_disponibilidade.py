@@ -0,0 +1,137 @@
+"""testes do stream (SSE) de disponibilidade das obras"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import uuid
+from pathlib import Path
+
+BACKEND_SRC = Path(__file__).resolve().parent.parent / "backend" / "src"
+sys.path.insert(0, str(BACKEND_SRC))
+
+from fastapi.testclient import TestClient
+
+from database import SessionLocal, init_db
+from disponibilidade import Difusor, difusor
+from main import app
+from models.exemplar import Exemplar
+
+init_db()
+client = TestClient(app)
+
+_ESCOPO = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/obras/disponibilidade/stream",
+    "raw_path": b"/obras/disponibilidade/stream",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [],
+    "client": ("teste", 1),
+    "server": ("teste", 80),
+}
+
+
+def _preparar_obra() -> tuple[dict, dict, list[str]]:
+    """obra com dois exemplares e um usuário para o empréstimo"""
+    categoria = client.post("/categorias/", json={"nome": f"Stream {uuid.uuid4()}"}).json()
+    obra = client.post("/obras/", json={
+        "titulo": "Obra transmitida",
+        "autor": "Autor",
+        "isbn": f"978{uuid.uuid4().hex[:10]}",
+        "categoriaId": categoria["id"],
+        "totalExemplares": 2,
+        "exemplaresDisponiveis": 2,
+    }).json()
+    usuario = client.post("/usuarios/", json={
+        "nome": "Leitor",
+        "cpf": str(uuid.uuid4().int)[:11],
+        "email": f"{uuid.uuid4().hex[:10]}@exemplo.com",
+        "senha": "segredo1",
+        "dataCadastro": "2025-01-01",
+    }).json()
+    with SessionLocal() as db:
+        exemplares = [e.id for e in db.query(Exemplar).filter(Exemplar.obraId == obra["id"]).order_by(Exemplar.codigo)]
+    return obra, usuario, exemplares
+
+
+async def _proximo_evento(enviados: asyncio.Queue, obra_id: str) -> dict:
+    """lê o corpo da resposta até o evento da obra"""
+    while True:
+        mensagem = await asyncio.wait_for(enviados.get(), 5)
+        for bloco in mensagem.get("body", b"").decode().split("\n\n"):
+            if bloco.startswith("event: disponibilidade\ndata: "):
+                dados = json.loads(bloco.split("data: ", 1)[1])
+                if dados["obraId"] == obra_id:
+                    return dados
+
+
+def test_stream_recebe_circulacao() -> None:
+    """empréstimo, devolução e exclusão de exemplar chegam ao stream após o commit"""
+    obra, usuario, exemplares = _preparar_obra()
+
+    async def cenario() -> list[dict]:
+        enviados: asyncio.Queue = asyncio.Queue()
+        desconectar = asyncio.Event()
+
+        async def receive():
+            await desconectar.wait()
+            return {"type": "http.disconnect"}
+
+        tarefa = asyncio.create_task(app(_ESCOPO, receive, enviados.put))
+        inicio = await asyncio.wait_for(enviados.get(), 5)
+        assert inicio["status"] == 200
+        assert (b"content-type", b"text/event-stream; charset=utf-8") in inicio["headers"]
+        assert (await enviados.get())["body"].startswith(b"retry:")
+
+        eventos = []
+        emprestimo = (await asyncio.to_thread(client.post, "/emprestimos/", json={
+            "usuarioId": usuario["id"],
+            "exemplarId": exemplares[0],
+            "obraId": obra["id"],
+            "dataEmprestimo": "2025-01-01",
+            "dataPrevistaDevolucao": "2025-01-15",
+        })).json()
+        eventos.append(await _proximo_evento(enviados, obra["id"]))
+
+        await asyncio.to_thread(client.put, f"/emprestimos/{emprestimo['id']}", json={"dataDevolucao": "2025-01-10"})
+        eventos.append(await _proximo_evento(enviados, obra["id"]))
+
+        await asyncio.to_thread(client.delete, f"/exemplares/{exemplares[1]}")
+        eventos.append(await _proximo_evento(enviados, obra["id"]))
+
+        desconectar.set()
+        await asyncio.wait_for(tarefa, 5)
+        return eventos
+
+    eventos = asyncio.run(cenario())
+    assert [(e["exemplaresDisponiveis"], e["totalExemplares"]) for e in eventos] == [(1, 2), (2, 2), (1, 1)]
+    assert difusor.conectados == 0
+
+
+def test_cliente_lento_e_pulso() -> None:
+    """fila cheia desconecta o cliente lento; sem eventos, só o keep-alive"""
+
+    async def cenario() -> None:
+        teste = Difusor(tamanho_fila=2, pulso=0.05)
+        lento, rapido = teste.transmitir(), teste.transmitir()
+        await anext(lento)
+        await anext(rapido)
+
+        for i in range(3):
+            teste.publicar([{"obraId": str(i)}])
+            assert b'"obraId": "%d"' % i in await anext(rapido)
+
+        # a terceira mensagem não coube na fila do lento
+        assert [mensagem async for mensagem in lento] == []
+        assert teste.conectados == 1
+
+        assert await anext(rapido) == b": pulso\n\n"
+        await rapido.aclose()
+        assert teste.conectados == 0
+
+    asyncio.run(cenario())
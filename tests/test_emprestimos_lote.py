@@ -0,0 +1,62 @@
+"""testes do empréstimo e da devolução em lote por código de exemplar"""
+from __future__ import annotations
+
+from database import SessionLocal
+from models.exemplar import Exemplar
+
+
+def _codigos(obra: dict) -> list[str]:
+    with SessionLocal() as db:
+        return [e.codigo for e in db.query(Exemplar).filter(Exemplar.obraId == obra["id"]).order_by(Exemplar.codigo)]
+
+
+def test_emprestimo_e_devolucao_em_lote(cliente, criar_categoria, criar_obra, criar_usuario) -> None:
+    """itens válidos passam, inválidos voltam com erro e os contadores fecham"""
+    categoria = criar_categoria("Lote")
+    usuario = criar_usuario()
+    obra_a = criar_obra(categoria["id"], exemplares=2, titulo="Obra do lote")
+    obra_b = criar_obra(categoria["id"], titulo="Obra do lote")
+    codigos_a, codigos_b = _codigos(obra_a), _codigos(obra_b)
+
+    response = cliente.post("/emprestimos/lote", json={
+        "usuarioId": usuario["id"],
+        "codigos": codigos_a + codigos_b + [codigos_b[0], "nao-existe"],
+        "dataEmprestimo": "2025-01-01",
+        "dataPrevistaDevolucao": "2025-01-15",
+    })
+    assert response.status_code == 200
+    lote = response.json()
+    assert lote["processados"] == 3
+    assert [item["erro"] for item in lote["itens"][3:]] == ["Código repetido no lote", "Exemplar não encontrado"]
+    assert cliente.get(f"/obras/{obra_a['id']}").json()["exemplaresDisponiveis"] == 0
+    assert cliente.get(f"/obras/{obra_b['id']}").json()["exemplaresDisponiveis"] == 0
+
+    # exemplares já emprestados não podem sair de novo
+    response = cliente.post("/emprestimos/lote", json={
+        "usuarioId": usuario["id"],
+        "codigos": codigos_b,
+        "dataEmprestimo": "2025-01-02",
+        "dataPrevistaDevolucao": "2025-01-16",
+    })
+    assert response.json()["itens"][0]["erro"] == "Exemplar não está disponível"
+
+    response = cliente.post("/emprestimos/devolucoes/lote", json={
+        "codigos": codigos_a + codigos_b,
+        "dataDevolucao": "2025-01-10",
+    })
+    assert response.status_code == 200
+    assert response.json()["processados"] == 3
+    assert all(item["emprestimo"]["status"] == "devolvido" for item in response.json()["itens"])
+    assert cliente.get(f"/obras/{obra_a['id']}").json()["exemplaresDisponiveis"] == 2
+    assert cliente.get(f"/obras/{obra_b['id']}").json()["exemplaresDisponiveis"] == 1
+
+
+def test_lote_usuario_inexistente(cliente) -> None:
+    """o usuário é validado uma vez, antes de qualquer item"""
+    response = cliente.post("/emprestimos/lote", json={
+        "usuarioId": "nao-existe",
+        "codigos": ["qualquer"],
+        "dataEmprestimo": "2025-01-01",
+        "dataPrevistaDevolucao": "2025-01-15",
+    })
+    assert response.status_code == 404
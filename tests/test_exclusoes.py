@@ -0,0 +1,107 @@
+"""testes das exclusões em cascata feitas pelo banco"""
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, func, insert
+
+from database import SessionLocal, init_db
+from identificadores import gerar_id
+from main import app
+from models.emprestimo import Emprestimo, StatusEmprestimo
+from models.exemplar import Exemplar
+from models.registro_exclusao import RegistroExclusao
+
+init_db()
+client = TestClient(app)
+
+
+@pytest.fixture
+def obra_com_emprestimos(criar_obra, criar_usuario):
+    """
+    Os empréstimos criados aqui, e os registros de exclusão que a cascata
+    gera para eles, são apagados ao fim do teste: o banco é o compartilhado.
+    """
+    obras = []
+    with SessionLocal() as db:
+        ultimo_registro = db.query(func.max(RegistroExclusao.id)).scalar() or 0
+
+    def criar(categoria_id: str, quantidade: int) -> str:
+        """cria uma obra com um exemplar e `quantidade` empréstimos já devolvidos"""
+        obra = criar_obra(categoria_id, titulo="Obra antiga")
+        usuario = criar_usuario()
+
+        with SessionLocal() as db:
+            exemplar_id = db.query(Exemplar.id).filter(Exemplar.obraId == obra["id"]).scalar()
+            dia = date(2020, 1, 1)
+            db.execute(insert(Emprestimo), [
+                {
+                    "id": gerar_id(),
+                    "usuarioId": usuario["id"],
+                    "exemplarId": exemplar_id,
+                    "obraId": obra["id"],
+                    "dataEmprestimo": dia,
+                    "dataPrevistaDevolucao": dia,
+                    "dataDevolucao": dia,
+                    "status": StatusEmprestimo.devolvido,
+                }
+                for _ in range(quantidade)
+            ])
+            db.commit()
+        obras.append(obra["id"])
+        return obra["id"]
+
+    yield criar
+
+    with SessionLocal() as db:
+        db.execute(delete(Emprestimo).where(Emprestimo.obraId.in_(obras)))
+        db.execute(delete(RegistroExclusao).where(
+            RegistroExclusao.tabela == "emprestimos", RegistroExclusao.id > ultimo_registro
+        ))
+        db.commit()
+
+
+@pytest.fixture
+def excluir(consultas):
+    def executar(url: str) -> int:
+        """exclui e devolve o número de instruções SQL da requisição"""
+        response = client.delete(url)
+        assert response.status_code == 204
+        return consultas(response)
+
+    return executar
+
+
+def _emprestimos_da_obra(obra_id: str) -> int:
+    with SessionLocal() as db:
+        return db.query(func.count(Emprestimo.id)).filter(Emprestimo.obraId == obra_id).scalar()
+
+
+def test_excluir_obra_nao_depende_do_historico(criar_categoria, obra_com_emprestimos, excluir) -> None:
+    """excluir obra com 100 mil empréstimos custa as mesmas instruções que com um"""
+    categoria = criar_categoria("Exclusão")
+    pequena = obra_com_emprestimos(categoria["id"], 1)
+    grande = obra_com_emprestimos(categoria["id"], 100_000)
+
+    instrucoes_pequena = excluir(f"/obras/{pequena}")
+    instrucoes_grande = excluir(f"/obras/{grande}")
+
+    assert instrucoes_grande == instrucoes_pequena <= 2
+    assert _emprestimos_da_obra(grande) == 0
+    assert client.get(f"/obras/{grande}").status_code == 404
+    assert client.delete(f"/obras/{grande}").status_code == 404
+
+
+def test_excluir_categoria(criar_categoria, obra_com_emprestimos, excluir) -> None:
+    """categoria com obras não é excluída; vazia sai com uma instrução"""
+    categoria = criar_categoria("Exclusão")
+    obra_id = obra_com_emprestimos(categoria["id"], 1)
+
+    response = client.delete(f"/categorias/{categoria['id']}")
+    assert response.status_code == 400
+
+    excluir(f"/obras/{obra_id}")
+    assert excluir(f"/categorias/{categoria['id']}") <= 2
+    assert client.delete(f"/categorias/{categoria['id']}").status_code == 404
@@ -0,0 +1,105 @@
+"""testes dos filtros e ordenações das listagens de obras e empréstimos"""
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from database import SessionLocal, init_db
+from main import app
+from models.exemplar import Exemplar, StatusExemplar
+
+init_db()
+client = TestClient(app)
+
+
+def _ids(url: str, **params) -> list[str]:
+    response = client.get(url, params=params)
+    assert response.status_code == 200
+    return [item["id"] for item in response.json()["items"]]
+
+
+def _emprestar(obra: dict, usuario: dict, prevista: str) -> dict:
+    with SessionLocal() as db:
+        exemplar_id = db.query(Exemplar.id).filter(
+            Exemplar.obraId == obra["id"], Exemplar.status == StatusExemplar.disponivel
+        ).first()[0]
+    response = client.post("/emprestimos/", json={
+        "usuarioId": usuario["id"],
+        "exemplarId": exemplar_id,
+        "obraId": obra["id"],
+        "dataEmprestimo": "2025-03-01",
+        "dataPrevistaDevolucao": prevista,
+    })
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_filtros_de_obras(criar_categoria, criar_obra, criar_usuario) -> None:
+    """categoria, autor, faixa de ano e disponibilidade combinados no banco"""
+    categoria = criar_categoria("Filtros")
+    antiga = criar_obra(categoria["id"], titulo="Antiga", autor="Machado", anoPublicacao=1899)
+    nova = criar_obra(categoria["id"], titulo="Nova", autor="Clarice", anoPublicacao=1977)
+    emprestada = criar_obra(categoria["id"], titulo="Emprestada", autor="Machado", anoPublicacao=1881)
+    _emprestar(emprestada, criar_usuario(), "2025-03-15")
+    criar_obra(autor="Machado")
+
+    por_categoria = {"categoriaId": categoria["id"]}
+    assert set(_ids("/obras/", **por_categoria)) == {antiga["id"], nova["id"], emprestada["id"]}
+    assert set(_ids("/obras/", **por_categoria, autor="Machado")) == {antiga["id"], emprestada["id"]}
+    assert _ids("/obras/", **por_categoria, anoPublicacaoMin=1890, anoPublicacaoMax=1900) == [antiga["id"]]
+    assert _ids("/obras/", **por_categoria, anoPublicacaoMin=1900) == [nova["id"]]
+    assert _ids("/obras/", **por_categoria, disponivel=False) == [emprestada["id"]]
+    assert set(_ids("/obras/", **por_categoria, disponivel=True)) == {antiga["id"], nova["id"]}
+
+
+def test_ordenacao_de_obras(criar_categoria, criar_obra) -> None:
+    """campos da lista permitida, em ordem crescente ou decrescente; os demais dão 400"""
+    categoria = criar_categoria("Ordenação")
+    obras = {titulo: criar_obra(categoria["id"], titulo=titulo)["id"] for titulo in ("Beta", "Alfa", "Gama")}
+    por_categoria = {"categoriaId": categoria["id"]}
+
+    assert _ids("/obras/", **por_categoria, ordenar="titulo") == [obras["Alfa"], obras["Beta"], obras["Gama"]]
+    assert _ids("/obras/", **por_categoria, ordenar="-titulo") == [obras["Gama"], obras["Beta"], obras["Alfa"]]
+
+    # a página seguinte continua na mesma ordem decrescente
+    primeira = client.get("/obras/", params={**por_categoria, "ordenar": "-titulo", "limit": 2}).json()
+    resto = _ids("/obras/", **por_categoria, ordenar="-titulo", cursor=primeira["next_cursor"])
+    assert [item["id"] for item in primeira["items"]] + resto == [obras["Gama"], obras["Beta"], obras["Alfa"]]
+
+    for ordenar in ("isbn", "-senha", ""):
+        response = client.get("/obras/", params={**por_categoria, "ordenar": ordenar})
+        assert response.status_code == 400
+
+
+def test_filtros_e_ordenacao_de_emprestimos(criar_obra, criar_usuario) -> None:
+    """usuário, obra, status e período de devolução; ordenação pela data prevista"""
+    obra = criar_obra(exemplares=3)
+    outra_obra = criar_obra()
+    usuario = criar_usuario()
+    tarde = _emprestar(obra, usuario, "2025-03-20")
+    cedo = _emprestar(obra, usuario, "2025-03-10")
+    devolvido = _emprestar(obra, usuario, "2025-03-15")
+    client.put(f"/emprestimos/{devolvido['id']}", json={"dataDevolucao": "2025-03-12"})
+    de_outra_obra = _emprestar(outra_obra, usuario, "2025-03-11")
+    de_outro_usuario = _emprestar(criar_obra(), criar_usuario(), "2025-03-11")
+
+    por_usuario = {"usuarioId": usuario["id"]}
+    assert set(_ids("/emprestimos/", **por_usuario)) == {
+        tarde["id"], cedo["id"], devolvido["id"], de_outra_obra["id"]
+    }
+    assert de_outro_usuario["id"] not in _ids("/emprestimos/", **por_usuario)
+    assert set(_ids("/emprestimos/", obraId=obra["id"])) == {tarde["id"], cedo["id"], devolvido["id"]}
+    assert _ids("/emprestimos/", **por_usuario, status="devolvido") == [devolvido["id"]]
+    assert set(_ids("/emprestimos/", obraId=obra["id"], status="ativo")) == {tarde["id"], cedo["id"]}
+    assert set(_ids("/emprestimos/", **por_usuario, dataPrevistaDe="2025-03-11", dataPrevistaAte="2025-03-15")) == {
+        devolvido["id"], de_outra_obra["id"]
+    }
+
+    assert _ids("/emprestimos/", obraId=obra["id"], ordenar="dataPrevistaDevolucao") == [
+        cedo["id"], devolvido["id"], tarde["id"]
+    ]
+    assert _ids("/emprestimos/", obraId=obra["id"], ordenar="-dataPrevistaDevolucao") == [
+        tarde["id"], devolvido["id"], cedo["id"]
+    ]
+
+    assert client.get("/emprestimos/", params={"ordenar": "status"}).status_code == 400
+    assert client.get("/emprestimos/", params={"status": "perdido"}).status_code == 422
@@ -0,0 +1,52 @@
+"""testes da geração de ids ordenados no tempo"""
+from __future__ import annotations
+
+import sys
+import uuid
+from pathlib import Path
+
+BACKEND_SRC = Path(__file__).resolve().parent.parent / "backend" / "src"
+sys.path.insert(0, str(BACKEND_SRC))
+
+from fastapi.testclient import TestClient
+
+from database import init_db
+from identificadores import eh_uuid7, uuid7
+from main import app
+
+init_db()
+client = TestClient(app)
+
+
+def test_uuid7_valido_e_crescente() -> None:
+    """ids gerados em sequência são UUIDv7 válidos e estritamente crescentes"""
+    ids = [uuid7() for _ in range(5000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    for valor in ids[:10]:
+        convertido = uuid.UUID(valor)
+        assert convertido.version == 7
+        assert convertido.variant == uuid.RFC_4122
+
+
+def test_uuid7_com_instante_explicito() -> None:
+    """o instante informado vai para os 48 bits iniciais"""
+    valor = uuid7(1_700_000_000_000)
+    assert uuid.UUID(valor).int >> 80 == 1_700_000_000_000
+    assert eh_uuid7(valor)
+    assert not eh_uuid7(str(uuid.uuid4()))
+
+
+def test_registros_novos_recebem_uuid7() -> None:
+    response = client.post("/categorias/", json={"nome": f"Ids {uuid.uuid4()}"})
+    assert response.status_code == 201
+    assert eh_uuid7(response.json()["id"])
+
+
+def test_migracao_ignora_tabelas_sem_id_texto() -> None:
+    """migrar_ids percorre só as entidades (id texto + criado_em)"""
+    from migrar_ids import _tabelas_com_ids
+
+    assert {tabela.name for tabela in _tabelas_com_ids()} == {
+        "administradores", "categorias", "emprestimos", "exemplares", "obras", "reservas", "usuarios",
+    }
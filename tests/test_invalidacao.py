@@ -0,0 +1,109 @@
+"""testes do barramento de invalidação entre workers"""
+from __future__ import annotations
+
+import queue
+import sys
+import time
+from pathlib import Path
+
+BACKEND_SRC = Path(__file__).resolve().parent.parent / "backend" / "src"
+sys.path.insert(0, str(BACKEND_SRC))
+
+from database import engine, init_db
+from invalidacao import Evento, TransporteBanco, TransporteRedis
+
+init_db()
+
+
+class _AssinaturaFalsa:
+    def __init__(self, redis: "_RedisFalso"):
+        self.redis = redis
+        self.mensagens: queue.Queue = queue.Queue()
+
+    def subscribe(self, canal: str) -> None:
+        self.redis.assinaturas.setdefault(canal, []).append(self)
+
+    def get_message(self, timeout: float):
+        try:
+            return self.mensagens.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        for assinaturas in self.redis.assinaturas.values():
+            if self in assinaturas:
+                assinaturas.remove(self)
+
+
+class _RedisFalso:
+    """o subconjunto do cliente redis usado pelo transporte"""
+
+    def __init__(self):
+        self.valores: dict[str, int] = {}
+        self.assinaturas: dict[str, list[_AssinaturaFalsa]] = {}
+
+    def incr(self, chave: str) -> int:
+        self.valores[chave] = self.valores.get(chave, 0) + 1
+        return self.valores[chave]
+
+    def publish(self, canal: str, dados: str) -> int:
+        assinaturas = self.assinaturas.get(canal, [])
+        for assinatura in assinaturas:
+            assinatura.mensagens.put({"type": "message", "data": dados})
+        return len(assinaturas)
+
+    def pubsub(self, ignore_subscribe_messages: bool = False) -> _AssinaturaFalsa:
+        return _AssinaturaFalsa(self)
+
+
+def _aguardar(recebidos: queue.Queue) -> list[Evento]:
+    return recebidos.get(timeout=5)
+
+
+def test_transporte_redis() -> None:
+    """eventos chegam aos outros workers; um salto de versão invalida a tabela"""
+    redis = _RedisFalso()
+    worker_a, worker_b = TransporteRedis(cliente=redis), TransporteRedis(cliente=redis)
+    recebidos_a: queue.Queue = queue.Queue()
+    recebidos_b: queue.Queue = queue.Queue()
+    worker_a.iniciar(recebidos_a.put)
+    worker_b.iniciar(recebidos_b.put)
+    try:
+        while len(redis.assinaturas.get(worker_a.canal, [])) < 2:
+            time.sleep(0.01)
+
+        worker_a.publicar([Evento("obras", "abc")])
+        assert _aguardar(recebidos_b) == [Evento("obras", "abc", 1)]
+
+        # uma mensagem perdida: a versão pula de 1 para 3
+        redis.incr(f"{worker_a.canal}:versao:obras")
+        worker_a.publicar([Evento("obras", "def")])
+        assert _aguardar(recebidos_b) == [Evento("obras", None, 3)]
+
+        # o próprio worker não recebe de volta o que publicou
+        assert recebidos_a.empty()
+    finally:
+        worker_a.parar()
+        worker_b.parar()
+
+
+def test_transporte_banco() -> None:
+    """a versão por tabela no banco avisa os outros workers, não o que escreveu"""
+    worker_a, worker_b = TransporteBanco(engine, intervalo=60), TransporteBanco(engine, intervalo=60)
+    recebidos_a: list = []
+    recebidos_b: list = []
+    worker_a.iniciar(recebidos_a.extend)
+    worker_b.iniciar(recebidos_b.extend)
+    try:
+        worker_a.publicar([Evento("categorias", "abc"), Evento("categorias", "def")])
+        worker_a.verificar()
+        worker_b.verificar()
+
+        assert recebidos_a == []
+        assert [(e.tabela, e.id) for e in recebidos_b] == [("categorias", None)]
+
+        worker_b.verificar()
+        assert len(recebidos_b) == 1
+    finally:
+        worker_a.parar()
+        worker_b.parar()
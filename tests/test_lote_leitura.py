@@ -0,0 +1,43 @@
+"""testes das buscas em lote (POST /{coleção}/batch)"""
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from database import init_db
+from main import app
+
+init_db()
+client = TestClient(app)
+
+
+def test_ordem_repetidos_e_ausentes(criar_categoria, criar_obra, consultas) -> None:
+    """uma consulta; itens na ordem pedida, sem repetição, e ids inexistentes à parte"""
+    categoria = criar_categoria("Lote")
+    obras = [criar_obra(categoria["id"])["id"] for _ in range(3)]
+    pedidos = [obras[2], "inexistente", obras[0], obras[2], obras[1]]
+
+    response = client.post("/obras/batch", json={"ids": pedidos})
+    assert response.status_code == 200
+    corpo = response.json()
+    assert [item["id"] for item in corpo["items"]] == [obras[2], obras[0], obras[1]]
+    assert corpo["ausentes"] == ["inexistente"]
+    assert consultas(response) == 1
+
+
+def test_usuarios_e_exemplares(criar_usuario, consultas) -> None:
+    usuario = criar_usuario()
+    response = client.post("/usuarios/batch", json={"ids": ["x", usuario["id"]]})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [usuario["id"]]
+    assert "senha" not in response.json()["items"][0]
+    assert response.json()["ausentes"] == ["x"]
+
+    exemplares = [e["id"] for e in client.get("/exemplares/", params={"limit": 3}).json()["items"]]
+    response = client.post("/exemplares/batch", json={"ids": exemplares[::-1]})
+    assert [item["id"] for item in response.json()["items"]] == exemplares[::-1]
+    assert consultas(response) == 1
+
+
+def test_limites() -> None:
+    assert client.post("/obras/batch", json={"ids": []}).status_code == 422
+    assert client.post("/obras/batch", json={"ids": [str(i) for i in range(201)]}).status_code == 422
@@ -0,0 +1,48 @@
+"""testes do endpoint de métricas (GET /metrics)"""
+from __future__ import annotations
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from cache import catalogo
+from database import async_engine
+
+
+def _amostras(cliente) -> dict[tuple, float]:
+    response = cliente.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    return {
+        (amostra.name, tuple(sorted(amostra.labels.items()))): amostra.value
+        for familia in text_string_to_metric_families(response.text)
+        for amostra in familia.samples
+    }
+
+
+def _serie(nome: str, **rotulos: str) -> tuple:
+    return nome, tuple(sorted(rotulos.items()))
+
+
+def test_latencia_pool_e_cache_da_rota(cliente, criar_obra) -> None:
+    """a requisição entra no histograma da rota (pelo template) e atualiza os gauges"""
+    obra = criar_obra()
+    rota = {"metodo": "GET", "rota": "/obras/{obra_id}"}
+    contagem = _serie("veridian_requisicao_duracao_segundos_count", **rota)
+    antes = _amostras(cliente).get(contagem, 0)
+
+    catalogo.limpar()
+    assert cliente.get(f"/obras/{obra['id']}").status_code == 200
+    amostras = _amostras(cliente)
+
+    assert amostras[contagem] == antes + 1
+    assert amostras[_serie("veridian_requisicao_duracao_segundos_bucket", **rota, le="+Inf")] == antes + 1
+    assert amostras[_serie("veridian_requisicao_duracao_segundos_sum", **rota)] > 0
+    assert amostras[_serie("veridian_requisicoes_total", **rota, status="200")] >= 1
+    assert amostras[_serie("veridian_db_consultas_total", **rota)] >= 1
+
+    pool = "principal_async" if async_engine is not None else "principal"
+    assert amostras[_serie("veridian_pool_conexoes_em_uso", engine=pool)] >= 0
+    assert _serie("veridian_pool_overflow", engine=pool) in amostras
+
+    assert amostras[_serie("veridian_cache_entradas", cache="catalogo")] >= 1
+    assert amostras[_serie("veridian_cache_bytes", cache="catalogo")] > 0
+    assert amostras[_serie("veridian_cache_operacoes_total", cache="catalogo", resultado="falha")] >= 1
@@ -0,0 +1,32 @@
+"""testes da instrumentação de SQL por requisição"""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from database import engine, init_db
+from monitoramento import EstatisticasRequisicao, estatisticas_atuais
+
+init_db()
+
+
+def test_instrucao_com_erro_nao_deixa_residuo() -> None:
+    """a instrução que falha não conta nem deixa estado na conexão do pool"""
+    estatisticas = EstatisticasRequisicao()
+    token = estatisticas_atuais.set(estatisticas)
+    try:
+        with engine.connect() as conn:
+            info_antes = repr(conn.info)
+            for _ in range(3):
+                with pytest.raises(DBAPIError):
+                    conn.execute(text("SELECT * FROM tabela_inexistente"))
+                conn.rollback()
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+            assert repr(conn.info) == info_antes
+    finally:
+        estatisticas_atuais.reset(token)
+
+    assert estatisticas.consultas == 1
+    assert estatisticas.por_instrucao == {"SELECT 1": 1}
+    assert 0 <= estatisticas.tempo_db < 1
@@ -0,0 +1,54 @@
+"""testes da paginação por cursor das listagens"""
+from __future__ import annotations
+
+import sys
+import uuid
+from pathlib import Path
+
+BACKEND_SRC = Path(__file__).resolve().parent.parent / "backend" / "src"
+sys.path.insert(0, str(BACKEND_SRC))
+
+from fastapi.testclient import TestClient
+
+from database import init_db
+from main import app
+
+init_db()
+client = TestClient(app)
+
+
+def test_percorre_todas_as_paginas_sem_repetir() -> None:
+    """cria categorias e percorre a listagem de uma em uma"""
+    criadas = set()
+    for _ in range(3):
+        response = client.post("/categorias/", json={"nome": f"Pag {uuid.uuid4()}"})
+        assert response.status_code == 201
+        criadas.add(response.json()["id"])
+
+    vistas = []
+    cursor = None
+    while True:
+        params = {"limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        pagina = client.get("/categorias/", params=params).json()
+        assert len(pagina["items"]) <= 1
+        vistas.extend(item["id"] for item in pagina["items"])
+        cursor = pagina["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(vistas) == len(set(vistas))
+    assert criadas <= set(vistas)
+
+
+def test_cursor_invalido() -> None:
+    """cursor corrompido retorna 400"""
+    response = client.get("/obras/", params={"cursor": "nao-e-um-cursor"})
+    assert response.status_code == 400
+
+
+def test_limite_acima_do_maximo() -> None:
+    """limit acima do máximo é rejeitado na validação"""
+    response = client.get("/obras/", params={"limit": 10_000})
+    assert response.status_code == 422
@@ -0,0 +1,164 @@
+"""testes dos planos de consulta: nenhuma rota pode varrer uma tabela inteira"""
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from cache import catalogo
+from database import SessionLocal, engine, init_db
+from main import app
+from models.exemplar import Exemplar
+from services.atraso_service import executar_varredura
+
+init_db()
+client = TestClient(app)
+
+# "SCAN tabela" sem índice = varredura completa; "SCAN tabela USING INDEX ..."
+# percorre um índice (listagens paginadas) e é aceito
+VARREDURA_COMPLETA = re.compile(r"^SCAN (\w+)$")
+# ordenação feita fora do índice (inclusive só o desempate por id)
+ORDENACAO_TEMPORARIA = "USE TEMP B-TREE FOR"
+
+# listagens ordenadas que devem sair na ordem do índice, sem ordenação à parte
+ORDENACOES_POR_INDICE = [
+    ("/obras/", {"autor": "Autor", "ordenar": "autor"}),
+    ("/obras/", {"ordenar": "-titulo"}),
+    ("/emprestimos/", {"ordenar": "dataPrevistaDevolucao"}),
+    ("/emprestimos/", {"ordenar": "-dataPrevistaDevolucao"}),
+]
+
+
+class _Captura:
+    """Guarda as instruções executadas em qualquer engine, agrupadas por rota."""
+
+    def __init__(self) -> None:
+        self.rota = ""
+        self.instrucoes: dict[str, dict[str, object]] = defaultdict(dict)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            if executemany:
+                parameters = parameters[0]
+            self.instrucoes[self.rota].setdefault(statement, parameters)
+
+    def chamar(self, metodo: str, url: str, **kwargs):
+        self.rota = f"{metodo} {url}"
+        return client.request(metodo, url, **kwargs)
+
+
+def _planos(captura: _Captura):
+    """(rota, instrução, linhas do EXPLAIN QUERY PLAN) de cada instrução capturada"""
+    with engine.connect() as conn:
+        for rota, instrucoes in captura.instrucoes.items():
+            for instrucao, parametros in instrucoes.items():
+                plano = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {instrucao}", parametros).all()
+                yield rota, instrucao, [linha[-1] for linha in plano]
+
+
+def _percorrer_rotas(captura: _Captura, criar_categoria, criar_obra, criar_usuario) -> None:
+    """Exercita as rotas com os filtros usados pelo frontend."""
+    captura.rota = "cadastros"
+    categoria = criar_categoria("Planos")
+    obra = criar_obra(categoria["id"], exemplares=2, titulo="Obra planejada")
+    usuario = criar_usuario()
+    with SessionLocal() as db:
+        exemplares = db.query(Exemplar).filter(Exemplar.obraId == obra["id"]).order_by(Exemplar.codigo).all()
+
+    for url in ("/categorias/", "/obras/", "/exemplares/", "/usuarios/", "/emprestimos/", "/reservas/"):
+        captura.chamar("GET", url)
+    for colecao in ("obras", "exemplares", "emprestimos", "reservas"):
+        token = captura.chamar("GET", f"/{colecao}/changes").json()["sync_token"]
+        captura.chamar("GET", f"/{colecao}/changes", params={"since": token})
+    captura.chamar("GET", f"/categorias/{categoria['id']}")
+    captura.chamar("GET", "/obras/", params={"categoriaId": categoria["id"], "disponivel": True})
+    for url, params in ORDENACOES_POR_INDICE:
+        captura.chamar("GET", url, params=params)
+    captura.chamar("GET", "/obras/busca", params={"q": "planejada"})
+    captura.chamar("GET", f"/obras/{obra['id']}")
+    captura.chamar("GET", f"/exemplares/{exemplares[0].id}")
+    captura.chamar("GET", f"/usuarios/{usuario['id']}")
+
+    emprestimo = captura.chamar("POST", "/emprestimos/", json={
+        "usuarioId": usuario["id"],
+        "exemplarId": exemplares[0].id,
+        "obraId": obra["id"],
+        "dataEmprestimo": "2020-01-01",
+        "dataPrevistaDevolucao": "2020-01-15",
+    }).json()
+    captura.chamar("GET", "/emprestimos/", params={"usuarioId": usuario["id"], "status": "ativo"})
+    captura.chamar("GET", "/emprestimos/", params={"obraId": obra["id"]})
+    captura.chamar("GET", "/emprestimos/", params={"dataPrevistaDe": "2020-01-01", "dataPrevistaAte": "2020-12-31"})
+    captura.chamar("GET", f"/emprestimos/{emprestimo['id']}")
+    captura.rota = "varredura de atrasos"
+    executar_varredura()
+    captura.chamar("PUT", f"/emprestimos/{emprestimo['id']}", json={"dataDevolucao": "2020-01-10"})
+
+    captura.chamar("POST", "/emprestimos/lote", json={
+        "usuarioId": usuario["id"],
+        "codigos": [e.codigo for e in exemplares],
+        "dataEmprestimo": "2020-02-01",
+        "dataPrevistaDevolucao": "2020-02-15",
+    })
+    captura.chamar("POST", "/emprestimos/devolucoes/lote", json={
+        "codigos": [e.codigo for e in exemplares],
+        "dataDevolucao": "2020-02-10",
+    })
+
+    reserva = captura.chamar("POST", "/reservas/", json={
+        "usuarioId": usuario["id"],
+        "obraId": obra["id"],
+        "dataReserva": "2020-03-01",
+        "dataExpiracao": "2020-03-08",
+    }).json()
+    captura.chamar("GET", f"/reservas/{reserva['id']}")
+
+    captura.chamar("GET", f"/usuarios/{usuario['id']}/dependencias")
+    captura.chamar("DELETE", f"/usuarios/{usuario['id']}")
+    captura.chamar("DELETE", f"/exemplares/{exemplares[1].id}")
+    captura.chamar("DELETE", f"/obras/{obra['id']}")
+    captura.chamar("DELETE", f"/categorias/{categoria['id']}")
+
+
+@pytest.mark.skipif(engine.dialect.name != "sqlite", reason="usa EXPLAIN QUERY PLAN do SQLite")
+def test_nenhuma_rota_varre_tabela_inteira(criar_categoria, criar_obra, criar_usuario) -> None:
+    """roda EXPLAIN QUERY PLAN em cada instrução emitida pelas rotas"""
+    captura = _Captura()
+    event.listen(Engine, "before_cursor_execute", captura)
+    try:
+        _percorrer_rotas(captura, criar_categoria, criar_obra, criar_usuario)
+    finally:
+        event.remove(Engine, "before_cursor_execute", captura)
+
+    varreduras = [
+        f"{rota}: {linha}\n    {instrucao}"
+        for rota, instrucao, plano in _planos(captura)
+        for linha in plano
+        if VARREDURA_COMPLETA.match(linha)
+    ]
+
+    assert sum(len(instrucoes) for instrucoes in captura.instrucoes.values()) > 30
+    assert not varreduras, "\n".join(varreduras)
+
+
+@pytest.mark.skipif(engine.dialect.name != "sqlite", reason="usa EXPLAIN QUERY PLAN do SQLite")
+@pytest.mark.parametrize("url, params", ORDENACOES_POR_INDICE)
+def test_ordenacao_pelo_indice(url: str, params: dict) -> None:
+    """a página sai do índice de (campo, id) já ordenada, sem B-tree temporária"""
+    catalogo.limpar()
+    captura = _Captura()
+    event.listen(Engine, "before_cursor_execute", captura)
+    try:
+        captura.chamar("GET", url, params=params)
+    finally:
+        event.remove(Engine, "before_cursor_execute", captura)
+
+    planos = [(instrucao, plano) for _, instrucao, plano in _planos(captura) if "ORDER BY" in instrucao]
+    assert planos
+    for instrucao, plano in planos:
+        assert any(" USING INDEX " in linha for linha in plano), (plano, instrucao)
+        assert not any(ORDENACAO_TEMPORARIA in linha for linha in plano), (plano, instrucao)
@@ -0,0 +1,97 @@
+"""testes dos feeds de alterações (GET /{coleção}/changes)"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from database import SessionLocal, init_db
+from main import app
+from models.registro_exclusao import RegistroExclusao
+from services import sincronizacao_service
+from services.sincronizacao_service import codificar_token, executar_poda_exclusoes
+
+init_db()
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _sem_janela(monkeypatch) -> None:
+    monkeypatch.setattr(sincronizacao_service, "SINCRONIZACAO_JANELA", 0)
+
+
+def _sincronizar(colecao: str, token: str | None = None, limit: int = 200) -> tuple[list, list, str]:
+    """percorre o feed até o fim; devolve (itens, removidos, token)"""
+    itens, removidos = [], []
+    while True:
+        params = {"limit": limit, **({"since": token} if token else {})}
+        response = client.get(f"/{colecao}/changes", params=params)
+        assert response.status_code == 200
+        corpo = response.json()
+        itens += corpo["items"]
+        removidos += corpo["removidos"]
+        token = corpo["sync_token"]
+        if not corpo["tem_mais"]:
+            return itens, removidos, token
+
+
+def test_alteracoes_e_exclusoes(criar_obra) -> None:
+    """o token retoma exatamente; exclusões em cascata também geram registro"""
+    _, _, token_obras = _sincronizar("obras")
+    _, _, token_exemplares = _sincronizar("exemplares")
+
+    obra = criar_obra(exemplares=2)
+
+    itens, removidos, token_obras = _sincronizar("obras", token_obras)
+    assert [item["id"] for item in itens] == [obra["id"]] and removidos == []
+    itens, _, token_exemplares = _sincronizar("exemplares", token_exemplares)
+    exemplares = {item["id"] for item in itens}
+    assert len(exemplares) == 2
+
+    # nada mudou: nada volta
+    assert _sincronizar("obras", token_obras)[:2] == ([], [])
+
+    client.put(f"/obras/{obra['id']}", json={"titulo": "Título alterado"})
+    itens, _, token_obras = _sincronizar("obras", token_obras)
+    assert [item["titulo"] for item in itens] == ["Título alterado"]
+
+    # a exclusão da obra remove os exemplares pelo ON DELETE CASCADE
+    client.delete(f"/obras/{obra['id']}")
+    assert _sincronizar("obras", token_obras)[:2] == ([], [obra["id"]])
+    itens, removidos, _ = _sincronizar("exemplares", token_exemplares)
+    assert itens == [] and set(removidos) == exemplares
+
+
+def test_paginas_e_janela(monkeypatch, criar_categoria, criar_obra) -> None:
+    """páginas pela chave (atualizado_em, id) e atraso da janela de visibilidade"""
+    _, _, token = _sincronizar("obras")
+    categoria = criar_categoria("Sincronização")
+    criadas = [criar_obra(categoria["id"])["id"] for _ in range(3)]
+
+    primeira = client.get("/obras/changes", params={"since": token, "limit": 2}).json()
+    assert len(primeira["items"]) == 2 and primeira["tem_mais"]
+    itens, _, token = _sincronizar("obras", primeira["sync_token"], limit=2)
+    assert [item["id"] for item in primeira["items"] + itens] == criadas
+
+    monkeypatch.setattr(sincronizacao_service, "SINCRONIZACAO_JANELA", 60)
+    criar_obra(categoria["id"])
+    assert _sincronizar("obras", token)[0] == []
+
+
+def test_tokens_invalidos_e_poda() -> None:
+    """token de outra coleção é recusado; token além da retenção recebe 410"""
+    _, _, token = _sincronizar("reservas")
+    assert client.get("/obras/changes", params={"since": token}).status_code == 400
+    assert client.get("/obras/changes", params={"since": "lixo"}).status_code == 400
+
+    antigo = datetime.utcnow() - timedelta(days=sincronizacao_service.SINCRONIZACAO_RETENCAO_DIAS + 1)
+    expirado = codificar_token("obras", None, (antigo, None))
+    assert client.get("/obras/changes", params={"since": expirado}).status_code == 410
+
+    with SessionLocal() as db:
+        db.add(RegistroExclusao(tabela="obras", registroId="antigo", excluidoEm=antigo))
+        db.commit()
+    assert executar_poda_exclusoes() >= 1
+    with SessionLocal() as db:
+        assert db.query(RegistroExclusao).filter(RegistroExclusao.registroId == "antigo").count() == 0
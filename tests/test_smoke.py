@@ -27,14 +27,14 @@ def test_healthcheck() -> None:
 def test_listar_usuarios_vazio_ok() -> None:
     response = client.get("/usuarios/")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
+    assert isinstance(response.json()["items"], list)
 
 
 def test_listar_obras() -> None:
     """testa listagem de obras cadastradas"""
     response = client.get("/obras/")
     assert response.status_code == 200
-    obras = response.json()
+    obras = response.json()["items"]
     assert isinstance(obras, list)
 
 
@@ -42,7 +42,7 @@ def test_listar_categorias() -> None:
     """testa endpoint de categorias"""
     response = client.get("/categorias/")
     assert response.status_code == 200
-    categorias = response.json()
+    categorias = response.json()["items"]
     assert isinstance(categorias, list)
 
 